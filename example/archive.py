@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot イベントアーカイブモジュール
+
+終了したイベントを追記専用のYAMLファイルに移し、ページ単位で参照するためのモジュール
+"""
+
+import os
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import List, Set, Tuple
+
+import yaml
+
+from records import Event, events_to_yaml
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-event-archive")
+
+# ドキュメントの区切りとトップレベルのIDの行
+_DOCUMENT_START = b"---"
+_ID_LINE = re.compile(rb"^id: (\d+)\s*$")
+
+
+class EventArchive:
+    """終了したイベントのアーカイブ
+
+    イベント1件を1つのYAMLドキュメントとしてファイル末尾に追記します。
+    起動時に各ドキュメントの開始位置とIDだけを記録しておき、参照時は該当ページの
+    ドキュメントだけを読み込んで解析します
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._offsets: List[int] = []
+        self._size = 0
+        self._ids: Set[int] = set()
+        self.max_id = 0
+        self._scan()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _scan(self):
+        """ファイルを走査してドキュメントの開始位置とIDを記録"""
+        self._offsets = []
+        self._size = 0
+        self._ids = set()
+        self.max_id = 0
+        if not self.path.exists():
+            return
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.startswith(_DOCUMENT_START):
+                    self._offsets.append(offset)
+                else:
+                    match = _ID_LINE.match(line)
+                    if match:
+                        self._ids.add(int(match.group(1)))
+                offset += len(line)
+        self._size = offset
+        self.max_id = max(self._ids, default=0)
+        logger.info(f"アーカイブ済みイベント{len(self._offsets)}件を確認しました")
+
+    def memory_usage(self) -> int:
+        """開始位置とIDの索引のおおよそのサイズ（バイト）"""
+        return (sys.getsizeof(self._offsets) + sum(sys.getsizeof(offset) for offset in self._offsets)
+                + sys.getsizeof(self._ids) + sum(sys.getsizeof(event_id) for event_id in self._ids))
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._ids
+
+    def refresh(self):
+        """他のプロセスが追記していれば走査し直す"""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size != self._size:
+            self._scan()
+
+    def append(self, events: List[Event]) -> bool:
+        """イベントをアーカイブに追記
+
+        アーカイブ済みのIDは追記しません（アーカイブ後にイベントファイルの保存が失敗・中断し、
+        同じイベントをもう一度アーカイブしようとした場合に重複させないため）
+        """
+        self.refresh()
+        skipped = sum(1 for event in events if event.id in self._ids)
+        if skipped:
+            logger.warning(f"アーカイブ済みのイベント{skipped}件の追記を省略しました")
+            events = [event for event in events if event.id not in self._ids]
+        if not events:
+            return True
+        try:
+            text = yaml.dump_all(events_to_yaml(events), allow_unicode=True,
+                                 default_flow_style=False, explicit_start=True)
+            data = text.encode("utf-8")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._size = offset + len(data)
+        except Exception as e:
+            logger.error(f"イベントのアーカイブに失敗しました: {e}")
+            return False
+
+        # 追記したドキュメントの開始位置を記録
+        for line in data.splitlines(keepends=True):
+            if line.startswith(_DOCUMENT_START):
+                self._offsets.append(offset)
+            offset += len(line)
+        for event in events:
+            if isinstance(event.id, int):
+                self._ids.add(event.id)
+                self.max_id = max(self.max_id, event.id)
+        logger.info(f"{len(events)}件のイベントをアーカイブしました")
+        return True
+
+    def page(self, page: int, per_page: int = 5) -> Tuple[List[Event], int]:
+        """新しい順にページ単位でイベントを取得
+
+        戻り値は (イベント一覧, 総ページ数)
+        """
+        total = len(self._offsets)
+        pages = max(1, -(-total // per_page))
+        # 新しい順にするため末尾から数える
+        end = total - (page - 1) * per_page
+        start = max(0, end - per_page)
+        if end <= 0 or page < 1:
+            return [], pages
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[start])
+            if end < total:
+                data = f.read(self._offsets[end] - self._offsets[start])
+            else:
+                data = f.read()
+        events = [Event.from_dict(doc) for doc in yaml.safe_load_all(data.decode("utf-8")) if doc]
+        events.reverse()
+        return events, pages
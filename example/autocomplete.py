@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 入力補完モジュール
+
+スラッシュコマンドの入力補完（カテゴリ・タグ・難易度・タイトル）のための前方一致インデックス
+補完はキー入力ごとに呼ばれるため、100万件でも1回の検索が1ms未満で終わるようにしています
+"""
+
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from facets import CATEGORY, DIFFICULTY, TAG
+from normalize import normalize
+from records import Resource
+
+# タイトルのファセット名（補完専用）
+TITLE = "title"
+COMPLETION_FIELDS = (CATEGORY, DIFFICULTY, TAG, TITLE)
+
+# 1回の補完で返す最大件数（Discordの上限）
+MAX_CHOICES = 25
+
+# バケットの目安の件数（この2倍を超えたら分割する）
+BUCKET_SIZE = 512
+
+Entry = Tuple[str, str]
+
+
+class PrefixIndex:
+    """正規化したキーによる前方一致インデックス
+
+    (キー, 表示名) をキー順に並べ、一定件数ごとのバケットに分けて保持します（バースト型のトライ）
+    検索は各バケットの最大値の二分探索とバケット内の二分探索で行い、追加・削除は
+    1つのバケットだけを書き換えます。同じ (キー, 表示名) は参照数で管理します
+    """
+
+    def __init__(self, bucket_size: int = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self._buckets: List[List[Entry]] = []
+        self._maxes: List[Entry] = []
+        self._counts: Dict[Entry, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def rebuild(self, items: Iterable[Tuple[str, str]]):
+        """(キーにする文字列, 表示名) の組からまとめて作り直す"""
+        counts = Counter((normalize(text), label) for text, label in items)
+        entries = sorted(counts)
+        size = self.bucket_size
+        self._counts = dict(counts)
+        self._buckets = [entries[i:i + size] for i in range(0, len(entries), size)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+
+    def add(self, text: str, label: str):
+        """エントリを追加"""
+        entry = (normalize(text), label)
+        count = self._counts.get(entry, 0)
+        self._counts[entry] = count + 1
+        if count:
+            return
+
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+
+        i = bisect_left(self._maxes, entry)
+        if i == len(self._maxes):
+            i -= 1
+            self._buckets[i].append(entry)
+            self._maxes[i] = entry
+        else:
+            insort(self._buckets[i], entry)
+
+        bucket = self._buckets[i]
+        if len(bucket) > self.bucket_size * 2:
+            # 大きくなりすぎたバケットを分割
+            half = bucket[self.bucket_size:]
+            del bucket[self.bucket_size:]
+            self._buckets.insert(i + 1, half)
+            self._maxes[i] = bucket[-1]
+            self._maxes.insert(i + 1, half[-1])
+
+    def discard(self, text: str, label: str):
+        """エントリを削除（参照が残っている場合は参照数だけを減らす）"""
+        entry = (normalize(text), label)
+        count = self._counts.get(entry)
+        if not count:
+            return
+        if count > 1:
+            self._counts[entry] = count - 1
+            return
+
+        del self._counts[entry]
+        i = bisect_left(self._maxes, entry)
+        bucket = self._buckets[i]
+        del bucket[bisect_left(bucket, entry)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+
+    def _scan(self, key: str) -> Iterator[Entry]:
+        """キーが key で始まるエントリをキー順に返す"""
+        start = (key,)
+        i = bisect_left(self._maxes, start)
+        if i == len(self._buckets):
+            return
+        j = bisect_left(self._buckets[i], start)
+        for bucket in self._buckets[i:]:
+            for entry in bucket[j:] if j else bucket:
+                if not entry[0].startswith(key):
+                    return
+                yield entry
+            j = 0
+
+    def search(self, prefix: str, limit: int = MAX_CHOICES) -> List[str]:
+        """入力中の文字列で始まる表示名をキー順に返す（重複は除く）"""
+        results: List[str] = []
+        seen = set()
+        for _, label in self._scan(normalize(prefix)):
+            if label in seen:
+                continue
+            seen.add(label)
+            results.append(label)
+            if len(results) >= limit:
+                break
+        return results
+
+    def memory_usage(self) -> int:
+        """インデックスのおおよそのサイズ（バイト）"""
+        size = sys.getsizeof(self._buckets) + sys.getsizeof(self._maxes) + sys.getsizeof(self._counts)
+        size += sum(sys.getsizeof(bucket) for bucket in self._buckets)
+        return size + sum(sys.getsizeof(entry) + sys.getsizeof(entry[0]) for entry in self._counts)
+
+
+def _title_keys(title: str) -> Iterator[str]:
+    """タイトルの補完キー（タイトル全体と2語目以降の各単語から始まる部分）"""
+    yield title
+    words = title.split()
+    for i in range(1, len(words)):
+        yield " ".join(words[i:])
+
+
+class ResourceCompleter:
+    """リソースのカテゴリ・難易度・タグ・タイトルの補完
+
+    FacetIndex と同じくリソースの追加・削除・更新のたびに差分だけを反映します
+    リソースごとに登録したエントリを記録しておき、削除時はそれを取り除きます
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, PrefixIndex] = {field: PrefixIndex() for field in COMPLETION_FIELDS}
+        self._entries: Dict[int, List[Tuple[str, str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _resource_entries(self, resource: Resource) -> List[Tuple[str, str, str]]:
+        entries = []
+        if resource.category:
+            entries.append((CATEGORY, resource.category, resource.category))
+        if resource.difficulty:
+            entries.append((DIFFICULTY, resource.difficulty, resource.difficulty))
+        for tag in resource.tags or ():
+            entries.append((TAG, tag, tag))
+        if resource.title:
+            entries.extend((TITLE, key, resource.title) for key in _title_keys(resource.title))
+        return entries
+
+    def rebuild(self, resources: Dict[str, List[Resource]]):
+        """全リソースから補完インデックスを作り直す"""
+        self._entries = {
+            resource.id: self._resource_entries(resource)
+            for items in resources.values() for resource in items
+        }
+        for field, index in self._indexes.items():
+            index.rebuild((text, label) for entries in self._entries.values()
+                          for entry_field, text, label in entries if entry_field == field)
+
+    def add(self, resource: Resource):
+        """リソースを補完インデックスに追加"""
+        self.remove(resource.id)
+        entries = self._entries[resource.id] = self._resource_entries(resource)
+        for field, text, label in entries:
+            self._indexes[field].add(text, label)
+
+    def remove(self, resource_id: int):
+        """リソースを補完インデックスから削除"""
+        for field, text, label in self._entries.pop(resource_id, ()):
+            self._indexes[field].discard(text, label)
+
+    def update(self, resource: Resource):
+        """変更されたリソースの補完インデックスを更新"""
+        self.add(resource)
+
+    def complete(self, field: str, current: str, limit: int = MAX_CHOICES) -> List[str]:
+        """入力中の文字列の候補"""
+        return self._indexes[field].search(current, limit)
+
+    def memory_usage(self) -> int:
+        """インデックスのおおよそのサイズ（バイト）"""
+        size = sys.getsizeof(self._entries) + sum(sys.getsizeof(entries) for entries in self._entries.values())
+        return size + sum(index.memory_usage() for index in self._indexes.values())
+
+
+def benchmark(n: int = 1_000_000, queries: int = 10_000):
+    """件数 n のインデックスで1回の補完にかかる時間を計測"""
+    import random
+    import time
+
+    rng = random.Random(0)
+    words = ["機械学習", "深層学習", "Transformer", "PyTorch", "データ分析", "強化学習", "入門", "実践",
+             "ニューラルネットワーク", "統計", "NLP", "画像認識", "python", "LLM", "Kaggle"]
+    items = []
+    for i in range(n):
+        title = f"{rng.choice(words)} {rng.choice(words)} {i}"
+        items.append((title, title))
+
+    index = PrefixIndex()
+    started = time.perf_counter()
+    index.rebuild(items)
+    print(f"構築: {n:,}件 {time.perf_counter() - started:.2f}秒")
+
+    prefixes = [rng.choice(words)[:rng.randint(0, 4)] for _ in range(queries)]
+    started = time.perf_counter()
+    for prefix in prefixes:
+        index.search(prefix)
+    average = (time.perf_counter() - started) / queries
+    print(f"補完: 平均 {average * 1e6:.1f}μs/回")
+
+    started = time.perf_counter()
+    for i in range(queries):
+        title = f"{rng.choice(words)} 追加 {i}"
+        index.add(title, title)
+    average = (time.perf_counter() - started) / queries
+    print(f"追加: 平均 {average * 1e6:.1f}μs/件")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -21,7 +21,7 @@ from discord.ext import commands, tasks
 # ロギングの設定
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler("bot.log", encoding="utf-8"),
         logging.StreamHandler()
@@ -31,16 +31,45 @@ logger = logging.getLogger("sumeragi-bot")
 
 # 環境変数の読み込み
 load_dotenv()
+
+# 自作モジュールは読み込み時に環境変数を参照するため、環境変数の読み込み後にインポートする
+from dispatcher import Priority, get_dispatcher
+from guild_settings import GLOBAL, command_prefix, get_guild_settings, presence_activity
+from readiness import NotReady
+from join_coalescer import JoinCoalescer
+from slash_commands import command_hint, configure_intents, invoke, on_app_command_error, sync_commands
+
 TOKEN = os.getenv('DISCORD_TOKEN')
-PREFIX = os.getenv('COMMAND_PREFIX', '!')
+
+# 参加が集中した際にウェルカムメッセージをまとめる待機時間（秒）と最大人数
+WELCOME_COALESCE_SECONDS = float(os.getenv('WELCOME_COALESCE_SECONDS', '5'))
+WELCOME_MAX_BURST = int(os.getenv('WELCOME_MAX_BURST', '50'))
 
 # BOTのインテント設定
-intents = discord.Intents.default()
-intents.message_content = True
+# スラッシュコマンド専用モード（SLASH_ONLY=true）ではメッセージ本文を受け取らない
+intents = configure_intents(discord.Intents.default())
 intents.members = True
 
+class SumeragiBot(commands.Bot):
+    """終了時にまとめ待ちの参加者を歓迎してから切断するBot"""
+    
+    async def close(self):
+        """Botの終了時の処理（bot.run の終了やCtrl+Cでも呼ばれる）"""
+        await join_coalescer.close()
+        await super().close()
+
 # Botのインスタンス生成
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
+# コマンドの接頭辞はサーバーごとの設定から返す（既定値は COMMAND_PREFIX）
+bot = SumeragiBot(command_prefix=command_prefix, intents=intents, help_command=None)
+
+# スラッシュコマンドのエラー処理
+bot.tree.error(on_app_command_error)
+
+# サーバーごとの設定（接頭辞・チャンネル名・ステータスの文言）
+settings = get_guild_settings(bot)
+
+# 送信ディスパッチャ（すべての送信は優先度付きキューを経由する）
+outbound = get_dispatcher(bot)
 
 # AI関連のトピックリスト
 AI_TOPICS = [
@@ -57,37 +86,53 @@ WELCOME_MESSAGES = [
     "AI学習コミュニティへようこそ。あなたの参加がコミュニティに新しい価値をもたらします。"
 ]
 
+# 接続前の処理
+@bot.event
+async def setup_hook():
+    """Gatewayへの接続前に呼ばれる処理"""
+    # 設定変更コマンド（!config）を読み込む
+    await bot.load_extension("guild_settings")
+    await sync_commands(bot)
+
 # BOTの起動時の処理
 @bot.event
 async def on_ready():
     """Botが起動した際に実行される処理"""
     logger.info(f"{bot.user.name} を起動しました（ID: {bot.user.id}）")
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name="AIの世界 | !help"
-        )
-    )
+    await outbound.call("presence", Priority.PRESENCE, lambda: bot.change_presence(
+        activity=presence_activity(bot)
+    ))
     status_update.start()
 
 # ステータスの定期更新
 @tasks.loop(minutes=30)
 async def status_update():
-    """Botのステータスを定期的に更新"""
-    topic = random.choice(AI_TOPICS)
-    await bot.change_presence(
-        activity=discord.Activity(
+    """Botのステータスを定期的に更新
+    
+    `!config presence` で文言が設定されている場合は、トピックではなくその文言を表示します
+    """
+    settings.reload_if_changed()
+    if settings.get(GLOBAL, "presence") != settings.defaults["presence"]:
+        activity = presence_activity(bot)
+    else:
+        activity = discord.Activity(
             type=discord.ActivityType.studying,
-            name=f"{topic} | !help"
+            name=f"{random.choice(AI_TOPICS)} | {command_hint(settings.get(GLOBAL, 'prefix'))}help"
         )
-    )
+    await outbound.call("presence", Priority.PRESENCE, lambda: bot.change_presence(activity=activity))
 
 # 新規メンバー参加時のウェルカムメッセージ
-@bot.event
-async def on_member_join(member):
-    """新しいメンバーが参加した時に実行される処理"""
-    welcome_channel = discord.utils.get(member.guild.text_channels, name="welcome")
-    if welcome_channel:
+async def send_welcome(guild, members):
+    """参加したメンバーへのウェルカムメッセージを送信
+    
+    1名の場合は個別に、複数名の場合は1つのメッセージにまとめて歓迎します
+    """
+    welcome_channel = discord.utils.get(guild.text_channels, name=settings.get(guild.id, "welcome_channel"))
+    if not welcome_channel:
+        return
+    
+    if len(members) == 1:
+        member = members[0]
         embed = discord.Embed(
             title="🌟 新メンバー参加",
             description=random.choice(WELCOME_MESSAGES),
@@ -96,9 +141,39 @@ async def on_member_join(member):
         embed.set_thumbnail(url=member.display_avatar.url)
         embed.add_field(name="メンバー名", value=member.mention, inline=True)
         embed.add_field(name="参加日時", value=member.joined_at.strftime("%Y-%m-%d %H:%M"), inline=True)
-        embed.set_footer(text=f"S.U.M.E.R.A.G.I. - {datetime.now().strftime('%Y-%m-%d')}")
+    else:
+        embed = discord.Embed(
+            title=f"🌟 新メンバー{len(members)}名が参加",
+            description=random.choice(WELCOME_MESSAGES),
+            color=0x4a6baf
+        )
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
         
-        await welcome_channel.send(embed=embed)
+        # フィールドの文字数上限（1024文字）に収まるように分割
+        chunks = [[]]
+        length = 0
+        for member in members:
+            if length + len(member.mention) + 1 > 1024:
+                chunks.append([])
+                length = 0
+            chunks[-1].append(member.mention)
+            length += len(member.mention) + 1
+        for chunk in chunks:
+            embed.add_field(name="メンバー名", value=" ".join(chunk), inline=False)
+    
+    embed.set_footer(text=f"S.U.M.E.R.A.G.I. - {datetime.now().strftime('%Y-%m-%d')}")
+    await outbound.send(welcome_channel, embed=embed, priority=Priority.WELCOME, wait=False)
+
+join_coalescer = JoinCoalescer(send_welcome, window=WELCOME_COALESCE_SECONDS, max_burst=WELCOME_MAX_BURST)
+
+@bot.event
+async def on_member_join(member):
+    """新しいメンバーが参加した時に実行される処理
+    
+    参加が集中した場合に備え、一定時間バッファリングしてからまとめて歓迎します
+    """
+    join_coalescer.add(member)
 
 # メッセージに反応する処理
 @bot.event
@@ -110,7 +185,8 @@ async def on_message(message):
 
     # メンションされたら反応
     if bot.user in message.mentions:
-        await message.channel.send(f"{message.author.mention} こんにちは！何かお手伝いできることはありますか？`!help`でコマンド一覧を確認できます。")
+        hint = command_hint(settings.prefix(message.guild.id if message.guild else None))
+        await outbound.send(message.channel, f"{message.author.mention} こんにちは！何かお手伝いできることはありますか？`{hint}help`でコマンド一覧を確認できます。")
     
     # コマンド処理を継続
     await bot.process_commands(message)
@@ -125,20 +201,21 @@ async def help_command(ctx):
         color=0x4a6baf
     )
     
-    # コマンドリスト
+    # コマンドリスト（スラッシュコマンドから呼ばれた場合は「/」）
+    hint = command_hint(ctx.clean_prefix)
     commands_list = [
-        {"name": f"{PREFIX}help", "value": "このヘルプメニューを表示します"},
-        {"name": f"{PREFIX}about", "value": "S.U.M.E.R.A.G.I.について説明します"},
-        {"name": f"{PREFIX}topic", "value": "AIに関するランダムなトピックを提案します"},
-        {"name": f"{PREFIX}resources", "value": "AIの学習リソースを表示します"},
-        {"name": f"{PREFIX}events", "value": "予定されているイベントを表示します"}
+        {"name": f"{hint}help", "value": "このヘルプメニューを表示します"},
+        {"name": f"{hint}about", "value": "S.U.M.E.R.A.G.I.について説明します"},
+        {"name": f"{hint}topic", "value": "AIに関するランダムなトピックを提案します"},
+        {"name": f"{hint}resources", "value": "AIの学習リソースを表示します"},
+        {"name": f"{hint}events", "value": "予定されているイベントを表示します"}
     ]
     
     for cmd in commands_list:
         embed.add_field(name=cmd["name"], value=cmd["value"], inline=False)
     
     embed.set_footer(text=f"S.U.M.E.R.A.G.I. - {ctx.author.name}からのリクエスト")
-    await ctx.send(embed=embed)
+    await outbound.send(ctx, embed=embed)
 
 # Aboutコマンド
 @bot.command(name="about")
@@ -166,7 +243,7 @@ async def about_command(ctx):
         embed.add_field(name=exp["name"], value=exp["value"], inline=False)
     
     embed.set_footer(text="「相乗効果を生み出す統一された機械学習教育リソースを通じて汎用人工知能について学べるコミュニティ」")
-    await ctx.send(embed=embed)
+    await outbound.send(ctx, embed=embed)
 
 # トピック提案コマンド
 @bot.command(name="topic")
@@ -181,7 +258,7 @@ async def topic_command(ctx):
     )
     embed.set_footer(text="このトピックについて話し合ってみましょう！")
     
-    await ctx.send(embed=embed)
+    await outbound.send(ctx, embed=embed)
 
 # リソース表示コマンド
 @bot.command(name="resources")
@@ -206,7 +283,7 @@ async def resources_command(ctx):
         embed.add_field(name=resource["name"], value=resource["value"], inline=False)
     
     embed.set_footer(text="定期的に更新されます。提案は #resource-suggestions チャンネルへ")
-    await ctx.send(embed=embed)
+    await outbound.send(ctx, embed=embed)
 
 # イベント表示コマンド
 @bot.command(name="events")
@@ -232,20 +309,83 @@ async def events_command(ctx):
             inline=False
         )
     
-    embed.set_footer(text="イベントは予告なく変更される場合があります。#announcements チャンネルをご確認ください")
-    await ctx.send(embed=embed)
+    channel = settings.get(ctx.guild.id if ctx.guild else None, "announcements_channel")
+    embed.set_footer(text=f"イベントは予告なく変更される場合があります。#{channel} チャンネルをご確認ください")
+    await outbound.send(ctx, embed=embed)
+
+# スラッシュコマンド（同じ名前のプレフィックスコマンドと同じ処理を呼び出す）
+@bot.tree.command(name="help", description="コマンド一覧を表示します")
+async def help_slash(interaction: discord.Interaction):
+    await invoke(interaction, help_command)
+
+@bot.tree.command(name="about", description="S.U.M.E.R.A.G.I.について説明します")
+async def about_slash(interaction: discord.Interaction):
+    await invoke(interaction, about_command)
+
+@bot.tree.command(name="topic", description="AIに関するランダムなトピックを提案します")
+async def topic_slash(interaction: discord.Interaction):
+    await invoke(interaction, topic_command)
+
+@bot.tree.command(name="resources", description="AIの学習リソースを表示します")
+async def resources_slash(interaction: discord.Interaction):
+    await invoke(interaction, resources_command)
+
+@bot.tree.command(name="events", description="予定されているイベントを表示します")
+async def events_slash(interaction: discord.Interaction):
+    await invoke(interaction, events_command)
+
+# ウェルカムメッセージの統計コマンド
+@bot.command(name="welcomestats")
+@commands.has_permissions(administrator=True)
+async def welcome_stats_command(ctx):
+    """ウェルカムメッセージのまとめ送信の統計を表示するコマンド"""
+    stats = join_coalescer.stats()
+    embed = discord.Embed(
+        title="📈 ウェルカムメッセージ統計",
+        description=f"待機時間 {stats['window']:.1f}秒 / 最大 {stats['max_burst']}名でまとめて送信",
+        color=0x4a6baf
+    )
+    embed.add_field(name="送信回数", value=f"{stats['bursts']}回", inline=True)
+    embed.add_field(name="歓迎したメンバー", value=f"{stats['members']}名", inline=True)
+    embed.add_field(name="待機中のサーバー", value=f"{stats['pending_guilds']}件", inline=True)
+    embed.add_field(name="平均まとめ人数", value=f"{stats['average_burst']:.1f}名（最大 {stats['largest_burst']}名）", inline=True)
+    embed.add_field(name="平均待機時間", value=f"{stats['average_latency']:.1f}秒（最大 {stats['max_latency']:.1f}秒）", inline=True)
+    await outbound.send(ctx, embed=embed)
+
+# 送信キューの統計コマンド
+@bot.command(name="sendstats")
+@commands.has_permissions(administrator=True)
+async def send_stats_command(ctx):
+    """送信キューの優先度ごとの統計を表示するコマンド"""
+    stats = outbound.stats()
+    embed = discord.Embed(
+        title="📮 送信キュー統計",
+        description=f"レート制限バケット {stats['buckets']}件 / 送信中 {stats['inflight']}件",
+        color=0x4a6baf
+    )
+    for priority in Priority:
+        s = stats[priority.name.lower()]
+        embed.add_field(
+            name=priority.name,
+            value=(f"待機 {s['queued']} / 送信 {s['sent']} / 失敗 {s['failed']} / 破棄 {s['dropped']}\n"
+                   f"429 {s['rate_limited']}回 / 平均待ち {s['average_wait']:.2f}秒（最大 {s['max_wait']:.2f}秒）"),
+            inline=False
+        )
+    await outbound.send(ctx, embed=embed)
 
 # エラーハンドリング
 @bot.event
 async def on_command_error(ctx, error):
     """コマンドエラー時の処理"""
-    if isinstance(error, commands.CommandNotFound):
-        await ctx.send(f"コマンドが見つかりません。`{PREFIX}help`でコマンド一覧を確認できます。")
+    if isinstance(error, NotReady):
+        await outbound.send(ctx, f"⏳ {error}")
+    elif isinstance(error, commands.CommandNotFound):
+        await outbound.send(ctx, f"コマンドが見つかりません。`{ctx.clean_prefix}help`でコマンド一覧を確認できます。")
     elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send(f"必要な引数が不足しています。`{PREFIX}help`で使い方を確認してください。")
+        await outbound.send(ctx, f"必要な引数が不足しています。`{ctx.clean_prefix}help`で使い方を確認してください。")
     else:
         logger.error(f"エラーが発生しました: {error}")
-        await ctx.send("コマンド実行中にエラーが発生しました。しばらくしてからもう一度お試しください。")
+        await outbound.send(ctx, "コマンド実行中にエラーが発生しました。しばらくしてからもう一度お試しください。")
 
 # メイン処理
 def main():
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 診断モジュール
+
+メモリ使用量の調査を行うための管理者向けCog
+各Cogのデータ構造とインデックスのサイズ、discord.pyのキャッシュ件数を表示し、
+tracemallocのスナップショットの差分からメモリを確保している箇所を特定します
+tracemallocは `!memstats start` を実行するまで有効にならないため、通常時の負荷はありません
+"""
+
+import gc
+import os
+import sys
+import random
+import logging
+import tracemalloc
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import discord
+from discord.ext import commands
+
+from dispatcher import get_dispatcher
+from readiness import STATE_LABELS, get_readiness
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-diagnostics")
+
+# サイズを推定する際にサンプリングするレコード数
+SAMPLE_SIZE = 1000
+
+# スナップショットから除外するフレーム
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> int:
+    """現在のプロセスの常駐メモリ（取得できない環境では0）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+    except ImportError:
+        return 0
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """オブジェクトが参照しているコンテナ・__slots__ を含めたサイズ（バイト）"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    size += deep_sizeof(getattr(obj, slot), seen)
+        if hasattr(obj, "__dict__"):
+            size += deep_sizeof(obj.__dict__, seen)
+    return size
+
+
+def estimate_sizeof(records: Sequence[Any], sample: int = SAMPLE_SIZE) -> int:
+    """レコード列のサイズをサンプリングで推定する
+
+    全件を走査するとイベントループを長時間止めてしまうため、一部のレコードの平均から推定します
+    """
+    if not records:
+        return sys.getsizeof(records)
+    picked = records if len(records) <= sample else random.sample(list(records), sample)
+    average = sum(deep_sizeof(record) for record in picked) / len(picked)
+    return sys.getsizeof(records) + int(average * len(records))
+
+
+def format_bytes(size: float) -> str:
+    """バイト数を読みやすい単位で表示"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.1f}{unit}" if unit != "B" else f"{int(size)}B"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def _field_text(lines: Iterable[str], limit: int = 1000) -> str:
+    """埋め込みのフィールドに収まるようにコードブロックを作成"""
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 1 > limit:
+            break
+        text += line + "\n"
+    return f"```\n{text or '(なし)'}```"
+
+
+class Diagnostics(commands.Cog):
+    """メモリ診断を行うCog"""
+
+    def __init__(self, bot):
+        """初期化"""
+        self.bot = bot
+        self.outbound = get_dispatcher(bot)
+        self.snapshots = []
+
+    def cog_unload(self):
+        """Cogのアンロード時に呼ばれる処理"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.snapshots = []
+
+    def data_stats(self) -> Dict[str, Dict[str, Tuple[int, int]]]:
+        """各Cogのデータ構造の件数とサイズ
+
+        Cogが memory_stats() を実装していればその結果を使用します
+        """
+        stats = {}
+        for name, cog in self.bot.cogs.items():
+            memory_stats = getattr(cog, "memory_stats", None)
+            if callable(memory_stats):
+                stats[name] = memory_stats()
+        return stats
+
+    def cache_stats(self) -> Dict[str, int]:
+        """discord.pyのキャッシュ件数"""
+        guilds = self.bot.guilds
+        return {
+            "guilds": len(guilds),
+            "users": len(self.bot.users),
+            "members": sum(len(guild.members) for guild in guilds),
+            "channels": sum(len(guild.channels) for guild in guilds),
+            "roles": sum(len(guild.roles) for guild in guilds),
+            "emojis": len(self.bot.emojis),
+            "stickers": len(self.bot.stickers),
+            "messages": len(self.bot.cached_messages),
+            "private_channels": len(self.bot.private_channels),
+        }
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        # 差分に必要な直近2つだけを保持
+        self.snapshots = (self.snapshots + [snapshot])[-2:]
+        return snapshot
+
+    @commands.group(name="memstats", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def memstats(self, ctx):
+        """メモリ使用状況を表示するコマンド"""
+        embed = discord.Embed(
+            title="🧮 メモリ使用状況",
+            description=f"プロセスの常駐メモリ: {format_bytes(rss_bytes())}",
+            color=0x4a6baf
+        )
+
+        for cog_name, stats in self.data_stats().items():
+            lines = [f"{label:<16} {count:>9,}件 {format_bytes(size):>9}" for label, (count, size) in stats.items()]
+            embed.add_field(name=f"{cog_name} のデータ", value=_field_text(lines), inline=False)
+
+        cache_lines = [f"{name:<16} {count:>9,}" for name, count in self.cache_stats().items()]
+        embed.add_field(name="discord.py キャッシュ", value=_field_text(cache_lines), inline=False)
+
+        queue = self.outbound.stats()
+        queued = sum(queue[priority]["queued"] for priority in ("interactive", "notification", "welcome", "presence"))
+        gc_counts = "/".join(str(count) for count in gc.get_count())
+        embed.add_field(
+            name="その他",
+            value=f"送信キュー {queued}件 / レート制限バケット {queue['buckets']}件 / GC世代別カウント {gc_counts}",
+            inline=False
+        )
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            embed.set_footer(text=f"tracemalloc 計測中: 現在 {format_bytes(current)} / ピーク {format_bytes(peak)}")
+        else:
+            embed.set_footer(text="tracemalloc は停止中です（!memstats start で開始）")
+        await self.outbound.send(ctx, embed=embed)
+
+    @commands.command(name="cogstatus")
+    @commands.has_permissions(administrator=True)
+    async def show_cog_status(self, ctx):
+        """Cogごとのデータ読み込み状況と所要時間を表示するコマンド"""
+        stats = get_readiness(self.bot).stats()
+        lines = [f"{name:<16} {STATE_LABELS[s['state']]:<6} {s['elapsed']:>7.2f}秒" for name, s in stats.items()]
+        embed = discord.Embed(
+            title="🚦 Cogの準備状況",
+            description=_field_text(lines, limit=4000),
+            color=0x4a6baf
+        )
+        for name, s in stats.items():
+            if s["error"]:
+                embed.add_field(name=f"{name} のエラー", value=s["error"][:1000], inline=False)
+        await self.outbound.send(ctx, embed=embed)
+
+    @memstats.command(name="start")
+    @commands.has_permissions(administrator=True)
+    async def memstats_start(self, ctx, frames: int = 1):
+        """tracemallocを開始して基準となるスナップショットを取得するコマンド
+
+        例: !memstats start 5
+        """
+        if tracemalloc.is_tracing():
+            await self.outbound.send(ctx, "tracemalloc は既に計測中です。")
+            return
+        tracemalloc.start(max(1, frames))
+        self.snapshots = []
+        self._take_snapshot()
+        logger.info(f"tracemalloc を開始しました（フレーム数: {frames}）")
+        await self.outbound.send(ctx, f"tracemalloc を開始し、基準のスナップショットを取得しました（フレーム数: {frames}）。")
+
+    @memstats.command(name="stop")
+    @commands.has_permissions(administrator=True)
+    async def memstats_stop(self, ctx):
+        """tracemallocを停止してスナップショットを破棄するコマンド"""
+        if not tracemalloc.is_tracing():
+            await self.outbound.send(ctx, "tracemalloc は停止中です。")
+            return
+        tracemalloc.stop()
+        self.snapshots = []
+        logger.info("tracemalloc を停止しました")
+        await self.outbound.send(ctx, "tracemalloc を停止しました。")
+
+    @memstats.command(name="top")
+    @commands.has_permissions(administrator=True)
+    async def memstats_top(self, ctx, limit: int = 10):
+        """現在メモリを多く確保している箇所を表示するコマンド"""
+        if not tracemalloc.is_tracing():
+            await self.outbound.send(ctx, "tracemalloc が停止中です。`!memstats start` で開始してください。")
+            return
+        snapshot = self._take_snapshot()
+        stats = snapshot.statistics("lineno")[:limit]
+        lines = [f"{format_bytes(stat.size):>9} {stat.count:>7}個 {stat.traceback.format()[0].strip()}" for stat in stats]
+        embed = discord.Embed(
+            title="🧮 メモリ確保箇所（上位）",
+            description=_field_text(lines, limit=4000),
+            color=0x4a6baf
+        )
+        await self.outbound.send(ctx, embed=embed)
+
+    @memstats.command(name="diff")
+    @commands.has_permissions(administrator=True)
+    async def memstats_diff(self, ctx, limit: int = 10):
+        """前回のスナップショットからの増加量が大きい箇所を表示するコマンド"""
+        if not tracemalloc.is_tracing():
+            await self.outbound.send(ctx, "tracemalloc が停止中です。`!memstats start` で開始してください。")
+            return
+        snapshot = self._take_snapshot()
+        if len(self.snapshots) < 2:
+            await self.outbound.send(ctx, "比較するスナップショットがありません。")
+            return
+        stats = snapshot.compare_to(self.snapshots[0], "lineno")[:limit]
+        total = sum(stat.size_diff for stat in snapshot.compare_to(self.snapshots[0], "filename"))
+        lines = [f"{format_bytes(stat.size_diff):>9} {stat.count_diff:>+7}個 {stat.traceback.format()[0].strip()}"
+                 for stat in stats]
+        embed = discord.Embed(
+            title="🧮 メモリ増加箇所（前回のスナップショットとの差分）",
+            description=f"合計 {format_bytes(total)}\n" + _field_text(lines, limit=4000),
+            color=0x4a6baf
+        )
+        await self.outbound.send(ctx, embed=embed)
+
+# Cogのセットアップ関数
+async def setup(bot):
+    """Cogをbotに追加する関数"""
+    await bot.add_cog(Diagnostics(bot))
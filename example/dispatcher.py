@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 送信ディスパッチャモジュール
+
+すべての送信（コマンドの返信、イベント通知、ウェルカムメッセージ、ステータス更新）を
+優先度付きのキューに集約し、チャンネルごとのレート制限を守って送信するためのモジュール
+"""
+
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-dispatcher")
+
+# この件数のジョブを処理するごとに使われていないバケットを削除
+_PRUNE_INTERVAL = 1000
+
+# レート制限（429）を受けたジョブを再送する最大回数
+MAX_RETRIES = 5
+
+
+class Priority(enum.IntEnum):
+    """送信の優先度（値が小さいほど優先）"""
+    INTERACTIVE = 0   # コマンドへの返信
+    NOTIFICATION = 1  # イベント通知
+    WELCOME = 2       # ウェルカムメッセージ
+    PRESENCE = 3      # ステータス更新
+
+
+# キューが満杯の場合に待たずに破棄する優先度
+DROPPABLE = (Priority.WELCOME, Priority.PRESENCE)
+
+
+class QueueFull(Exception):
+    """キューが満杯でジョブを破棄した場合の例外"""
+
+
+Sender = Callable[..., Awaitable[Any]]
+
+
+async def default_sender(target, content=None, **kwargs):
+    """Messageable（Context、チャンネルなど）の send で送信する"""
+    return await target.send(content, **kwargs)
+
+
+def route_of(target) -> Any:
+    """送信先のレート制限の単位（チャンネル）を表すキー
+
+    スラッシュコマンドへの応答はチャンネルの送信制限の対象外のため、インタラクションごとに分けます
+    """
+    interaction = getattr(target, "interaction", None)
+    if interaction is not None:
+        return ("interaction", interaction.id)
+    channel = getattr(target, "channel", None) or target
+    return getattr(channel, "id", channel)
+
+
+class TokenBucket:
+    """チャンネルごとのトークンバケット
+
+    Discordのメッセージ送信はチャンネルごとに5秒間に5件までに制限されているため、
+    それを超えないよう送信間隔を調整します
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "blocked_until")
+
+    def __init__(self, capacity: float, period: float, now: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """次のトークンが使えるまでの秒数（0以下なら即時）"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, now: float, seconds: float):
+        """レート制限（429）を受けた場合に一定時間送信を止める"""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class _Job:
+    __slots__ = ("route", "priority", "target", "content", "kwargs", "call", "future", "enqueued", "retries")
+
+    def __init__(self, route, priority, target, content, kwargs, call, future, enqueued):
+        self.route = route
+        self.priority = priority
+        self.target = target
+        self.content = content
+        self.kwargs = kwargs
+        self.call = call
+        self.future = future
+        self.enqueued = enqueued
+        self.retries = 0
+
+
+class _Metrics:
+    __slots__ = ("enqueued", "sent", "failed", "dropped", "rate_limited", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class OutboundDispatcher:
+    """優先度付きの送信ディスパッチャ
+
+    - 優先度ごとの上限付きキュー。満杯の場合、返信・通知は空きが出るまで待ち（バックプレッシャー）、
+      ウェルカム・ステータス更新は破棄します。キューの枠は送信が終わるまで（再送待ちの間も）解放しません
+    - チャンネルごとのトークンバケットで送信間隔を調整し、1つのチャンネルの制限で
+      他のチャンネルへの送信が止まらないようにします。ジョブはチャンネルごとのキューに入れ、
+      送信可能なチャンネルだけを順番に回します（制限中のチャンネルは再開時刻のヒープで待たせます）
+    - 同じチャンネルへの送信は順序を保つため同時に1件ずつ行います
+    - 実際の送信は sender に委譲するため、テストではダミーの送信処理に差し替えられます
+    """
+
+    def __init__(self, sender: Sender = default_sender, workers: int = 4, max_queue: int = 1000,
+                 bucket_capacity: float = 5, bucket_period: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sender = sender
+        self.worker_count = workers
+        self.max_queue = max_queue
+        self.bucket_capacity = bucket_capacity
+        self.bucket_period = bucket_period
+        self.clock = clock
+
+        # 優先度ごと・チャンネルごとのジョブのキュー
+        self._queues: Dict[Priority, Dict[Any, Deque[_Job]]] = {priority: {} for priority in Priority}
+        self._queued: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        # 優先度ごとの送信を待つチャンネルの巡回順（_scheduled はその重複防止用）
+        self._ready: Dict[Priority, Deque[Any]] = {priority: deque() for priority in Priority}
+        self._scheduled: Dict[Priority, Set[Any]] = {priority: set() for priority in Priority}
+        # トークンが足りないチャンネルの再開時刻のヒープ（_parked に最新の再開時刻を持つ）
+        self._waiting: List[Tuple[float, int, Any]] = []
+        self._parked: Dict[Any, float] = {}
+        self._sequence = itertools.count()
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._inflight: Set[Any] = set()
+        self._metrics: Dict[Priority, _Metrics] = {priority: _Metrics() for priority in Priority}
+        self._processed = 0
+
+        # イベントループが必要なものは最初の送信時に作成
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[Dict[Priority, asyncio.Semaphore]] = None
+        self._workers = []
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._space = {priority: asyncio.Semaphore(self.max_queue) for priority in Priority}
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def close(self):
+        """ワーカーを停止"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def send(self, target, content=None, *, priority: Priority = Priority.INTERACTIVE,
+                   wait: bool = True, **kwargs) -> Any:
+        """メッセージを送信キューに追加
+
+        wait=True の場合は送信完了まで待って送信結果（Message）を返します
+        """
+        return await self._submit(route_of(target), priority, target, content, kwargs, None, wait)
+
+    async def call(self, route: Any, priority: Priority, call: Callable[[], Awaitable[Any]],
+                   wait: bool = False) -> Any:
+        """送信以外のAPI呼び出し（ステータス更新など）をキューに追加"""
+        return await self._submit(route, priority, None, None, {}, call, wait)
+
+    async def _submit(self, route, priority, target, content, kwargs, call, wait):
+        self._ensure_started()
+        metrics = self._metrics[priority]
+        space = self._space[priority]
+
+        if space.locked() and priority in DROPPABLE:
+            metrics.dropped += 1
+            logger.warning(f"送信キュー（{priority.name}）が満杯のため破棄しました")
+            if wait:
+                raise QueueFull(priority.name)
+            return None
+        await space.acquire()
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+        job = _Job(route, priority, target, content, kwargs, call, future, self.clock())
+        self._queues[priority].setdefault(route, deque()).append(job)
+        self._queued[priority] += 1
+        self._schedule(route)
+        metrics.enqueued += 1
+        self._wakeup.set()
+        return await future if future is not None else None
+
+    def _bucket(self, route, now: float) -> TokenBucket:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = TokenBucket(self.bucket_capacity, self.bucket_period, now)
+        return bucket
+
+    def _schedule(self, route):
+        """チャンネルにジョブがあれば、その優先度の巡回順に加える（送信中・制限中の場合は後で加える）"""
+        if route in self._inflight or route in self._parked:
+            return
+        for priority in Priority:
+            if route in self._queues[priority] and route not in self._scheduled[priority]:
+                self._scheduled[priority].add(route)
+                self._ready[priority].append(route)
+
+    def _park(self, route, ready_at: float):
+        """トークンが足りないチャンネルを再開時刻まで巡回から外す"""
+        self._parked[route] = ready_at
+        heapq.heappush(self._waiting, (ready_at, next(self._sequence), route))
+
+    def _unpark(self, now: float):
+        """再開時刻を過ぎたチャンネルを巡回に戻す"""
+        while self._waiting and self._waiting[0][0] <= now:
+            ready_at, _, route = heapq.heappop(self._waiting)
+            if self._parked.get(route) == ready_at:
+                del self._parked[route]
+                self._schedule(route)
+
+    def _next_job(self):
+        """送信可能なジョブを優先度順に探す
+
+        巡回順の先頭のチャンネルから取り出し、送信できないチャンネルは巡回から外すため、
+        1つのチャンネルにジョブが溜まっていても他のチャンネルの送信は待たされません
+        見つからない場合は (None, 次に送信可能になるまでの秒数) を返します
+        """
+        now = self.clock()
+        self._unpark(now)
+        for priority in Priority:
+            ready = self._ready[priority]
+            queues = self._queues[priority]
+            while ready:
+                route = ready.popleft()
+                self._scheduled[priority].discard(route)
+                jobs = queues.get(route)
+                # 送信中のチャンネルは送信の完了時に巡回へ戻す
+                if not jobs or route in self._inflight or route in self._parked:
+                    continue
+                bucket = self._bucket(route, now)
+                delay = bucket.delay(now)
+                if delay > 0:
+                    self._park(route, now + delay)
+                    continue
+                job = jobs.popleft()
+                if not jobs:
+                    del queues[route]
+                self._queued[priority] -= 1
+                bucket.take(now)
+                self._inflight.add(route)
+                return job, None
+        earliest = self._waiting[0][0] - now if self._waiting else None
+        return None, earliest
+
+    async def _worker(self):
+        while True:
+            job, delay = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            requeued = False
+            try:
+                requeued = await self._run(job)
+            finally:
+                # 再送のためキューに戻したジョブはキューの枠を持ったままにする
+                if not requeued:
+                    self._space[job.priority].release()
+                self._inflight.discard(job.route)
+                self._schedule(job.route)
+                self._wakeup.set()
+
+    async def _run(self, job: _Job) -> bool:
+        """ジョブを実行（レート制限を受けて再送のためキューに戻した場合はTrue）"""
+        metrics = self._metrics[job.priority]
+        started = self.clock()
+        try:
+            if job.call is not None:
+                result = await job.call()
+            else:
+                result = await self.sender(job.target, job.content, **job.kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is not None or getattr(e, "status", None) == 429:
+                # レート制限を受けたチャンネルだけを止める
+                metrics.rate_limited += 1
+                self._bucket(job.route, started).block(started, retry_after or 1.0)
+                if job.retries < MAX_RETRIES:
+                    # 先頭に戻して再送する
+                    job.retries += 1
+                    self._queues[job.priority].setdefault(job.route, deque()).appendleft(job)
+                    self._queued[job.priority] += 1
+                    logger.warning(f"レート制限を受けました（{job.route}）: {retry_after or 1.0:.1f}秒後に再送します")
+                    return True
+            metrics.failed += 1
+            if job.future is not None and not job.future.done():
+                job.future.set_exception(e)
+            else:
+                logger.error(f"送信に失敗しました（{job.route}）: {e}")
+            return False
+
+        wait = started - job.enqueued
+        metrics.sent += 1
+        metrics.total_wait += wait
+        metrics.max_wait = max(metrics.max_wait, wait)
+        if job.future is not None and not job.future.done():
+            job.future.set_result(result)
+
+        self._processed += 1
+        if self._processed % _PRUNE_INTERVAL == 0:
+            self._prune(started)
+        return False
+
+    def _prune(self, now: float):
+        """満タンで使われていないバケットを削除"""
+        for route in [route for route, bucket in self._buckets.items()
+                      if route not in self._inflight and bucket.idle(now)]:
+            del self._buckets[route]
+
+    def stats(self) -> Dict[str, Any]:
+        """優先度ごとの送信状況"""
+        stats: Dict[str, Any] = {
+            "buckets": len(self._buckets),
+            "inflight": len(self._inflight),
+        }
+        for priority in Priority:
+            metrics = self._metrics[priority]
+            stats[priority.name.lower()] = {
+                "queued": self._queued[priority],
+                "enqueued": metrics.enqueued,
+                "sent": metrics.sent,
+                "failed": metrics.failed,
+                "dropped": metrics.dropped,
+                "rate_limited": metrics.rate_limited,
+                "average_wait": metrics.total_wait / metrics.sent if metrics.sent else 0.0,
+                "max_wait": metrics.max_wait,
+            }
+        return stats
+
+
+def get_dispatcher(bot) -> OutboundDispatcher:
+    """Botに紐づく送信ディスパッチャを取得（なければ作成）"""
+    dispatcher = getattr(bot, "outbound", None)
+    if dispatcher is None:
+        dispatcher = OutboundDispatcher()
+        bot.outbound = dispatcher
+    return dispatcher
@@ -8,13 +8,28 @@ Discord上でのイベント管理を行うためのモジュール
 """
 
 import os
-import yaml
+import heapq
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
+import yaml
+
+from archive import EventArchive
+from records import DATE_FORMAT, Event, events_from_yaml, events_to_yaml
+from diagnostics import estimate_sizeof
+from dispatcher import Priority, get_dispatcher
+from readiness import get_readiness
+from slash_commands import invoke
+from pagination import StreamPages, send_paginated
+from guild_settings import NOTIFY_BOTH, NOTIFY_DIGEST, NOTIFY_MODES, NOTIFY_REMINDERS, get_guild_settings
+from storage import ChangeLog, FileLock, YamlStore, atomic_write
+from recurrence import DAY_FORMAT, RecurrenceError, RecurrenceRule
 
 # ロギングの設定
 logger = logging.getLogger("sumeragi-event-manager")
@@ -22,6 +37,35 @@ logger = logging.getLogger("sumeragi-event-manager")
 # イベントデータを保存するディレクトリ
 DATA_DIR = Path("data")
 EVENTS_FILE = DATA_DIR / "events.yaml"
+ARCHIVE_FILE = DATA_DIR / "events_archive.yaml"
+
+# まとめ通知を送信済みの時間帯（サーバー設定とは別に、通知を送るプロセスだけが書き込む）
+DIGEST_STATE_FILE = DATA_DIR / "digest_state.yaml"
+
+# 複数のプロセスが起動している場合に通知を送るプロセスを1つに決めるためのロック
+NOTIFIER_LOCK = DATA_DIR / "notifier"
+
+# 最後の開催からこの日数が経過したイベントをアーカイブへ移す
+ARCHIVE_HORIZON = timedelta(days=int(os.getenv("EVENT_ARCHIVE_DAYS", "1")))
+
+# 一覧表示の1ページあたりの件数
+LIST_PAGE_SIZE = 5
+
+# 履歴表示の1ページあたりの件数
+HISTORY_PAGE_SIZE = 5
+
+# まとめ通知の1ページ（埋め込み1つ）あたりの件数と、1メッセージに含める埋め込みの上限
+DIGEST_PAGE_SIZE = 10
+DIGEST_MAX_PAGES = 10
+
+# 1メッセージの埋め込み全体の文字数の上限（Discordの上限6000文字に余裕を持たせる）
+DIGEST_CHAR_BUDGET = 5500
+
+NOTIFY_MODE_LABELS = {
+    NOTIFY_REMINDERS: "イベントごとに通知（1日前・1時間前）",
+    NOTIFY_DIGEST: "1日1回まとめて通知",
+    NOTIFY_BOTH: "まとめ通知とイベントごとの通知の両方",
+}
 
 class EventManager(commands.Cog):
     """イベント管理を行うCog"""
@@ -29,21 +73,60 @@ class EventManager(commands.Cog):
     def __init__(self, bot):
         """初期化"""
         self.bot = bot
+        self.outbound = get_dispatcher(bot)
         self.events = []
+        self.store = YamlStore(EVENTS_FILE)
+        self.changes = ChangeLog()
+        self.notifier_lock = FileLock(NOTIFIER_LOCK)
+        self.archive: Optional[EventArchive] = None
+        self.readiness = get_readiness(bot)
+        self.settings = get_guild_settings(bot)
+        # サーバーIDごとのまとめ通知を送信済みの時間帯
+        self.digest_sent: Dict[int, str] = {}
+    
+    async def cog_load(self):
+        """Cogの読み込み時に呼ばれる処理
         
+        データの読み込みはGatewayへの接続と並行してバックグラウンドで行い、
+        完了後にイベント通知タスクを開始します
+        """
+        self.readiness.start(self.qualified_name, self.load_data, on_ready=self.event_notification.start)
+    
+    def cog_unload(self):
+        """Cogのアンロード時に呼ばれる処理"""
+        self.readiness.forget(self.qualified_name)
+        self.event_notification.cancel()
+        self.notifier_lock.release()
+    
+    def load_data(self):
+        """データの読み込みとアーカイブの索引作成（スレッドプールで実行される）"""
         # データディレクトリが存在しない場合は作成
         if not DATA_DIR.exists():
-            DATA_DIR.mkdir(parents=True)
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
         
         # イベントデータをロード
+        self.archive = EventArchive(ARCHIVE_FILE)
         self.load_events()
-        
-        # イベント通知タスクを開始
-        self.event_notification.start()
+        self.archive_past_events()
+        self.settings.reload_if_changed()
+        self.load_digest_state()
     
-    def cog_unload(self):
-        """Cogのアンロード時に呼ばれる処理"""
-        self.event_notification.cancel()
+    def load_digest_state(self):
+        """まとめ通知の送信済み時間帯を読み込む"""
+        try:
+            with open(DIGEST_STATE_FILE, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"まとめ通知の送信記録の読み込みに失敗しました: {e}")
+            return
+        if isinstance(data, dict):
+            self.digest_sent = {int(guild_id): str(slot) for guild_id, slot in data.items() if str(guild_id).isdigit()}
+    
+    def save_digest_state(self, state: Dict[int, str]):
+        """まとめ通知の送信済み時間帯を保存（スレッドプールで実行される）"""
+        atomic_write(DIGEST_STATE_FILE, yaml.safe_dump(state).encode("utf-8"))
     
     def load_events(self):
         """イベントデータをファイルから読み込む"""
@@ -53,76 +136,271 @@ class EventManager(commands.Cog):
             return
         
         try:
-            with open(EVENTS_FILE, "r", encoding="utf-8") as f:
-                self.events = yaml.safe_load(f) or []
-                logger.info(f"{len(self.events)}件のイベントを読み込みました")
+            self.events = events_from_yaml(self.store.load())
+            self.changes.clear()
+            logger.info(f"{len(self.events)}件のイベントを読み込みました")
         except Exception as e:
             logger.error(f"イベントの読み込みに失敗しました: {e}")
             self.events = []
     
+    def reload_if_changed(self):
+        """他のプロセスがファイルを更新していれば読み込み直す"""
+        if not self.changes and self.store.changed():
+            logger.info("イベントファイルの更新を検出したため読み込み直します")
+            self.load_events()
+    
+    async def cog_check(self, ctx):
+        """データの読み込みが完了するまではコマンドを受け付けない"""
+        return self.readiness.check(self.qualified_name)
+    
+    async def cog_before_invoke(self, ctx):
+        """コマンド実行前に最新のデータを反映"""
+        self.reload_if_changed()
+    
+    def _merge_events(self, theirs):
+        """他のプロセスが保存した内容にこのプロセスの変更を適用"""
+        if theirs is not None:
+            self.events = self.changes.apply(events_from_yaml(theirs))
+        return events_to_yaml(self.events)
+    
     def save_events(self):
-        """イベントデータをファイルに保存"""
+        """イベントデータをファイルに保存
+        
+        一時ファイル経由でアトミックに書き込み、他のプロセスによる変更があればマージします
+        """
         try:
-            with open(EVENTS_FILE, "w", encoding="utf-8") as f:
-                yaml.dump(self.events, f, allow_unicode=True, default_flow_style=False)
+            self.store.save(self._merge_events)
+            self.changes.clear()
             logger.info(f"{len(self.events)}件のイベントを保存しました")
             return True
         except Exception as e:
             logger.error(f"イベントの保存に失敗しました: {e}")
             return False
     
+    def archive_past_events(self, now: Optional[datetime] = None) -> int:
+        """終了から一定期間が経過したイベントをアーカイブへ移す
+        
+        アーカイブへの追記を先に行うため、途中で停止してもイベントは失われません
+        保存に失敗して同じイベントが残った場合も、アーカイブ済みのIDは次回に追記されず取り除くだけになります
+        複数のプロセスが起動している場合は通知用のロックを取得したプロセスだけが行います
+        """
+        if not self.notifier_lock.try_acquire():
+            return 0
+        
+        cutoff = (now or datetime.now()) - ARCHIVE_HORIZON
+        finished = []
+        for event in self.events:
+            last = event.last_occurrence()
+            if last is not None and last < cutoff:
+                finished.append(event)
+        
+        if not finished or not self.archive.append(finished):
+            return 0
+        
+        finished_ids = {id(event) for event in finished}
+        self.events = [event for event in self.events if id(event) not in finished_ids]
+        for event in finished:
+            self.changes.removed(event)
+        self.save_events()
+        return len(finished)
+    
+    def memory_stats(self) -> Dict[str, Tuple[int, int]]:
+        """データ構造とインデックスの件数とおおよそのサイズ（!memstats 用）"""
+        return {
+            "events": (len(self.events), estimate_sizeof(self.events)),
+            "archive_index": (len(self.archive), self.archive.memory_usage()) if self.archive else (0, 0),
+            "pending_changes": (len(self.changes.upserts) + len(self.changes.deleted), 0),
+        }
+    
+    def data_version(self) -> Tuple[Any, ...]:
+        """メモリ上のイベントのバージョン
+        
+        ファイルの保存・読み込みか、このプロセスでの変更のたびに変わります（Web APIのETagに使用）
+        """
+        return (self.store.version, self.changes.revision)
+    
+    def get_next_id(self) -> int:
+        """次のイベントIDを取得（アーカイブ済みのIDとも重複しない）"""
+        self.archive.refresh()
+        max_id = self.archive.max_id
+        for event in self.events:
+            if isinstance(event.id, int) and event.id > max_id:
+                max_id = event.id
+        return max_id + 1
+    
+    def find_event(self, event_id: int) -> Optional[Event]:
+        """指定IDのイベントを取得"""
+        for event in self.events:
+            if event.id == event_id:
+                return event
+        return None
+    
+    def upcoming(self, window_start: datetime, window_end: Optional[datetime] = None) -> Iterator[Tuple[datetime, Event]]:
+        """期間内の開催日時とイベントを日時順に返す
+        
+        定期開催イベントは各回を必要な分だけ遅延展開し、全イベントを日時順にマージします
+        """
+        def stream(event: Event) -> Iterator[Tuple[datetime, Event]]:
+            # 関数に分けて各イベントを束縛する（内側のジェネレータ式では最後のイベントを参照してしまう）
+            for occurrence in event.occurrences(window_start, window_end):
+                yield occurrence, event
+        
+        return heapq.merge(*(stream(event) for event in self.events), key=lambda item: item[0])
+    
     @tasks.loop(hours=1)
     async def event_notification(self):
         """イベント通知を行うタスク"""
         now = datetime.now()
         
-        for event in self.events:
-            # イベント日時をパース
-            event_date = datetime.strptime(event["date"], "%Y-%m-%d %H:%M")
-            
+        # 複数のプロセスが起動している場合はロックを取得したプロセスだけが通知する
+        if not self.notifier_lock.try_acquire():
+            return
+        self.reload_if_changed()
+        
+        self.settings.reload_if_changed()
+        
+        # 終了したイベントを作業セットから外す
+        self.archive_past_events(now)
+        
+        # サーバーごとの通知方式
+        reminder_guilds = []
+        digest_sent = dict(self.digest_sent)
+        for guild in self.bot.guilds:
+            mode = self.settings.get(guild.id, "notify_mode")
+            if mode in (NOTIFY_DIGEST, NOTIFY_BOTH):
+                # 1つのサーバーで失敗しても他のサーバーの通知とタスク自体は止めない
+                try:
+                    await self.send_digest_if_due(guild, now)
+                except Exception as e:
+                    logger.error(f"{guild.name}: まとめ通知の送信に失敗しました: {e}", exc_info=True)
+            if mode != NOTIFY_DIGEST:
+                reminder_guilds.append(guild)
+        
+        # 送信記録は1回の実行につき1度だけ、イベントループの外で書き込む
+        if self.digest_sent != digest_sent:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.save_digest_state, dict(self.digest_sent))
+            except Exception as e:
+                logger.error(f"まとめ通知の送信記録の保存に失敗しました: {e}")
+        
+        if not reminder_guilds:
+            return
+        
+        # 開始25時間以内の回だけを展開（過去のイベントは含まれない）
+        for event_date, event in self.upcoming(now, now + timedelta(hours=25)):
             # イベント開始1日前と1時間前に通知
             time_diff = event_date - now
             
-            # 過去のイベントはスキップ
-            if time_diff.total_seconds() < 0:
-                continue
-                
             # 1日前の通知
             if timedelta(hours=23) < time_diff < timedelta(hours=25):
-                await self.send_notification(event, "明日開催", "が明日開催されます！")
+                await self.send_notification(event, "明日開催", "が明日開催されます！", event_date, reminder_guilds)
             
             # 1時間前の通知
             elif timedelta(minutes=55) < time_diff < timedelta(minutes=65):
-                await self.send_notification(event, "間もなく開催", "が1時間後に開催されます！")
+                await self.send_notification(event, "間もなく開催", "が1時間後に開催されます！", event_date, reminder_guilds)
+    
+    async def send_digest_if_due(self, guild: discord.Guild, now: datetime):
+        """まとめ通知の時刻であれば、その時間帯にまだ送っていない場合に送信"""
+        if now.hour != self.settings.get(guild.id, "digest_hour"):
+            return
+        slot = now.replace(minute=0, second=0, microsecond=0).strftime(DATE_FORMAT)
+        if self.digest_sent.get(guild.id) == slot:
+            return
+        
+        # 再起動などで同じ時間帯に2回送らないよう、送信前に記録する
+        self.digest_sent[guild.id] = slot
+        hours = self.settings.get(guild.id, "digest_hours")
+        occurrences = list(self.upcoming(now, now + timedelta(hours=hours)))
+        if occurrences:
+            await self.send_digest(guild, occurrences, hours)
+    
+    def build_digest(self, occurrences: List[Tuple[datetime, Event]], hours: int) -> List[discord.Embed]:
+        """期間内のイベントをまとめた埋め込み（ページごとに1つ）を作成
+        
+        1メッセージの文字数の上限に収まらない分は省略し、最後のページに件数を表示します
+        """
+        pages: List[discord.Embed] = []
+        budget = DIGEST_CHAR_BUDGET
+        shown = 0
+        for event_date, event in occurrences:
+            if shown % DIGEST_PAGE_SIZE == 0:
+                if len(pages) >= DIGEST_MAX_PAGES:
+                    break
+                title = f"📅 今後{hours}時間のイベント（{len(occurrences)}件）" if not pages else "📅 イベント（続き）"
+                pages.append(discord.Embed(title=title, color=0x4a6baf))
+                budget -= len(title) + 40  # フッターの分
+            
+            name = f"{event_date.strftime(DATE_FORMAT)} - {event.name}"
+            if event.rule:
+                name += " 🔁"
+            value = event.description[:80] + ("..." if len(event.description) > 80 else "")
+            value += f"\n📍 {event.get('location', 'Discord')}"
+            if event.url:
+                value += f" / [参加リンク]({event.url})"
+            if len(name) + len(value) > budget:
+                break
+            budget -= len(name) + len(value)
+            pages[-1].add_field(name=name[:256], value=value, inline=False)
+            shown += 1
+        
+        # 空のページが残った場合は取り除く
+        if pages and not pages[-1].fields:
+            pages.pop()
+        for number, page in enumerate(pages, start=1):
+            footer = f"ページ {number}/{len(pages)}"
+            if number == len(pages) and shown < len(occurrences):
+                footer += f" - 他{len(occurrences) - shown}件はイベント一覧で確認できます"
+            page.set_footer(text=footer)
+        return pages
+    
+    async def send_digest(self, guild: discord.Guild, occurrences: List[Tuple[datetime, Event]], hours: int):
+        """まとめ通知を1つのメッセージで送信"""
+        channel = discord.utils.get(guild.text_channels, name=self.settings.get(guild.id, "announcements_channel"))
+        if not channel:
+            return
+        embeds = self.build_digest(occurrences, hours)
+        if not embeds:
+            return
+        await self.outbound.send(channel, embeds=embeds, priority=Priority.NOTIFICATION, wait=False)
+        logger.info(f"{guild.name}: {len(occurrences)}件のイベントのまとめ通知を送信キューに追加しました")
     
-    async def send_notification(self, event, prefix, suffix):
-        """イベント通知を送信"""
+    async def send_notification(self, event, prefix, suffix, occurrence=None, guilds=None):
+        """イベント通知を送信（guilds を省略した場合はすべてのサーバー）"""
+        for guild in (self.bot.guilds if guilds is None else guilds):
+            try:
+                await self._send_notification(guild, event, prefix, suffix, occurrence)
+            except Exception as e:
+                logger.error(f"{guild.name}: イベント通知の送信に失敗しました（{event.name}）: {e}", exc_info=True)
+    
+    async def _send_notification(self, guild, event, prefix, suffix, occurrence=None):
+        """1つのサーバーにイベント通知を送信"""
         # お知らせチャンネルを取得
-        for guild in self.bot.guilds:
-            announcement_channel = discord.utils.get(guild.text_channels, name="announcements")
-            if announcement_channel:
-                embed = discord.Embed(
-                    title=f"📢 {prefix}: {event['name']}",
-                    description=f"**{event['name']}**{suffix}",
-                    color=0x4a6baf
-                )
-                
-                embed.add_field(name="日時", value=event["date"], inline=True)
-                embed.add_field(name="場所", value=event.get("location", "Discord"), inline=True)
-                embed.add_field(name="詳細", value=event["description"], inline=False)
-                
-                if "url" in event and event["url"]:
-                    embed.add_field(name="参加リンク", value=f"[こちらをクリック]({event['url']})", inline=False)
-                
-                embed.set_footer(text=f"S.U.M.E.R.A.G.I. イベント - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-                
-                await announcement_channel.send(embed=embed)
-                logger.info(f"イベント通知を送信しました: {event['name']}")
+        channel_name = self.settings.get(guild.id, "announcements_channel")
+        announcement_channel = discord.utils.get(guild.text_channels, name=channel_name)
+        if announcement_channel:
+            embed = discord.Embed(
+                title=f"📢 {prefix}: {event.name}",
+                description=f"**{event.name}**{suffix}",
+                color=0x4a6baf
+            )
+            
+            event_date = occurrence.strftime(DATE_FORMAT) if occurrence else event.date
+            embed.add_field(name="日時", value=event_date, inline=True)
+            embed.add_field(name="場所", value=event.get("location", "Discord"), inline=True)
+            embed.add_field(name="詳細", value=event.description, inline=False)
+            
+            if event.url:
+                embed.add_field(name="参加リンク", value=f"[こちらをクリック]({event.url})", inline=False)
+            
+            embed.set_footer(text=f"S.U.M.E.R.A.G.I. イベント - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+            
+            await self.outbound.send(announcement_channel, embed=embed, priority=Priority.NOTIFICATION, wait=False)
+            logger.info(f"イベント通知を送信キューに追加しました: {event.name}")
     
     @commands.group(name="event", invoke_without_command=True)
     async def event_group(self, ctx):
         """イベント関連コマンドのベースグループ"""
-        await ctx.send("イベント管理コマンド: `add`, `list`, `delete`, `update` があります。詳細は `!help event` で確認できます。")
+        await self.outbound.send(ctx, "イベント管理コマンド: `add`, `list`, `delete`, `update`, `repeat`, `skip`, `history`, `notify`, `digest` があります。詳細は `!help event` で確認できます。")
     
     @event_group.command(name="add")
     @commands.has_permissions(administrator=True)
@@ -132,17 +410,18 @@ class EventManager(commands.Cog):
         例: !event add "AIモデル構築ワークショップ" "2025-03-15 14:00" PyTorchを使った基本的なAIモデルの構築方法を学びます
         """
         # イベントデータの作成
-        new_event = {
-            "id": len(self.events) + 1,
+        new_event = Event.from_dict({
+            "id": self.get_next_id(),
             "name": name,
             "date": date,
             "description": description,
             "created_by": str(ctx.author.id),
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
+        })
         
         # イベントリストに追加
         self.events.append(new_event)
+        self.changes.added(new_event)
         
         # 保存
         if self.save_events():
@@ -155,82 +434,240 @@ class EventManager(commands.Cog):
             embed.add_field(name="日時", value=date, inline=True)
             embed.add_field(name="詳細", value=description, inline=False)
             
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
         else:
-            await ctx.send("❌ イベントの追加に失敗しました。")
+            await self.outbound.send(ctx, "❌ イベントの追加に失敗しました。")
     
     @event_group.command(name="list")
     async def list_events(self, ctx):
         """登録されているイベント一覧を表示するコマンド"""
         if not self.events:
-            await ctx.send("登録されているイベントはありません。")
+            await self.outbound.send(ctx, "登録されているイベントはありません。")
             return
         
         # 現在の日時
         now = datetime.now()
         
-        # 未来のイベントをフィルタリング
-        future_events = []
+        # 今後開催予定のあるイベント数（定期開催は1件として数える）
         for event in self.events:
+            if event.start is None:
+                logger.warning(f"不正な日付形式: {event.date}")
+        upcoming_count = sum(1 for event in self.events if next(event.occurrences(now), None) is not None)
+        
+        # 日時順の展開はページ送りのたびに必要な分だけ進める
+        def render(page, index, source):
+            embed = discord.Embed(
+                title="📅 イベント一覧",
+                description=f"今後予定されているイベント（{upcoming_count}件）",
+                color=0x4a6baf
+            )
+            for event_date, event in page:
+                name = f"{event_date.strftime(DATE_FORMAT)} - {event.name}"
+                if event.rule:
+                    name += f" 🔁 {event.rule.describe()}"
+                embed.add_field(
+                    name=name,
+                    value=event.description[:100] + ('...' if len(event.description) > 100 else ''),
+                    inline=False
+                )
+            embed.set_footer(text=f"{source.describe(index)} - S.U.M.E.R.A.G.I. イベント - {datetime.now().strftime('%Y-%m-%d')}")
+            return embed
+        
+        await send_paginated(ctx, StreamPages(self.upcoming(now), LIST_PAGE_SIZE), render)
+    
+    @event_group.command(name="repeat")
+    @commands.has_permissions(administrator=True)
+    async def repeat_event(self, ctx, event_id: int, *, rule):
+        """イベントを定期開催にするコマンド
+        
+        登録済みの日時を初回として、ルールに従って繰り返します。`none` を指定すると解除します
+        例: !event repeat 1 weekly count=10
+        例: !event repeat 1 FREQ=MONTHLY;INTERVAL=1;UNTIL=2025-12-31
+        """
+        event = self.find_event(event_id)
+        if not event:
+            await self.outbound.send(ctx, f"ID: {event_id} のイベントが見つかりません。")
+            return
+        
+        if event.start is None:
+            await self.outbound.send(ctx, f"イベントの日時が不正なため定期開催にできません: {event.date}")
+            return
+        
+        if rule.lower() == "none":
+            new_rule = None
+        else:
             try:
-                event_date = datetime.strptime(event["date"], "%Y-%m-%d %H:%M")
-                if event_date > now:
-                    future_events.append((event, event_date))
-            except ValueError:
-                logger.warning(f"不正な日付形式: {event['date']}")
+                new_rule = RecurrenceRule.parse(rule, event.exdates or ())
+            except RecurrenceError as e:
+                await self.outbound.send(ctx, f"❌ 繰り返しルールが不正です: {e}")
+                return
+        
+        event.set_field("rrule", str(new_rule) if new_rule else None)
+        event.set_field("updated_by", str(ctx.author.id))
+        event.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.changes.updated(event)
+        
+        # 保存
+        if self.save_events():
+            embed = discord.Embed(
+                title="🔁 定期開催設定完了",
+                description=f"イベント「{event.name}」を{new_rule.describe() + 'の定期開催に設定' if new_rule else '単発開催に戻'}しました",
+                color=0x4a6baf
+            )
+            next_date = next(event.occurrences(datetime.now()), None)
+            if next_date:
+                embed.add_field(name="次回", value=next_date.strftime(DATE_FORMAT), inline=True)
+            await self.outbound.send(ctx, embed=embed)
+        else:
+            await self.outbound.send(ctx, "❌ イベントの更新に失敗しました。")
+    
+    @event_group.command(name="skip")
+    @commands.has_permissions(administrator=True)
+    async def skip_event(self, ctx, event_id: int, day):
+        """定期開催イベントの特定の回を休みにするコマンド
+        
+        例: !event skip 1 2025-05-06
+        """
+        event = self.find_event(event_id)
+        if not event or not event.rule:
+            await self.outbound.send(ctx, f"ID: {event_id} の定期開催イベントが見つかりません。")
+            return
+        
+        try:
+            datetime.strptime(day, DAY_FORMAT)
+        except ValueError:
+            await self.outbound.send(ctx, "日付は YYYY-MM-DD 形式で指定してください。")
+            return
+        
+        exdates = list(event.exdates or ())
+        if day not in exdates:
+            exdates.append(day)
+        event.set_field("exdates", sorted(exdates))
+        event.set_field("updated_by", str(ctx.author.id))
+        event.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.changes.updated(event)
+        
+        # 保存
+        if self.save_events():
+            embed = discord.Embed(
+                title="⏸️ 休止日設定完了",
+                description=f"イベント「{event.name}」の{day}の回を休みにしました",
+                color=0x4a6baf
+            )
+            await self.outbound.send(ctx, embed=embed)
+        else:
+            await self.outbound.send(ctx, "❌ イベントの更新に失敗しました。")
+    
+    @event_group.command(name="notify")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def notify_mode(self, ctx, mode: Optional[str] = None):
+        """このサーバーのイベント通知の方式を表示・変更するコマンド
         
-        # 日付順にソート
-        future_events.sort(key=lambda x: x[1])
+        reminders: イベントごとに1日前・1時間前に通知（既定）
+        digest: 1日1回、今後のイベントを1つのメッセージにまとめて通知
+        both: 両方
+        例: !event notify digest
+        """
+        if mode is not None:
+            if mode not in NOTIFY_MODES:
+                await self.outbound.send(ctx, f"無効な通知方式です。有効な方式: {', '.join(NOTIFY_MODES)}")
+                return
+            self.settings.update(ctx.guild.id, notify_mode=mode)
+            logger.info(f"{ctx.guild.name}: イベント通知の方式を {mode} に変更しました")
         
-        # 最大5件表示
+        settings = self.settings.all(ctx.guild.id)
         embed = discord.Embed(
-            title="📅 イベント一覧",
-            description=f"今後予定されているイベント（{len(future_events)}件）",
+            title="🔔 イベント通知の設定" + ("を変更しました" if mode is not None else ""),
+            description=NOTIFY_MODE_LABELS.get(settings["notify_mode"], NOTIFY_MODE_LABELS[NOTIFY_REMINDERS]),
             color=0x4a6baf
         )
+        if settings["notify_mode"] != NOTIFY_REMINDERS:
+            embed.add_field(
+                name="まとめ通知",
+                value=f"毎日{settings['digest_hour']}時に今後{settings['digest_hours']}時間のイベントを通知",
+                inline=False
+            )
+        await self.outbound.send(ctx, embed=embed)
+    
+    @event_group.command(name="digest")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def digest_schedule(self, ctx, hour: int, hours: int = 24):
+        """まとめ通知の時刻と対象期間を設定するコマンド
+        
+        例: !event digest 9 24（毎日9時に今後24時間のイベントを通知）
+        """
+        if not 0 <= hour <= 23 or not 1 <= hours <= 24 * 7:
+            await self.outbound.send(ctx, "時刻は0〜23、期間は1〜168時間で指定してください。")
+            return
+        self.settings.update(ctx.guild.id, digest_hour=hour, digest_hours=hours)
+        message = f"まとめ通知を毎日{hour}時に今後{hours}時間のイベントで送信するよう設定しました。"
+        if self.settings.get(ctx.guild.id, "notify_mode") == NOTIFY_REMINDERS:
+            message += f"\n現在の通知方式はイベントごとの通知です。`{ctx.clean_prefix}event notify digest` でまとめ通知に切り替えられます。"
+        await self.outbound.send(ctx, message)
+    
+    @event_group.command(name="history")
+    async def event_history(self, ctx, page: int = 1):
+        """終了したイベントの履歴を表示するコマンド
         
-        for event, event_date in future_events[:5]:
+        例: !event history 2
+        """
+        self.archive.refresh()
+        if not len(self.archive):
+            await self.outbound.send(ctx, "アーカイブされたイベントはありません。")
+            return
+        
+        events, pages = self.archive.page(page, HISTORY_PAGE_SIZE)
+        if not events:
+            await self.outbound.send(ctx, f"ページ番号は1〜{pages}の範囲で指定してください。")
+            return
+        
+        embed = discord.Embed(
+            title="🗂️ イベント履歴",
+            description=f"終了したイベント（{len(self.archive)}件）",
+            color=0x4a6baf
+        )
+        
+        for event in events:
             embed.add_field(
-                name=f"{event['date']} - {event['name']}",
-                value=event['description'][:100] + ('...' if len(event['description']) > 100 else ''),
+                name=f"{event.date} - {event.name}",
+                value=event.description[:100] + ('...' if len(event.description) > 100 else ''),
                 inline=False
             )
         
-        if len(future_events) > 5:
-            embed.set_footer(text=f"他に{len(future_events) - 5}件のイベントがあります。全件表示するには「!event listall」を使用してください。")
+        if page < pages:
+            embed.set_footer(text=f"ページ {page}/{pages} - 次のページは「{ctx.clean_prefix}event history {page + 1}」")
         else:
-            embed.set_footer(text=f"S.U.M.E.R.A.G.I. イベント - {datetime.now().strftime('%Y-%m-%d')}")
+            embed.set_footer(text=f"ページ {page}/{pages}")
         
-        await ctx.send(embed=embed)
+        await self.outbound.send(ctx, embed=embed)
     
     @event_group.command(name="delete")
     @commands.has_permissions(administrator=True)
     async def delete_event(self, ctx, event_id: int):
         """イベントを削除するコマンド"""
         # イベントの検索
-        event_to_delete = None
-        for event in self.events:
-            if event.get("id") == event_id:
-                event_to_delete = event
-                break
+        event_to_delete = self.find_event(event_id)
         
         if not event_to_delete:
-            await ctx.send(f"ID: {event_id} のイベントが見つかりません。")
+            await self.outbound.send(ctx, f"ID: {event_id} のイベントが見つかりません。")
             return
         
         # イベントの削除
         self.events.remove(event_to_delete)
+        self.changes.removed(event_to_delete)
         
         # 保存
         if self.save_events():
             embed = discord.Embed(
                 title="🗑️ イベント削除完了",
-                description=f"イベント「{event_to_delete['name']}」を削除しました",
+                description=f"イベント「{event_to_delete.name}」を削除しました",
                 color=0x4a6baf
             )
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
         else:
-            await ctx.send("❌ イベントの削除に失敗しました。")
+            await self.outbound.send(ctx, "❌ イベントの削除に失敗しました。")
     
     @event_group.command(name="update")
     @commands.has_permissions(administrator=True)
@@ -244,42 +681,119 @@ class EventManager(commands.Cog):
         valid_fields = ["name", "date", "description", "location", "url"]
         
         if field not in valid_fields:
-            await ctx.send(f"無効なフィールドです。有効なフィールド: {', '.join(valid_fields)}")
+            await self.outbound.send(ctx, f"無効なフィールドです。有効なフィールド: {', '.join(valid_fields)}")
             return
         
         # イベントの検索
-        event_to_update = None
-        for event in self.events:
-            if event.get("id") == event_id:
-                event_to_update = event
-                break
+        event_to_update = self.find_event(event_id)
         
         if not event_to_update:
-            await ctx.send(f"ID: {event_id} のイベントが見つかりません。")
+            await self.outbound.send(ctx, f"ID: {event_id} のイベントが見つかりません。")
             return
         
         # フィールドの更新
         old_value = event_to_update.get(field, "未設定")
-        event_to_update[field] = new_value
-        event_to_update["updated_by"] = str(ctx.author.id)
-        event_to_update["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+        event_to_update.set_field(field, new_value)
+        event_to_update.set_field("updated_by", str(ctx.author.id))
+        event_to_update.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.changes.updated(event_to_update)
         
         # 保存
         if self.save_events():
             embed = discord.Embed(
                 title="📝 イベント更新完了",
-                description=f"イベント「{event_to_update['name']}」の{field}を更新しました",
+                description=f"イベント「{event_to_update.name}」の{field}を更新しました",
                 color=0x4a6baf
             )
             
             embed.add_field(name="変更前", value=old_value, inline=True)
             embed.add_field(name="変更後", value=new_value, inline=True)
             
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
         else:
-            await ctx.send("❌ イベントの更新に失敗しました。")
+            await self.outbound.send(ctx, "❌ イベントの更新に失敗しました。")
+
+    # スラッシュコマンド（プレフィックスコマンドと同じ処理を呼び出す）
+    event_slash = app_commands.Group(name="event", description="コミュニティイベントの一覧・管理")
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """データの読み込みが完了するまではスラッシュコマンドを受け付けず、完了後は最新のデータを反映"""
+        self.readiness.check(self.qualified_name)
+        self.reload_if_changed()
+        return True
+    
+    @event_slash.command(name="list", description="今後のイベントを表示します")
+    async def list_slash(self, interaction: discord.Interaction):
+        """/event list"""
+        await invoke(interaction, self.list_events)
+    
+    @event_slash.command(name="history", description="終了したイベントの履歴を表示します")
+    @app_commands.describe(page="ページ番号")
+    async def history_slash(self, interaction: discord.Interaction, page: int = 1):
+        """/event history"""
+        await invoke(interaction, self.event_history, page)
+    
+    @event_slash.command(name="notify", description="このサーバーのイベント通知の方式を表示・変更します（管理者のみ）")
+    @app_commands.describe(mode="通知方式")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name=label, value=mode) for mode, label in NOTIFY_MODE_LABELS.items()
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def notify_slash(self, interaction: discord.Interaction, mode: Optional[str] = None):
+        """/event notify"""
+        if interaction.guild is None:
+            raise app_commands.NoPrivateMessage()
+        await invoke(interaction, self.notify_mode, mode)
+    
+    @event_slash.command(name="digest", description="まとめ通知の時刻と対象期間を設定します（管理者のみ）")
+    @app_commands.describe(hour="送信する時刻（0〜23時）", hours="通知に含める期間（時間）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def digest_slash(self, interaction: discord.Interaction, hour: app_commands.Range[int, 0, 23],
+                           hours: app_commands.Range[int, 1, 168] = 24):
+        """/event digest"""
+        if interaction.guild is None:
+            raise app_commands.NoPrivateMessage()
+        await invoke(interaction, self.digest_schedule, hour, hours)
+    
+    @event_slash.command(name="add", description="新しいイベントを追加します（管理者のみ）")
+    @app_commands.describe(name="イベント名", date="日時（YYYY-MM-DD HH:MM）", description="説明")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def add_slash(self, interaction: discord.Interaction, name: str, date: str, description: str):
+        """/event add"""
+        await invoke(interaction, self.add_event, name, date, description=description)
+    
+    @event_slash.command(name="delete", description="イベントを削除します（管理者のみ）")
+    @app_commands.describe(event_id="イベントID")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def delete_slash(self, interaction: discord.Interaction, event_id: int):
+        """/event delete"""
+        await invoke(interaction, self.delete_event, event_id)
+    
+    @event_slash.command(name="update", description="イベント情報を更新します（管理者のみ）")
+    @app_commands.describe(event_id="イベントID", field="更新するフィールド", new_value="新しい値")
+    @app_commands.choices(field=[
+        app_commands.Choice(name=name, value=name) for name in ("name", "date", "description", "location", "url")
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def update_slash(self, interaction: discord.Interaction, event_id: int, field: str, new_value: str):
+        """/event update"""
+        await invoke(interaction, self.update_event, event_id, field, new_value=new_value)
+    
+    @event_slash.command(name="repeat", description="イベントを定期開催にします（管理者のみ）")
+    @app_commands.describe(event_id="イベントID", rule="ルール（例: weekly count=10、none で解除）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def repeat_slash(self, interaction: discord.Interaction, event_id: int, rule: str):
+        """/event repeat"""
+        await invoke(interaction, self.repeat_event, event_id, rule=rule)
+    
+    @event_slash.command(name="skip", description="定期開催イベントの特定の回を休みにします（管理者のみ）")
+    @app_commands.describe(event_id="イベントID", day="休みにする日（YYYY-MM-DD）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def skip_slash(self, interaction: discord.Interaction, event_id: int, day: str):
+        """/event skip"""
+        await invoke(interaction, self.skip_event, event_id, day)
 
 # Cogのセットアップ関数
-def setup(bot):
+async def setup(bot):
     """Cogをbotに追加する関数"""
-    bot.add_cog(EventManager(bot))
+    await bot.add_cog(EventManager(bot))
@@ -0,0 +1,480 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot ファセット検索モジュール
+
+カテゴリ・難易度・タグごとのビットマップインデックスでリソースを絞り込むためのモジュール
+ビットマップはリソースIDを65536件ごとのチャンクに分けた圧縮形式（Roaring Bitmap 方式）で、
+条件の組み合わせ（AND/OR/差）や一致したリソースの取り出しをチャンク単位で行います
+"""
+
+import itertools
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from normalize import normalize
+from records import Resource
+
+# ファセット名
+CATEGORY = "category"
+DIFFICULTY = "difficulty"
+TAG = "tag"
+FACETS = (CATEGORY, DIFFICULTY, TAG)
+
+# ファセット名の別名
+FACET_ALIASES = {
+    "category": CATEGORY,
+    "cat": CATEGORY,
+    "カテゴリ": CATEGORY,
+    "difficulty": DIFFICULTY,
+    "level": DIFFICULTY,
+    "難易度": DIFFICULTY,
+    "tag": TAG,
+    "tags": TAG,
+    "タグ": TAG,
+}
+
+# 表示用のファセット名
+FACET_LABELS = {
+    CATEGORY: "カテゴリ",
+    DIFFICULTY: "難易度",
+    TAG: "タグ",
+}
+
+try:
+    _popcount = int.bit_count  # Python 3.10以降
+except AttributeError:
+    def _popcount(value: int) -> int:
+        return bin(value).count("1")
+
+# チャンクあたりの行数（行番号の下位16ビット）
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+CHUNK_BYTES = CHUNK_SIZE // 8
+
+# チャンク内の件数がこれを超えたらソート済み配列（2バイト/件）からビットセット（8KB固定）に切り替える
+ARRAY_MAX = 4096
+
+# 各バイト値で立っているビットの位置
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+def _key(value: str) -> str:
+    """インデックスのキー（検索と同じ正規化で、全角・半角や大文字・小文字、かなの違いを吸収する）
+
+    記号だけの値は正規化すると空になるため、大文字・小文字だけをそろえます
+    """
+    return normalize(value) or value.casefold()
+
+
+# チャンクのコンテナは、件数が ARRAY_MAX 以下ならチャンク内の行番号のソート済み配列（array('H')）、
+# それより多ければ CHUNK_SIZE ビットの整数（ビットセット）で表します。空のコンテナは保持しません
+
+def _to_bitset(values: Iterable[int]) -> int:
+    """チャンク内の行番号からビットセットを作成"""
+    buffer = bytearray(CHUNK_BYTES)
+    for value in values:
+        buffer[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _bitset_values(bits: int, start: int = 0) -> Iterator[int]:
+    """ビットセットで立っている行番号を start 以上から昇順に返す"""
+    data = bits.to_bytes(CHUNK_BYTES, "little")
+    for index in range(start >> 3, CHUNK_BYTES):
+        byte = data[index]
+        if byte:
+            base = index << 3
+            for bit in _BYTE_BITS[byte]:
+                if base + bit >= start:
+                    yield base + bit
+
+
+def _container(values: List[int]) -> Any:
+    """昇順で重複のないチャンク内の行番号からコンテナを作成"""
+    if len(values) > ARRAY_MAX:
+        return _to_bitset(values)
+    return array("H", values)
+
+
+def _shrink(bits: int) -> Any:
+    """件数が少なくなったビットセットを配列に戻す（空ならNone）"""
+    count = _popcount(bits)
+    if not count:
+        return None
+    if count <= ARRAY_MAX:
+        return array("H", _bitset_values(bits))
+    return bits
+
+
+def _copy(container: Any) -> Any:
+    return container if isinstance(container, int) else array("H", container)
+
+
+def _count(container: Any) -> int:
+    return _popcount(container) if isinstance(container, int) else len(container)
+
+
+def _and(a: Any, b: Any) -> Any:
+    """コンテナの積（空ならNone）"""
+    if isinstance(a, int):
+        if isinstance(b, int):
+            return _shrink(a & b)
+        a, b = b, a
+    if isinstance(b, int):
+        data = b.to_bytes(CHUNK_BYTES, "little")
+        result = array("H", (value for value in a if data[value >> 3] >> (value & 7) & 1))
+    else:
+        result = array("H", sorted(set(a).intersection(b)))
+    return result or None
+
+
+def _and_count(a: Any, b: Any) -> int:
+    """コンテナの積の件数（積は作らない）"""
+    if isinstance(a, int):
+        if isinstance(b, int):
+            return _popcount(a & b)
+        a, b = b, a
+    if isinstance(b, int):
+        data = b.to_bytes(CHUNK_BYTES, "little")
+        return sum(data[value >> 3] >> (value & 7) & 1 for value in a)
+    return len(set(a).intersection(b))
+
+
+def _or(a: Any, b: Any) -> Any:
+    """コンテナの和"""
+    if isinstance(a, int) or isinstance(b, int):
+        return (a if isinstance(a, int) else _to_bitset(a)) | (b if isinstance(b, int) else _to_bitset(b))
+    return _container(sorted(set(a).union(b)))
+
+
+def _and_not(a: Any, b: Any) -> Any:
+    """コンテナの差（空ならNone）"""
+    if isinstance(a, int):
+        return _shrink(a & ~(b if isinstance(b, int) else _to_bitset(b)))
+    if isinstance(b, int):
+        data = b.to_bytes(CHUNK_BYTES, "little")
+        result = array("H", (value for value in a if not data[value >> 3] >> (value & 7) & 1))
+    else:
+        exclude = set(b)
+        result = array("H", (value for value in a if value not in exclude))
+    return result or None
+
+
+class Bitmap:
+    """行番号の集合を表す圧縮ビットマップ
+
+    行番号を CHUNK_SIZE 件ごとのチャンクに分け、チャンクごとに件数に応じて配列かビットセットで保持します
+    まばらなタグでも全体の行数に比例したサイズにならず、1件の追加・削除や演算・走査はチャンク単位で行います
+    """
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, chunks: Optional[Dict[int, Any]] = None):
+        self._chunks: Dict[int, Any] = chunks if chunks is not None else {}
+
+    @classmethod
+    def from_sorted(cls, rows: Iterable[int]) -> "Bitmap":
+        """昇順で重複のない行番号からまとめて作成"""
+        chunks = {}
+        for high, group in itertools.groupby(rows, key=lambda row: row >> CHUNK_BITS):
+            chunks[high] = _container([row & CHUNK_MASK for row in group])
+        return cls(chunks)
+
+    def copy(self) -> "Bitmap":
+        return Bitmap({high: _copy(container) for high, container in self._chunks.items()})
+
+    def add(self, row: int):
+        """行番号を追加"""
+        high, low = row >> CHUNK_BITS, row & CHUNK_MASK
+        container = self._chunks.get(high)
+        if container is None:
+            self._chunks[high] = array("H", (low,))
+        elif isinstance(container, int):
+            self._chunks[high] = container | (1 << low)
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return
+            container.insert(index, low)
+            if len(container) > ARRAY_MAX:
+                self._chunks[high] = _to_bitset(container)
+
+    def discard(self, row: int):
+        """行番号を削除（含まれていなければ何もしない）"""
+        high, low = row >> CHUNK_BITS, row & CHUNK_MASK
+        container = self._chunks.get(high)
+        if container is None:
+            return
+        if isinstance(container, int):
+            container = _shrink(container & ~(1 << low))
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                del container[index]
+            container = container or None
+        if container is None:
+            del self._chunks[high]
+        else:
+            self._chunks[high] = container
+
+    def __contains__(self, row: int) -> bool:
+        container = self._chunks.get(row >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = row & CHUNK_MASK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self) -> int:
+        return sum(_count(container) for container in self._chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        chunks = {}
+        for high, container in small.items():
+            partner = large.get(high)
+            if partner is not None:
+                result = _and(container, partner)
+                if result is not None:
+                    chunks[high] = result
+        return Bitmap(chunks)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        chunks = {high: _copy(container) for high, container in self._chunks.items()}
+        for high, container in other._chunks.items():
+            mine = chunks.get(high)
+            chunks[high] = _copy(container) if mine is None else _or(mine, container)
+        return Bitmap(chunks)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        chunks = {}
+        for high, container in self._chunks.items():
+            partner = other._chunks.get(high)
+            result = _copy(container) if partner is None else _and_not(container, partner)
+            if result is not None:
+                chunks[high] = result
+        return Bitmap(chunks)
+
+    def and_count(self, other: "Bitmap") -> int:
+        """積の件数（積のビットマップは作らない）"""
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        return sum(_and_count(container, large[high]) for high, container in small.items() if high in large)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_from(0)
+
+    def iter_from(self, start: int) -> Iterator[int]:
+        """start 以上の行番号を昇順に返す（start より前のチャンクは読まない）"""
+        first = start >> CHUNK_BITS
+        for high in sorted(self._chunks):
+            if high < first:
+                continue
+            low = start & CHUNK_MASK if high == first else 0
+            container = self._chunks[high]
+            if isinstance(container, int):
+                values = _bitset_values(container, low)
+            else:
+                values = itertools.islice(container, bisect_left(container, low), None)
+            base = high << CHUNK_BITS
+            for value in values:
+                yield base + value
+
+    def memory_usage(self) -> int:
+        """ビットマップのおおよそのサイズ（バイト）"""
+        return sys.getsizeof(self._chunks) + sum(sys.getsizeof(container) for container in self._chunks.values())
+
+
+def parse_facet_query(tokens: Iterable[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+    """`tag:PyTorch difficulty:上級` 形式の条件を解析する
+
+    同じファセットを複数回指定した場合やカンマ区切りの値はORとして扱います
+    解析できなかったトークンは2番目の戻り値で返します
+    """
+    query: Dict[str, List[str]] = {}
+    invalid: List[str] = []
+    for token in tokens:
+        name, sep, values = token.partition(":")
+        facet = FACET_ALIASES.get(name.lower())
+        if not sep or facet is None or not values:
+            invalid.append(token)
+            continue
+        query.setdefault(facet, []).extend(v for v in values.split(",") if v)
+    return query, invalid
+
+
+def is_facet_query(text: Optional[str]) -> bool:
+    """文字列にファセット条件が含まれているかを判定"""
+    if not text:
+        return False
+    return any(token.partition(":")[0].lower() in FACET_ALIASES
+               for token in text.split() if ":" in token)
+
+
+class FacetIndex:
+    """リソースのファセットごとのビットマップインデックス
+
+    ビットマップの行番号にはリソースIDを用いるため、一致したリソースは常にID順に取り出せ、
+    削除・更新で行番号が変わることもありません
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, Resource] = {}
+        self._live = Bitmap()
+        self._bitmaps: Dict[str, Dict[str, Bitmap]] = {facet: {} for facet in FACETS}
+        self._labels: Dict[str, Dict[str, str]] = {facet: {} for facet in FACETS}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rebuild(self, resources: Dict[str, List[Resource]]):
+        """全リソースからインデックスを作り直す
+
+        ファセット値ごとにIDを昇順に集め、ビットマップはチャンク単位でまとめて作成します
+        """
+        self.__init__()
+        for items in resources.values():
+            for resource in items:
+                self._rows[resource.id] = resource
+        rows: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for resource_id in sorted(self._rows):
+            for facet, value in self._facet_values(self._rows[resource_id]):
+                key = _key(value)
+                ids = rows[facet].setdefault(key, [])
+                if not ids or ids[-1] != resource_id:
+                    ids.append(resource_id)
+                self._labels[facet].setdefault(key, value)
+        self._live = Bitmap.from_sorted(sorted(self._rows))
+        for facet in FACETS:
+            self._bitmaps[facet] = {key: Bitmap.from_sorted(ids) for key, ids in rows[facet].items()}
+
+    def _facet_values(self, resource: Resource) -> Iterator[Tuple[str, str]]:
+        if resource.category:
+            yield CATEGORY, resource.category
+        if resource.difficulty:
+            yield DIFFICULTY, resource.difficulty
+        for tag in resource.tags or ():
+            yield TAG, tag
+
+    def add(self, resource: Resource):
+        """リソースをインデックスに追加"""
+        if resource.id in self._rows:
+            self.remove(resource.id)
+        self._rows[resource.id] = resource
+        self._live.add(resource.id)
+        for facet, value in self._facet_values(resource):
+            key = _key(value)
+            bitmaps = self._bitmaps[facet]
+            if key not in bitmaps:
+                bitmaps[key] = Bitmap()
+                self._labels[facet][key] = value
+            bitmaps[key].add(resource.id)
+
+    def _discard(self, facet: str, key: str, resource_id: int):
+        """ファセット値のビットマップからIDを取り除く（空になったファセット値は削除）"""
+        bitmap = self._bitmaps[facet].get(key)
+        if bitmap is None:
+            return
+        bitmap.discard(resource_id)
+        if not bitmap:
+            del self._bitmaps[facet][key]
+            del self._labels[facet][key]
+
+    def remove(self, resource_id: int):
+        """リソースをインデックスから削除"""
+        resource = self._rows.pop(resource_id, None)
+        if resource is None:
+            return
+        self._live.discard(resource_id)
+        for facet, value in self._facet_values(resource):
+            self._discard(facet, _key(value), resource_id)
+
+    def update(self, resource: Resource):
+        """変更されたリソースのインデックスを更新
+
+        リソースは変更済みで元の値が分からないため、IDを含むすべてのファセット値から取り除いてから追加し直します
+        """
+        for facet in FACETS:
+            stale = [key for key, bitmap in self._bitmaps[facet].items() if resource.id in bitmap]
+            for key in stale:
+                self._discard(facet, key, resource.id)
+        self._rows.pop(resource.id, None)
+        self.add(resource)
+
+    def memory_usage(self) -> int:
+        """インデックスのおおよそのサイズ（バイト）"""
+        size = sys.getsizeof(self._rows) + self._live.memory_usage()
+        for facet in FACETS:
+            bitmaps = self._bitmaps[facet]
+            size += sys.getsizeof(bitmaps) + sys.getsizeof(self._labels[facet])
+            size += sum(bitmap.memory_usage() for bitmap in bitmaps.values())
+        return size
+
+    def get(self, resource_id: int) -> Optional[Resource]:
+        """IDからリソースを取得"""
+        return self._rows.get(resource_id)
+
+    def filter(self, query: Dict[str, List[str]]) -> Bitmap:
+        """条件に一致するIDのビットマップを返す
+
+        ファセット内の値はOR、ファセット間はANDで組み合わせます
+        """
+        result = self._live
+        for facet, values in query.items():
+            bitmaps = self._bitmaps.get(facet, {})
+            union = Bitmap()
+            for value in values:
+                bitmap = bitmaps.get(_key(value))
+                if bitmap is not None:
+                    union = union | bitmap
+            result = result & union
+            if not result:
+                break
+        # 条件がない場合もインデックスの更新が結果に及ばないよう複製を返す
+        return result.copy() if result is self._live else result
+
+    def bitmap(self, resource_ids: Iterable[int]) -> Bitmap:
+        """リソースIDの一覧をビットマップに変換（インデックスにないIDは無視）"""
+        return Bitmap.from_sorted(sorted({resource_id for resource_id in resource_ids if resource_id in self._rows}))
+
+    def count(self, bitmap: Bitmap) -> int:
+        """ビットマップの件数"""
+        return len(bitmap)
+
+    def resources(self, bitmap: Bitmap, limit: Optional[int] = None, after: Optional[int] = None) -> List[Resource]:
+        """ビットマップに含まれるリソースをID順に返す
+
+        after を指定した場合はそのIDより後から取り出し、limit 件に達したら走査を止めます
+        ビットマップの作成後に削除されたリソースは含みません
+        """
+        results = []
+        for resource_id in bitmap.iter_from(0 if after is None else after + 1):
+            if limit is not None and len(results) >= limit:
+                break
+            resource = self._rows.get(resource_id)
+            if resource is not None:
+                results.append(resource)
+        return results
+
+    def facet_counts(self, bitmap: Bitmap, top: int = 10) -> Dict[str, List[Tuple[str, int]]]:
+        """ビットマップ内のファセット値ごとの件数を多い順に返す"""
+        counts: Dict[str, List[Tuple[str, int]]] = {}
+        for facet in FACETS:
+            labels = self._labels[facet]
+            values = []
+            for key, facet_bitmap in self._bitmaps[facet].items():
+                n = facet_bitmap.and_count(bitmap)
+                if n:
+                    values.append((labels[key], n))
+            values.sort(key=lambda item: (-item[1], item[0]))
+            counts[facet] = values[:top]
+        return counts
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot サーバー設定モジュール
+
+サーバー（ギルド）ごとの設定を data/guild_settings.yaml に保存し、メモリ上にキャッシュするためのモジュール
+- 設定していない項目はBot全体の設定、それもなければ既定値を返します
+- コマンドの接頭辞はメッセージごとに参照されるため、ファイルの確認は一定間隔でのみ行います
+- 設定を変更する `!config` コマンド（Cog）もこのモジュールで提供します
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from dispatcher import Priority, get_dispatcher
+from slash_commands import command_hint, invoke
+from storage import YamlStore
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-guild-settings")
+
+# 設定を保存するファイル
+SETTINGS_FILE = Path("data") / "guild_settings.yaml"
+
+# Bot全体の設定を保存するサーバーID（ステータスの文言など、サーバーごとに分けられない設定）
+GLOBAL = 0
+
+# 他のプロセスによるファイルの更新を確認する間隔（秒）
+RELOAD_INTERVAL = 10.0
+
+# コマンドの接頭辞の最大文字数
+MAX_PREFIX_LENGTH = 5
+
+# イベント通知の方式
+NOTIFY_REMINDERS = "reminders"  # イベントごとに1日前・1時間前に通知
+NOTIFY_DIGEST = "digest"        # 1日1回、今後のイベントをまとめて通知
+NOTIFY_BOTH = "both"            # 両方
+NOTIFY_MODES = (NOTIFY_REMINDERS, NOTIFY_DIGEST, NOTIFY_BOTH)
+
+# 既定値
+DEFAULTS: Dict[str, Any] = {
+    "notify_mode": NOTIFY_REMINDERS,
+    "digest_hour": 9,    # まとめ通知を送る時刻（時）
+    "digest_hours": 24,  # まとめ通知に含める期間（時間）
+    "prefix": os.getenv("COMMAND_PREFIX", "!"),    # コマンドの接頭辞
+    "announcements_channel": "announcements",      # イベント通知を送るチャンネル名
+    "welcome_channel": "welcome",                  # ウェルカムメッセージを送るチャンネル名
+    "presence": "AIの世界",                          # Botのステータスの文言（Bot全体の設定）
+}
+
+# 読み込み時に確認する項目（手で編集した値や古い版の値が不正な場合は無視し、Bot全体の設定か既定値を使う）
+VALIDATORS: Dict[str, Callable[[Any], bool]] = {
+    "notify_mode": lambda value: value in NOTIFY_MODES,
+    "digest_hour": lambda value: isinstance(value, int) and 0 <= value <= 23,
+    "digest_hours": lambda value: isinstance(value, int) and 1 <= value <= 24 * 7,
+    "prefix": lambda value: isinstance(value, str) and 0 < len(value) <= MAX_PREFIX_LENGTH,
+}
+
+# `!config` で変更できる項目と表示名
+CONFIG_LABELS = {
+    "prefix": "コマンドの接頭辞",
+    "announcements_channel": "お知らせチャンネル",
+    "welcome_channel": "ウェルカムチャンネル",
+}
+
+
+class GuildSettings:
+    """サーバーごとの設定
+
+    読み込みはファイルが更新された場合だけ行い、参照はメモリ上の辞書から返します
+    変更時は他のプロセスによる変更を読み込み直してから、そのサーバーの項目だけを書き換えて保存します
+    サーバーID GLOBAL の設定は、すべてのサーバーの既定値として扱います
+    """
+
+    def __init__(self, path: Path = SETTINGS_FILE, defaults: Optional[Dict[str, Any]] = None,
+                 reload_interval: float = RELOAD_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        self.store = YamlStore(path)
+        self.defaults = dict(DEFAULTS if defaults is None else defaults)
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self._settings: Dict[int, Dict[str, Any]] = {}
+        self._checked: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._settings)
+
+    @staticmethod
+    def _parse(data: Any) -> Dict[int, Dict[str, Any]]:
+        settings = {int(guild_id): dict(values or {}) for guild_id, values in (data or {}).items()}
+        for guild_id, values in settings.items():
+            for key, valid in VALIDATORS.items():
+                if key in values and not valid(values[key]):
+                    logger.warning(f"サーバー {guild_id} の設定 {key} の値が不正なため無視します: {values[key]!r}")
+                    del values[key]
+        return settings
+
+    def reload_if_changed(self) -> bool:
+        """ファイルが更新されていれば読み込み直す"""
+        self._checked = self.clock()
+        if not self.store.changed():
+            return False
+        try:
+            self._settings = self._parse(self.store.load())
+            logger.info(f"{len(self._settings)}件のサーバー設定を読み込みました")
+            return True
+        except Exception as e:
+            logger.error(f"サーバー設定の読み込みに失敗しました: {e}")
+            return False
+
+    def reload_if_stale(self) -> bool:
+        """前回の確認から一定時間が経過していれば、ファイルの更新を確認する
+
+        メッセージごとに呼び出しても、ファイルの確認は reload_interval 秒に1回だけ行います
+        """
+        if self._checked is not None and self.clock() - self._checked < self.reload_interval:
+            return False
+        return self.reload_if_changed()
+
+    def get(self, guild_id: Optional[int], key: str) -> Any:
+        """設定値を取得（未設定の場合はBot全体の設定、それもなければ既定値）"""
+        values = self._settings.get(guild_id)
+        if values is not None and key in values:
+            return values[key]
+        values = self._settings.get(GLOBAL)
+        if values is not None and key in values:
+            return values[key]
+        return self.defaults.get(key)
+
+    def all(self, guild_id: Optional[int]) -> Dict[str, Any]:
+        """既定値を含むサーバーの全設定"""
+        return {**self.defaults, **self._settings.get(GLOBAL, {}), **self._settings.get(guild_id, {})}
+
+    def prefix(self, guild_id: Optional[int]) -> str:
+        """サーバーのコマンドの接頭辞（DMではBot全体の設定）"""
+        self.reload_if_stale()
+        return self.get(guild_id, "prefix")
+
+    def update(self, guild_id: int, **values: Any):
+        """設定を変更して保存（None を指定した項目は既定値に戻す）"""
+        def build(theirs):
+            if theirs is not None:
+                self._settings = self._parse(theirs)
+            current = self._settings.setdefault(guild_id, {})
+            for key, value in values.items():
+                if value is None:
+                    current.pop(key, None)
+                else:
+                    current[key] = value
+            if not current:
+                del self._settings[guild_id]
+            return {guild_id: dict(settings) for guild_id, settings in sorted(self._settings.items())}
+
+        self.store.save(build)
+
+
+def get_guild_settings(bot) -> GuildSettings:
+    """Botに紐づくサーバー設定を取得（なければ作成）"""
+    settings = getattr(bot, "guild_settings", None)
+    if settings is None:
+        settings = GuildSettings()
+        bot.guild_settings = settings
+    return settings
+
+
+def command_prefix(bot, message: discord.Message) -> str:
+    """commands.Bot の command_prefix に渡す関数（メモリ上の設定から返す）"""
+    return get_guild_settings(bot).prefix(message.guild.id if message.guild else None)
+
+
+def presence_activity(bot) -> discord.Activity:
+    """Bot全体の設定に基づくステータス"""
+    settings = get_guild_settings(bot)
+    return discord.Activity(
+        type=discord.ActivityType.watching,
+        name=f"{settings.get(GLOBAL, 'presence')} | {command_hint(settings.get(GLOBAL, 'prefix'))}help"
+    )
+
+
+class GuildConfig(commands.Cog):
+    """サーバーごとの設定を変更するCog"""
+
+    def __init__(self, bot):
+        """初期化"""
+        self.bot = bot
+        self.outbound = get_dispatcher(bot)
+        self.settings = get_guild_settings(bot)
+
+    async def cog_before_invoke(self, ctx):
+        """コマンド実行前に最新の設定を反映"""
+        self.settings.reload_if_changed()
+
+    def settings_embed(self, guild: discord.Guild, title: str) -> discord.Embed:
+        """サーバーの現在の設定"""
+        settings = self.settings.all(guild.id)
+        embed = discord.Embed(title=title, description=f"{guild.name} の設定", color=0x4a6baf)
+        for key, label in CONFIG_LABELS.items():
+            value = f"#{settings[key]}" if key.endswith("_channel") else f"`{settings[key]}`"
+            embed.add_field(name=label, value=value, inline=True)
+        return embed
+
+    async def update(self, ctx, title: str, **values: Any):
+        """設定を保存して結果を表示"""
+        try:
+            self.settings.update(ctx.guild.id, **values)
+        except Exception as e:
+            logger.error(f"サーバー設定の保存に失敗しました: {e}")
+            await self.outbound.send(ctx, "❌ 設定の保存に失敗しました。")
+            return
+        logger.info(f"{ctx.guild.name}: サーバー設定を変更しました {values}")
+        await self.outbound.send(ctx, embed=self.settings_embed(ctx.guild, title))
+
+    @commands.group(name="config", invoke_without_command=True)
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def config_group(self, ctx):
+        """このサーバーの設定を表示するコマンド"""
+        await self.outbound.send(ctx, embed=self.settings_embed(ctx.guild, "⚙️ サーバー設定"))
+
+    @config_group.command(name="prefix")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def config_prefix(self, ctx, prefix: str):
+        """このサーバーのコマンドの接頭辞を変更するコマンド
+
+        例: !config prefix ?
+        """
+        if len(prefix) > MAX_PREFIX_LENGTH or any(char.isspace() for char in prefix):
+            await self.outbound.send(ctx, f"接頭辞は空白を含まない{MAX_PREFIX_LENGTH}文字以内で指定してください。")
+            return
+        await self.update(ctx, "⚙️ コマンドの接頭辞を変更しました", prefix=prefix)
+
+    @config_group.command(name="announcements")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def config_announcements(self, ctx, channel: discord.TextChannel):
+        """イベント通知を送るチャンネルを変更するコマンド
+
+        例: !config announcements #イベント告知
+        """
+        await self.update(ctx, "⚙️ お知らせチャンネルを変更しました", announcements_channel=channel.name)
+
+    @config_group.command(name="welcome")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def config_welcome(self, ctx, channel: discord.TextChannel):
+        """ウェルカムメッセージを送るチャンネルを変更するコマンド
+
+        例: !config welcome #ようこそ
+        """
+        await self.update(ctx, "⚙️ ウェルカムチャンネルを変更しました", welcome_channel=channel.name)
+
+    @config_group.command(name="reset")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def config_reset(self, ctx, key: Optional[str] = None):
+        """設定を既定値に戻すコマンド（項目を省略した場合はすべて）
+
+        例: !config reset prefix
+        """
+        keys = {"prefix": "prefix", "announcements": "announcements_channel", "welcome": "welcome_channel"}
+        if key is not None and key not in keys:
+            await self.outbound.send(ctx, f"無効な項目です。有効な項目: {', '.join(keys)}")
+            return
+        targets = list(keys.values()) if key is None else [keys[key]]
+        await self.update(ctx, "⚙️ 設定を既定値に戻しました", **{target: None for target in targets})
+
+    @config_group.command(name="presence")
+    @commands.is_owner()
+    async def config_presence(self, ctx, *, text: Optional[str] = None):
+        """Botのステータスの文言を変更するコマンド（Botのオーナーのみ、すべてのサーバーに反映）
+
+        文言を省略すると既定値に戻します
+        例: !config presence AIの勉強会
+        """
+        self.settings.update(GLOBAL, presence=text[:100] if text else None)
+        await self.outbound.call("presence", Priority.PRESENCE,
+                                 lambda: self.bot.change_presence(activity=presence_activity(self.bot)))
+        await self.outbound.send(ctx, f"ステータスを「{self.settings.get(GLOBAL, 'presence')}」に変更しました。")
+
+    # スラッシュコマンド（プレフィックスコマンドと同じ処理を呼び出す）
+    config_slash = app_commands.Group(name="config", description="このサーバーの設定（管理者のみ）",
+                                      guild_only=True, default_permissions=discord.Permissions(administrator=True))
+
+    @config_slash.command(name="show", description="このサーバーの設定を表示します")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def show_slash(self, interaction: discord.Interaction):
+        """/config show"""
+        await invoke(interaction, self.config_group)
+
+    @config_slash.command(name="prefix", description="コマンドの接頭辞を変更します")
+    @app_commands.describe(prefix="新しい接頭辞")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def prefix_slash(self, interaction: discord.Interaction, prefix: str):
+        """/config prefix"""
+        await invoke(interaction, self.config_prefix, prefix)
+
+    @config_slash.command(name="announcements", description="イベント通知を送るチャンネルを変更します")
+    @app_commands.describe(channel="チャンネル")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def announcements_slash(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        """/config announcements"""
+        await invoke(interaction, self.config_announcements, channel)
+
+    @config_slash.command(name="welcome", description="ウェルカムメッセージを送るチャンネルを変更します")
+    @app_commands.describe(channel="チャンネル")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def welcome_slash(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        """/config welcome"""
+        await invoke(interaction, self.config_welcome, channel)
+
+    @config_slash.command(name="reset", description="設定を既定値に戻します")
+    @app_commands.describe(key="戻す項目（省略するとすべて）")
+    @app_commands.choices(key=[
+        app_commands.Choice(name=label, value=key.replace("_channel", "")) for key, label in CONFIG_LABELS.items()
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reset_slash(self, interaction: discord.Interaction, key: Optional[str] = None):
+        """/config reset"""
+        await invoke(interaction, self.config_reset, key)
+
+
+# Cogのセットアップ関数
+async def setup(bot):
+    """Cogをbotに追加する関数"""
+    await bot.add_cog(GuildConfig(bot))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 参加通知まとめモジュール
+
+短時間に集中したメンバー参加をサーバーごとにまとめ、1回の送信で歓迎するためのモジュール
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+import discord
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-join-coalescer")
+
+FlushCallback = Callable[[discord.Guild, List[discord.Member]], Awaitable[None]]
+
+
+class JoinCoalescer:
+    """サーバーごとに参加メンバーを一定時間バッファリングしてまとめて送信する
+
+    最初の参加から window 秒後にまとめて flush を呼び出します。
+    max_burst 人に達した場合は待たずにその時点で送信します
+    """
+
+    def __init__(self, flush: FlushCallback, window: float = 5.0, max_burst: int = 50):
+        self.flush = flush
+        self.window = window
+        self.max_burst = max_burst
+        self._pending: Dict[int, Tuple[float, List[discord.Member]]] = {}
+        self._timers: Dict[int, asyncio.Task] = {}
+        # 上限に達して送信中のタスク（参照を保持しないと完了前にガベージコレクションされることがある）
+        self._flushing: Set[asyncio.Task] = set()
+
+        # 統計情報
+        self.bursts = 0
+        self.members = 0
+        self.largest_burst = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add(self, member: discord.Member):
+        """参加メンバーをバッファに追加"""
+        guild_id = member.guild.id
+        if guild_id not in self._pending:
+            self._pending[guild_id] = (time.monotonic(), [])
+            self._timers[guild_id] = asyncio.create_task(self._flush_later(guild_id))
+
+        started, members = self._pending[guild_id]
+        members.append(member)
+        if len(members) >= self.max_burst:
+            # バッファは同期的に取り出し、次の参加からは新しいバッファとタイマーで受け付ける
+            self._timers.pop(guild_id).cancel()
+            del self._pending[guild_id]
+            task = asyncio.create_task(self._flush_guild(member.guild, started, members))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def _flush_later(self, guild_id: int):
+        await asyncio.sleep(self.window)
+        self._timers.pop(guild_id, None)
+        started, members = self._pending.pop(guild_id, (0, []))
+        if members:
+            await self._flush_guild(members[0].guild, started, members)
+
+    async def _flush_guild(self, guild: discord.Guild, started: float, members: List[discord.Member]):
+        """取り出したバッファをまとめて送信"""
+        latency = time.monotonic() - started
+        self.bursts += 1
+        self.members += len(members)
+        self.largest_burst = max(self.largest_burst, len(members))
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        try:
+            await self.flush(guild, members)
+            logger.info(f"{guild.name}: {len(members)}名の参加をまとめて歓迎しました（待機 {latency:.1f}秒）")
+        except Exception as e:
+            logger.error(f"ウェルカムメッセージの送信に失敗しました: {e}")
+
+    async def close(self):
+        """バッファに残っている参加をすべて送信し、送信中のまとめ送信の完了を待つ"""
+        for task in self._timers.values():
+            task.cancel()
+        self._timers.clear()
+        pending, self._pending = self._pending, {}
+        for started, members in pending.values():
+            if members:
+                await self._flush_guild(members[0].guild, started, members)
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        """まとめ送信の統計情報"""
+        return {
+            "window": self.window,
+            "max_burst": self.max_burst,
+            "pending_guilds": len(self._pending),
+            "bursts": self.bursts,
+            "members": self.members,
+            "average_burst": self.members / self.bursts if self.bursts else 0.0,
+            "largest_burst": self.largest_burst,
+            "average_latency": self.total_latency / self.bursts if self.bursts else 0.0,
+            "max_latency": self.max_latency,
+        }
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot リンク切れ確認モジュール
+
+リソースのURLが有効かを非同期HTTPでまとめて確認するためのモジュール
+- ホストごとの同時接続数を制限したコネクションプール（Keep-Alive）を使い回します
+- 全体の同時実行数はセマフォで制限します
+- HEADで確認し、HEADに対応していないサーバーにはGETで確認し直します
+- 前回の ETag / Last-Modified を使った条件付きリクエストで、変更のないページは304で済ませます
+
+例: python link_checker.py http://127.0.0.1:8080/ok http://127.0.0.1:8080/missing
+"""
+
+import sys
+import time
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from records import DATE_FORMAT, RAW, STR, Record
+from storage import YamlStore
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-link-checker")
+
+USER_AGENT = "S.U.M.E.R.A.G.I.-LinkChecker/1.0 (+https://github.com/Sunwood-ai-labs/sumeragi)"
+
+# HEADを拒否・誤処理するサーバーが返しがちなステータス（GETで確認し直す）
+HEAD_FALLBACK_STATUSES = frozenset({400, 403, 404, 405, 501})
+
+# GETの本文を読み捨てる上限（これより大きい本文は読み切らずに接続を閉じる）
+DRAIN_LIMIT = 64 * 1024
+
+
+class LinkHealth(Record):
+    """リソース1件のURLの確認結果"""
+
+    __slots__ = ("id", "url", "ok", "status", "error", "etag", "last_modified", "checked_at", "failures")
+
+    FIELDS = (
+        ("id", RAW),
+        ("url", STR),
+        ("ok", RAW),
+        ("status", RAW),
+        ("error", STR),
+        ("etag", STR),
+        ("last_modified", STR),
+        ("checked_at", STR),
+        ("failures", RAW),
+    )
+
+    @property
+    def checked(self) -> Optional[datetime]:
+        """確認日時"""
+        try:
+            return datetime.strptime(self.checked_at, DATE_FORMAT)
+        except (TypeError, ValueError):
+            return None
+
+
+def health_from_yaml(data: Any) -> Dict[int, LinkHealth]:
+    """YAMLのデータ（確認結果の一覧）をリソースIDごとの辞書に変換"""
+    return {health.id: health for health in (LinkHealth.from_dict(item) for item in (data or []))}
+
+
+def health_to_yaml(results: Dict[int, LinkHealth]) -> List[Dict[str, Any]]:
+    """確認結果をYAML保存用のデータに変換"""
+    return [results[resource_id].to_dict() for resource_id in sorted(results)]
+
+
+class LinkHealthStore:
+    """確認結果の保存先（data/link_health.yaml）"""
+
+    def __init__(self, path: Path):
+        self.store = YamlStore(path)
+
+    def load(self) -> Dict[int, LinkHealth]:
+        if not self.store.path.exists():
+            return {}
+        return health_from_yaml(self.store.load())
+
+    def changed(self) -> bool:
+        return self.store.changed()
+
+    def save(self, results: Dict[int, LinkHealth]):
+        # 確認は1つのプロセスだけが行うため、他のプロセスの内容とはマージせずに上書きする
+        self.store.save(lambda theirs: health_to_yaml(results))
+
+
+class LinkChecker:
+    """URLの有効性を並行して確認する"""
+
+    def __init__(self, concurrency: int = 20, per_host: int = 2, timeout: float = 15.0,
+                 user_agent: str = USER_AGENT):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.user_agent = user_agent
+
+    async def check_all(self, targets: Dict[int, str],
+                        previous: Optional[Dict[int, LinkHealth]] = None) -> Dict[int, LinkHealth]:
+        """リソースID→URLの一覧を確認し、リソースIDごとの結果を返す
+
+        同じURLを持つリソースが複数ある場合、確認は1回だけ行います
+        """
+        previous = previous or {}
+        ids_by_url: Dict[str, List[int]] = {}
+        for resource_id, url in targets.items():
+            if url:
+                ids_by_url.setdefault(url, []).append(resource_id)
+
+        # URLごとの前回の結果（条件付きリクエストに使用）
+        previous_by_url: Dict[str, LinkHealth] = {}
+        for health in previous.values():
+            if health.url in ids_by_url:
+                previous_by_url.setdefault(health.url, health)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        # 同じホストの接続の空き待ちでタイムアウトしないよう、接続と読み込みにだけ制限をかける
+        session_timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        now = datetime.now().strftime(DATE_FORMAT)
+        results: Dict[int, LinkHealth] = {}
+        broken = 0
+        started = time.perf_counter()
+
+        async with aiohttp.ClientSession(connector=connector, timeout=session_timeout,
+                                         headers={"User-Agent": self.user_agent}) as session:
+            # concurrency 個のワーカーが共有のイテレータから順にURLを取り出す
+            # （URLごとにタスクを作らないため、URLの件数によらずメモリは同時実行数に比例する）
+            pending = iter(ids_by_url)
+
+            async def worker():
+                nonlocal broken
+                for url in pending:
+                    last = previous_by_url.get(url)
+                    fields = await self.check(session, url, last)
+                    if not fields["ok"]:
+                        broken += 1
+                    failures = 0 if fields["ok"] else ((last.failures or 0) if last else 0) + 1
+                    for resource_id in ids_by_url[url]:
+                        results[resource_id] = LinkHealth.from_dict(dict(
+                            fields, id=resource_id, url=url, checked_at=now, failures=failures
+                        ))
+
+            await asyncio.gather(*(worker() for _ in range(max(1, min(self.concurrency, len(ids_by_url))))))
+
+        logger.info(f"{len(ids_by_url)}件のURLを{time.perf_counter() - started:.1f}秒で確認しました（リンク切れ {broken}件）")
+        return results
+
+    async def check(self, session: aiohttp.ClientSession, url: str,
+                    previous: Optional[LinkHealth] = None) -> Dict[str, Any]:
+        """1件のURLを確認（HEADで確認し、必要であればGETで確認し直す）"""
+        headers = {}
+        if previous is not None and previous.ok:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        try:
+            result = await self._request(session, "HEAD", url, headers)
+            if result["status"] in HEAD_FALLBACK_STATUSES:
+                result = await self._request(session, "GET", url, headers)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            return {"ok": False, "status": None, "error": "タイムアウト"}
+        except (aiohttp.ClientError, ValueError) as e:
+            return {"ok": False, "status": None, "error": str(e) or type(e).__name__}
+
+        # 304の場合は前回の検証子を引き継ぐ
+        if result["status"] == 304 and previous is not None:
+            result["etag"] = result["etag"] or previous.etag
+            result["last_modified"] = result["last_modified"] or previous.last_modified
+        return result
+
+    async def _request(self, session: aiohttp.ClientSession, method: str, url: str,
+                       headers: Dict[str, str]) -> Dict[str, Any]:
+        async with session.request(method, url, headers=headers, allow_redirects=True) as response:
+            # 本文を最後まで読まないと接続がプールに戻らないため、小さい本文は読み捨てる
+            if method != "HEAD":
+                await self._drain(response)
+            status = response.status
+            return {
+                "ok": status < 400,
+                "status": status,
+                "error": None if status < 400 else response.reason,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+
+    @staticmethod
+    async def _drain(response: aiohttp.ClientResponse):
+        """本文を DRAIN_LIMIT バイトまで読み捨てる"""
+        remaining = DRAIN_LIMIT
+        while remaining > 0:
+            chunk = await response.content.read(min(remaining, 16 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+
+async def _main(urls: Iterable[str]):
+    checker = LinkChecker()
+    targets = dict(enumerate(urls, start=1))
+    results = await checker.check_all(targets)
+    # 2回目は条件付きリクエストになる
+    results = await checker.check_all(targets, results)
+    for resource_id, health in sorted(results.items()):
+        mark = "OK " if health.ok else "NG "
+        print(f"{mark} {health.status or '-':>4} {health.url} {health.error or ''}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1:]))
@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 負荷試験スクリプト
+
+Discordに接続せず、合成したメッセージを on_message → process_commands → Cog の経路に流し込み、
+送信負荷を段階的に上げながらスループット・コマンド応答時間・イベントループの遅延・
+メモリ増加量を計測します。HTTP通信はダミーの実装に差し替えます
+コマンドの成否は on_command_completion / on_command_error で数え、エラーが1件でもあれば失敗（終了コード1）とします
+
+例: python loadtest.py --rates 50,100,200,400 --duration 10 --guilds 100
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from diagnostics import rss_bytes
+
+# コマンドの例（負荷試験では管理者権限の不要なものだけを使用）
+COMMANDS = [
+    "help",
+    "about",
+    "topic",
+    "resource list",
+    "resource list 機械学習",
+    "resource list tag:PyTorch difficulty:上級",
+    "resource search 入門",
+    "event list",
+    "event history",
+]
+
+CHAT_MESSAGES = [
+    "おはようございます",
+    "Transformerの論文を読んでいます",
+    "PyTorchとTensorFlowどちらがおすすめですか？",
+    "今日の勉強会楽しかったです！",
+    "強化学習の資料を探しています",
+]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeHTTP:
+    """DiscordのHTTP APIの代わりに応答を返すダミー実装"""
+
+    def __init__(self, bot_user: Dict[str, Any], latency: float, snowflakes):
+        self.bot_user = bot_user
+        self.latency = latency
+        self.snowflakes = snowflakes
+        self.requests: Counter = Counter()
+
+    async def request(self, route, **kwargs):
+        self.requests[f"{route.method} {route.path}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if route.method == "POST" and route.path == "/channels/{channel_id}/messages":
+            payload = kwargs.get("json") or {}
+            return {
+                "id": str(next(self.snowflakes)),
+                "channel_id": str(route.channel_id),
+                "author": self.bot_user,
+                "content": payload.get("content") or "",
+                "embeds": payload.get("embeds") or [],
+                "timestamp": _timestamp(),
+                "edited_timestamp": None,
+                "tts": False,
+                "mention_everyone": False,
+                "mentions": [],
+                "mention_roles": [],
+                "attachments": [],
+                "pinned": False,
+                "type": 0,
+            }
+        return {}
+
+
+class LoadTest:
+    """合成メッセージを一定のレートで流し込み、計測結果を集計する"""
+
+    def __init__(self, bot, prefix: str, args):
+        import discord
+
+        self.discord = discord
+        self.bot = bot
+        self.prefix = prefix
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.snowflakes = itertools.count(10 ** 17)
+        self.state = bot._connection
+
+        # Bot自身のユーザー
+        self.bot_user = self._user_payload(next(self.snowflakes), "sumeragi", bot=True)
+        self.state.user = discord.ClientUser(state=self.state, data=self.bot_user)
+
+        # ダミーのHTTP層
+        self.http = FakeHTTP(self.bot_user, args.http_latency, self.snowflakes)
+        bot.http.request = self.http.request
+
+        # ダミーのサーバー・チャンネル・ユーザー
+        self.channels = []
+        for g in range(args.guilds):
+            guild_id = next(self.snowflakes)
+            names = ["general", "announcements", "welcome"][:max(1, args.channels)]
+            names += [f"chat-{i}" for i in range(args.channels - len(names))]
+            guild = discord.Guild(state=self.state, data={
+                "id": str(guild_id),
+                "name": f"loadtest-{g}",
+                "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0}],
+                "channels": [
+                    {"id": str(next(self.snowflakes)), "name": name, "type": 0, "position": i}
+                    for i, name in enumerate(names)
+                ],
+                # Bot自身をメンバーに含める（guild.me を参照するコマンドのため）
+                "members": [
+                    {"user": self.bot_user, "roles": [], "joined_at": _timestamp(), "deaf": False, "mute": False, "flags": 0}
+                ],
+                "member_count": args.users,
+            })
+            self.state._add_guild(guild)
+            self.channels.extend(guild.text_channels)
+        self.users = [self._user_payload(next(self.snowflakes), f"user{u}") for u in range(args.users)]
+
+        # コマンドの成否（on_message は例外を送出しないため、コマンドのイベントで数える）
+        self.results: Optional[Dict[str, Any]] = None
+        bot.add_listener(self._on_command_completion, "on_command_completion")
+        bot.add_listener(self._on_command_error, "on_command_error")
+
+    async def _on_command_completion(self, ctx):
+        if self.results is not None:
+            self.results["completed"] += 1
+
+    async def _on_command_error(self, ctx, error):
+        if self.results is not None:
+            error = getattr(error, "original", error)
+            command = ctx.command.qualified_name if ctx.command else "?"
+            self.results["command_errors"][f"{command}: {type(error).__name__}"] += 1
+
+    def _user_payload(self, user_id: int, name: str, bot: bool = False) -> Dict[str, Any]:
+        return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "bot": bot}
+
+    def _message(self) -> Any:
+        """チャット・メンション・コマンドを指定の割合で含む合成メッセージを作成"""
+        channel = self.random.choice(self.channels)
+        author = self.random.choice(self.users)
+        roll = self.random.random()
+        mentions = []
+        if roll < self.args.command_ratio:
+            content = self.prefix + self.random.choice(COMMANDS)
+        elif roll < self.args.command_ratio + self.args.mention_ratio:
+            content = f"<@{self.bot_user['id']}> {self.random.choice(CHAT_MESSAGES)}"
+            mentions = [self.bot_user]
+        else:
+            content = self.random.choice(CHAT_MESSAGES)
+
+        data = {
+            "id": str(next(self.snowflakes)),
+            "channel_id": str(channel.id),
+            "guild_id": str(channel.guild.id),
+            "author": author,
+            "member": {"roles": [], "joined_at": _timestamp(), "deaf": False, "mute": False},
+            "content": content,
+            "timestamp": _timestamp(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": mentions,
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+        return self.discord.Message(state=self.state, channel=channel, data=data)
+
+    async def _handle(self, message, results: Dict[str, Any]):
+        """1件のメッセージを処理して所要時間を記録"""
+        started = time.perf_counter()
+        try:
+            await self.bot.on_message(message)
+        except Exception as e:
+            results["errors"][type(e).__name__] += 1
+        elapsed = time.perf_counter() - started
+        results["processed"] += 1
+        if message.content.startswith(self.prefix):
+            results["command_latency"].append(elapsed)
+
+    async def _monitor_lag(self, lags: List[float], stop: asyncio.Event):
+        """イベントループの遅延（スリープの超過時間）を計測"""
+        interval = 0.05
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - started - interval))
+
+    async def run_step(self, rate: float) -> Dict[str, Any]:
+        """指定のレートで一定時間メッセージを流し込む"""
+        results: Dict[str, Any] = {
+            "processed": 0,
+            "command_latency": [],
+            "completed": 0,
+            "errors": Counter(),
+            "command_errors": Counter(),
+        }
+        self.results = results
+        lags: List[float] = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(self._monitor_lag(lags, stop))
+        rss_before = rss_bytes()
+        requests_before = sum(self.http.requests.values())
+
+        tasks = set()
+        started = time.perf_counter()
+        sent = 0
+        deadline = started + self.args.duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # 経過時間に対して不足している分をまとめて投入（オープンループ）
+            due = int((now - started) * rate) - sent
+            for _ in range(due):
+                task = asyncio.create_task(self._handle(self._message(), results))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            sent += max(0, due)
+            await asyncio.sleep(0.001)
+
+        offered_elapsed = time.perf_counter() - started
+        processed_in_window = results["processed"]
+        # 投入済みのメッセージの処理完了を待つ（タイムアウトあり）
+        if tasks:
+            await asyncio.wait(set(tasks), timeout=self.args.drain_timeout)
+        stop.set()
+        await monitor
+        # エラー・完了のイベントはタスクとして実行されるため、処理されるまで待つ
+        await asyncio.sleep(0.1)
+        self.results = None
+
+        latencies = results["command_latency"]
+        return {
+            "rate": rate,
+            "sent": sent,
+            "throughput": processed_in_window / offered_elapsed,
+            "backlog": len(tasks),
+            "commands": len(latencies),
+            "completed": results["completed"],
+            "command_errors": dict(results["command_errors"]),
+            "p50": _percentile(latencies, 50),
+            "p99": _percentile(latencies, 99),
+            "lag_p99": _percentile(lags, 99),
+            "lag_max": max(lags) if lags else 0.0,
+            "rss_delta": rss_bytes() - rss_before,
+            "http_requests": sum(self.http.requests.values()) - requests_before,
+            "errors": dict(results["errors"]),
+        }
+
+
+def _seed_data(data_dir: Path, events: int):
+    """イベントデータを作成（一部は定期開催）"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    now = datetime.now()
+    records = []
+    for i in range(events):
+        record = {
+            "id": i + 1,
+            "name": f"負荷試験イベント{i + 1}",
+            "date": (now + timedelta(hours=i % 500 + 1)).strftime("%Y-%m-%d %H:%M"),
+            "description": "負荷試験用のイベントです",
+        }
+        if i % 10 == 0:
+            record["rrule"] = "FREQ=WEEKLY"
+        records.append(record)
+    with open(data_dir / "events.yaml", "w", encoding="utf-8") as f:
+        yaml.dump(records, f, allow_unicode=True, default_flow_style=False)
+
+
+def _print_report(rows: List[Dict[str, Any]], threshold: float):
+    print()
+    print(f"{'offered/s':>10} {'through/s':>10} {'backlog':>8} {'cmds':>6} {'ok':>6} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'lag p99':>8} {'lag max':>8} {'RSS +MB':>8} {'http':>7}")
+    saturated: Optional[float] = None
+    for row in rows:
+        print(f"{row['rate']:>10.0f} {row['throughput']:>10.1f} {row['backlog']:>8} {row['commands']:>6} "
+              f"{row['completed']:>6} {row['p50'] * 1000:>8.1f} {row['p99'] * 1000:>8.1f} {row['lag_p99'] * 1000:>8.1f} "
+              f"{row['lag_max'] * 1000:>8.1f} {row['rss_delta'] / 1024 / 1024:>8.1f} {row['http_requests']:>7}")
+        if row["errors"]:
+            print(f"{'':>10} errors: {row['errors']}")
+        if row["command_errors"]:
+            print(f"{'':>10} command errors: {row['command_errors']}")
+        if saturated is None and row["p99"] > threshold:
+            saturated = row["rate"]
+    print()
+    if saturated is None:
+        print(f"すべての負荷でコマンドのp99応答時間が{threshold * 1000:.0f}ms以内でした")
+    else:
+        print(f"{saturated:.0f} msg/s でコマンドのp99応答時間が{threshold * 1000:.0f}msを超えました")
+
+
+async def main(args) -> int:
+    # 実データを汚さないよう一時ディレクトリで実行
+    workdir = Path(tempfile.mkdtemp(prefix="sumeragi-loadtest-"))
+    os.chdir(workdir)
+    _seed_data(workdir / "data", args.events)
+
+    import bot as bot_module
+    from event_manager import EventManager
+    from resource_manager import ResourceManager
+
+    bot = bot_module.bot
+    async with bot:
+        await bot.add_cog(EventManager(bot))
+        await bot.add_cog(ResourceManager(bot))
+        # データの読み込みはバックグラウンドで行われるため、完了を待ってから計測する
+        started = time.perf_counter()
+        if not await bot.readiness.wait(timeout=60):
+            print("Cogのデータ読み込みに失敗しました", file=sys.stderr)
+            return 1
+        print(f"Cogの準備完了: {time.perf_counter() - started:.2f}秒")
+
+        test = LoadTest(bot, bot_module.settings.prefix(None), args)
+        print(f"作業ディレクトリ: {workdir}")
+        print(f"サーバー {args.guilds} / チャンネル {len(test.channels)} / ユーザー {args.users} / "
+              f"HTTP遅延 {args.http_latency * 1000:.0f}ms")
+
+        rows = []
+        for rate in args.rates:
+            row = await test.run_step(rate)
+            rows.append(row)
+            print(f"{rate:.0f} msg/s: 処理 {row['throughput']:.1f} msg/s, コマンドp99 {row['p99'] * 1000:.1f}ms")
+
+        _print_report(rows, args.threshold)
+        await bot.outbound.close()
+
+    # エラーになったコマンドの応答時間は意味がないため、1件でもあれば試験を失敗とする
+    failed = sum(sum(row["errors"].values()) + sum(row["command_errors"].values()) for row in rows)
+    if failed:
+        print(f"{failed}件のメッセージ・コマンドがエラーになりました", file=sys.stderr)
+        return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="S.U.M.E.R.A.G.I. Bot 負荷試験")
+    parser.add_argument("--rates", type=lambda s: [float(r) for r in s.split(",")],
+                        default=[50, 100, 200, 400, 800, 1600], help="投入するメッセージ数/秒（カンマ区切り）")
+    parser.add_argument("--duration", type=float, default=10.0, help="各段階の秒数")
+    parser.add_argument("--guilds", type=int, default=100, help="サーバー数")
+    parser.add_argument("--channels", type=int, default=3, help="サーバーごとのチャンネル数")
+    parser.add_argument("--users", type=int, default=1000, help="ユーザー数")
+    parser.add_argument("--events", type=int, default=200, help="登録しておくイベント数")
+    parser.add_argument("--command-ratio", type=float, default=0.1, help="コマンドの割合")
+    parser.add_argument("--mention-ratio", type=float, default=0.05, help="メンションの割合")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="ダミーHTTPの応答時間（秒）")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="各段階の終了後に処理完了を待つ秒数")
+    parser.add_argument("--threshold", type=float, default=0.5, help="飽和とみなすコマンドp99応答時間（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    sys.exit(asyncio.run(main(parse_args())))
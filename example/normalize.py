@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 文字列正規化モジュール
+
+検索・補完のキーを作るための正規化を行うモジュール
+全角・半角（NFKC）、大文字・小文字、カタカナ・ひらがな、語末の長音記号、句読点、空白の違いを吸収します
+検索キーはレコードの読み込み時に一度だけ作成し、検索のたびに各フィールドを正規化しないようにします
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+# カタカナ（ァ〜ヶ）をひらがなに変換するテーブル
+_KANA_TABLE = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+# 句読点（Unicodeの一般カテゴリ P*、基本多言語面のみ）を空白に変換するテーブル
+# 記号（S*）と「C#」「R&D」などで意味を持つ一部の文字は残します
+_KEEP_PUNCTUATION = "#&%*@"
+_PUNCTUATION_TABLE = {
+    code: " " for code in range(0x10000)
+    if unicodedata.category(chr(code)).startswith("P") and chr(code) not in _KEEP_PUNCTUATION
+}
+
+# かなの後ろで語が終わる位置の長音記号（「データー」と「データ」の揺れ）
+_TRAILING_LONG_VOWEL = re.compile(r"ー+(?![ぁ-ゖー])")
+
+
+def fold_kana(text: str) -> str:
+    """カタカナをひらがなに変換"""
+    return text.translate(_KANA_TABLE)
+
+
+def normalize(text: str) -> str:
+    """検索・補完用のキーに正規化する
+
+    例: "ＰｙＴｏｒｃｈ" → "pytorch"、"ﾃﾞｰﾀｰ分析" → "でーた分析"、"scikit-learn" → "scikit learn"
+    """
+    text = fold_kana(unicodedata.normalize("NFKC", text).casefold())
+    text = _TRAILING_LONG_VOWEL.sub("", text.translate(_PUNCTUATION_TABLE))
+    return " ".join(text.split())
+
+
+def search_key(texts: Iterable[Optional[str]]) -> str:
+    """複数のフィールドから部分一致検索用のキーを作成
+
+    各フィールドは正規化したうえで空白を取り除き（「Py Torch」と「PyTorch」を同一視）、
+    フィールドをまたいで一致しないよう改行で区切ります
+    """
+    return "\n".join(normalize(text).replace(" ", "") for text in texts if text)
+
+
+def search_terms(query: str) -> List[str]:
+    """検索語を正規化して空白で分割（すべての語を含むレコードが一致）"""
+    return normalize(query).split()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot ページ送りモジュール
+
+一覧・検索結果をボタンでページ送りするためのモジュール
+- 送信時は1ページ目だけを描画し、2ページ目以降はボタンが押されたときにその分だけ描画します
+- 結果の一覧・イテレータ・続きの位置（カーソル）はボタン付きのメッセージ（View）に保持し、ページ送りのたびに検索し直しません
+- 最後の操作から一定時間（PAGE_TTL）が経つとボタンを取り除きます
+- 同時に保持するページ送りの数には上限があり、超えた場合は古いものから終了します
+"""
+
+import itertools
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+import discord
+
+from dispatcher import Priority, get_dispatcher, route_of
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-pagination")
+
+# 最後の操作からボタンを取り除くまでの時間（秒、インタラクションの有効期限15分より短くする）
+PAGE_TTL = 600
+
+# 同時に保持するページ送りの最大数
+MAX_ACTIVE = 200
+
+# イテレータから読み進める最大ページ数
+MAX_STREAM_PAGES = 50
+
+
+class ListPages:
+    """計算済みの結果の一覧をページに分ける（各ページはその件数分だけ取り出す）"""
+
+    def __init__(self, items: Sequence[Any], page_size: int):
+        self.items = items
+        self.page_size = page_size
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.items) // self.page_size))
+
+    def has_page(self, index: int) -> bool:
+        return 0 <= index < self.page_count
+
+    def get_page(self, index: int) -> List[Any]:
+        start = index * self.page_size
+        return list(self.items[start:start + self.page_size])
+
+    def describe(self, index: int) -> str:
+        return f"ページ {index + 1}/{self.page_count}"
+
+
+class StreamPages:
+    """イテレータから表示するページの分だけ取り出す
+
+    取り出した分は前のページに戻るために保持します（最大 MAX_STREAM_PAGES ページ）
+    全体の件数は最後まで読むまで分からないため、次のページがあるかは1件先読みして判定します
+    """
+
+    def __init__(self, iterator: Iterator[Any], page_size: int, max_pages: int = MAX_STREAM_PAGES):
+        self.iterator = iterator
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.buffer: List[Any] = []
+        self.exhausted = False
+
+    def _fill(self, count: int):
+        """count 件目まで読み進める"""
+        if self.exhausted or len(self.buffer) >= count:
+            return
+        self.buffer.extend(itertools.islice(self.iterator, count - len(self.buffer)))
+        if len(self.buffer) < count:
+            self.exhausted = True
+
+    @property
+    def page_count(self) -> Optional[int]:
+        """全ページ数（最後まで読んでいない場合はNone）"""
+        if not self.exhausted:
+            return None
+        return max(1, -(-len(self.buffer) // self.page_size))
+
+    def has_page(self, index: int) -> bool:
+        if index < 0 or index >= self.max_pages:
+            return False
+        self._fill(index * self.page_size + 1)
+        return index == 0 or len(self.buffer) > index * self.page_size
+
+    def get_page(self, index: int) -> List[Any]:
+        start = index * self.page_size
+        # 次のページの有無を判定するため1件先まで読む
+        self._fill(start + self.page_size + 1)
+        return self.buffer[start:start + self.page_size]
+
+    def describe(self, index: int) -> str:
+        count = self.page_count
+        return f"ページ {index + 1}/{count}" if count is not None else f"ページ {index + 1}"
+
+
+class CursorPages:
+    """続きの位置（カーソル）から1ページ分ずつ取り出す
+
+    fetch(cursor, limit) は cursor より後の項目を limit 件まで返し（最初のページは cursor=None）、
+    key(item) はその項目の位置を返します。各ページの開始位置を覚えておき、前後のページも1ページ分だけ取り出します
+    """
+
+    def __init__(self, fetch: Callable[[Any, int], List[Any]], key: Callable[[Any], Any], total: int, page_size: int):
+        self.fetch = fetch
+        self.key = key
+        self.total = total
+        self.page_size = page_size
+        self.starts: List[Any] = [None]
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+    def has_page(self, index: int) -> bool:
+        return 0 <= index < self.page_count
+
+    def get_page(self, index: int) -> List[Any]:
+        # ページ送りは1ページずつ進むため、通常は直前のページで次の開始位置が分かっている
+        while len(self.starts) <= index:
+            if not self.get_page(len(self.starts) - 1):
+                return []
+        page = self.fetch(self.starts[index], self.page_size)
+        if page and len(self.starts) == index + 1:
+            self.starts.append(self.key(page[-1]))
+        return page
+
+    def describe(self, index: int) -> str:
+        return f"ページ {index + 1}/{self.page_count}"
+
+
+# ページの内容（項目の一覧, ページ番号, ページ元）から埋め込みを作る関数
+Renderer = Callable[[List[Any], int, Any], discord.Embed]
+
+
+class Paginator(discord.ui.View):
+    """前へ・次へのボタンでページを切り替えるView
+
+    ボタンはコマンドを実行した本人だけが操作できます
+    """
+
+    def __init__(self, bot, source, render: Renderer, author_id: int, timeout: float = PAGE_TTL):
+        super().__init__(timeout=timeout)
+        self.bot = bot
+        self.outbound = get_dispatcher(bot)
+        self.source = source
+        self.render = render
+        self.author_id = author_id
+        self.index = 0
+        self.message: Optional[discord.Message] = None
+
+    def build(self) -> discord.Embed:
+        """現在のページを描画してボタンの状態を更新"""
+        embed = self.render(self.source.get_page(self.index), self.index, self.source)
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = not self.source.has_page(self.index + 1)
+        self.page_label.label = self.source.describe(self.index)
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id == self.author_id:
+            return True
+        await interaction.response.send_message("このボタンはコマンドを実行した人だけが操作できます。", ephemeral=True)
+        return False
+
+    async def show(self, interaction: discord.Interaction, index: int):
+        """指定したページに切り替える"""
+        if not self.source.has_page(index):
+            await interaction.response.defer()
+            return
+        self.index = index
+        embed = self.build()
+        await self.outbound.call(("interaction", interaction.id), Priority.INTERACTIVE,
+                                 lambda: interaction.response.edit_message(embed=embed, view=self), wait=True)
+
+    @discord.ui.button(label="◀ 前へ", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.index - 1)
+
+    @discord.ui.button(label="ページ 1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def page_label(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="次へ ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.index + 1)
+
+    async def close(self):
+        """ページ送りを終了してボタンを取り除く"""
+        self.stop()
+        get_paginators(self.bot).discard(self)
+        if self.message is not None:
+            message = self.message
+            self.message = None
+            # ボタンの削除は遅れても問題ないため最も低い優先度で行う
+            await self.outbound.call(route_of(message), Priority.PRESENCE, lambda: message.edit(view=None))
+
+    async def on_timeout(self):
+        await self.close()
+
+
+class PaginatorRegistry:
+    """保持しているページ送りの一覧（上限を超えた場合は古いものから終了する）"""
+
+    def __init__(self, limit: int = MAX_ACTIVE):
+        self.limit = limit
+        self._views: "OrderedDict[int, Paginator]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    async def add(self, view: Paginator):
+        self._views[id(view)] = view
+        while len(self._views) > self.limit:
+            _, oldest = self._views.popitem(last=False)
+            await oldest.close()
+
+    def discard(self, view: Paginator):
+        self._views.pop(id(view), None)
+
+
+def get_paginators(bot) -> PaginatorRegistry:
+    """Botに紐づくページ送りの一覧を取得（なければ作成）"""
+    registry = getattr(bot, "paginators", None)
+    if registry is None:
+        registry = PaginatorRegistry()
+        bot.paginators = registry
+    return registry
+
+
+async def send_paginated(ctx, source, render: Renderer):
+    """1ページ目を描画して送信し、次のページがあればページ送りのボタンを付ける"""
+    outbound = get_dispatcher(ctx.bot)
+    if not source.has_page(1):
+        embed = render(source.get_page(0), 0, source)
+        await outbound.send(ctx, embed=embed)
+        return
+
+    view = Paginator(ctx.bot, source, render, ctx.author.id)
+    embed = view.build()
+    await get_paginators(ctx.bot).add(view)
+    try:
+        view.message = await outbound.send(ctx, embed=embed, view=view)
+    except Exception:
+        view.stop()
+        get_paginators(ctx.bot).discard(view)
+        raise
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 準備状況管理モジュール
+
+Cogのデータ読み込みをGatewayへの接続と並行してバックグラウンドで行い、
+読み込みが終わるまではコマンドに「準備中」の応答を返すためのモジュール
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from discord import app_commands
+from discord.ext import commands
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-readiness")
+
+# 状態
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+STATE_LABELS = {
+    LOADING: "準備中",
+    READY: "準備完了",
+    FAILED: "読み込み失敗",
+}
+
+
+class NotReady(commands.CheckFailure, app_commands.CheckFailure):
+    """Cogのデータ読み込みが完了していない場合の例外
+
+    プレフィックスコマンドとスラッシュコマンドのどちらのチェックからも送出できます
+    """
+
+    def __init__(self, name: str, state: str):
+        self.name = name
+        self.state = state
+        if state == FAILED:
+            message = "データの読み込みに失敗したため、このコマンドは現在利用できません。管理者に連絡してください。"
+        else:
+            message = "起動直後のためデータを読み込んでいます。数秒後にもう一度お試しください。"
+        super().__init__(message)
+
+
+class CogStatus:
+    """Cogごとの読み込み状況"""
+
+    __slots__ = ("name", "state", "started", "elapsed", "error", "task", "done")
+
+    def __init__(self, name: str, started: float):
+        self.name = name
+        self.state = LOADING
+        self.started = started
+        self.elapsed: Optional[float] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.done = asyncio.Event()
+
+
+class Readiness:
+    """Cogの読み込み状況を管理する
+
+    start() に渡した読み込み処理はスレッドプールで実行されるため、
+    YAMLの解析やファイルの書き込みの間もイベントループ（Gatewayへの接続）は止まりません
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self._cogs: Dict[str, CogStatus] = {}
+
+    def start(self, name: str, loader: Callable[[], Any],
+              on_ready: Optional[Callable[[], Any]] = None) -> asyncio.Task:
+        """読み込み処理をバックグラウンドで開始
+
+        読み込みが成功した場合はイベントループ上で on_ready を呼び出します
+        """
+        self.forget(name)
+        status = self._cogs[name] = CogStatus(name, self.clock())
+        status.task = asyncio.create_task(self._run(status, loader, on_ready))
+        return status.task
+
+    async def _run(self, status: CogStatus, loader: Callable[[], Any],
+                   on_ready: Optional[Callable[[], Any]]):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, loader)
+            if on_ready is not None:
+                on_ready()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status.state = FAILED
+            status.error = str(e)
+            logger.error(f"Cog '{status.name}' のデータ読み込みに失敗しました: {e}")
+        else:
+            status.state = READY
+            logger.info(f"Cog '{status.name}' の準備が完了しました（{self.clock() - status.started:.2f}秒）")
+        finally:
+            status.elapsed = self.clock() - status.started
+            status.done.set()
+
+    def forget(self, name: str):
+        """Cogのアンロード時に読み込み状況を破棄"""
+        status = self._cogs.pop(name, None)
+        if status is not None and status.task is not None and not status.task.done():
+            status.task.cancel()
+
+    def is_ready(self, name: str) -> bool:
+        """読み込みが完了しているか（登録されていないCogは完了扱い）"""
+        status = self._cogs.get(name)
+        return status is None or status.state == READY
+
+    def check(self, name: str) -> bool:
+        """Cogの cog_check から呼び出し、準備ができていなければ NotReady を送出"""
+        status = self._cogs.get(name)
+        if status is not None and status.state != READY:
+            raise NotReady(name, status.state)
+        return True
+
+    async def wait(self, names: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+        """指定したCog（省略時はすべて）の読み込みが終わるまで待つ
+
+        すべて準備完了になった場合は True を返します
+        """
+        statuses = [self._cogs[name] for name in names if name in self._cogs] if names is not None \
+            else list(self._cogs.values())
+        if statuses:
+            await asyncio.wait_for(asyncio.gather(*(status.done.wait() for status in statuses)), timeout)
+        return all(status.state == READY for status in statuses)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Cogごとの状態と読み込み時間"""
+        now = self.clock()
+        return {
+            name: {
+                "state": status.state,
+                "elapsed": status.elapsed if status.elapsed is not None else now - status.started,
+                "error": status.error,
+            }
+            for name, status in self._cogs.items()
+        }
+
+
+def get_readiness(bot) -> Readiness:
+    """Botに紐づく準備状況を取得（なければ作成）"""
+    readiness = getattr(bot, "readiness", None)
+    if readiness is None:
+        readiness = Readiness()
+        bot.readiness = readiness
+    return readiness
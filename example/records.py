@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot レコード定義モジュール
+
+リソース・イベントをメモリ上でコンパクトに保持するためのレコードクラス
+YAMLとの相互変換（from_dict / to_dict）で保存形式は従来のまま維持します
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from normalize import search_key
+from recurrence import RecurrenceRule
+
+# 日時の保存形式
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# 日時を分単位の整数で保持する際の基準
+_EPOCH = datetime(1970, 1, 1)
+
+# フィールド種別
+STR = "str"        # そのまま保持する文字列
+INTERN = "intern"  # 重複の多い文字列（難易度、ユーザーIDなど）をインターン
+TIME = "time"      # 日時文字列を分単位の整数に圧縮
+TAGS = "tags"      # タグ・除外日などの文字列一覧をインターン済み文字列のタプルで保持
+RAW = "raw"        # 変換せずに保持
+
+_EMPTY_TAGS: Tuple[str, ...] = ()
+
+
+def intern_str(value: Any) -> Any:
+    """文字列であればインターンして返す"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def pack_time(value: Any) -> Union[int, str, None]:
+    """日時文字列を分単位の整数に圧縮する
+
+    形式が異なる文字列は往復で内容が変わらないよう文字列のまま保持します
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        return value
+    if parsed.strftime(DATE_FORMAT) != value:
+        return value
+    return (parsed - _EPOCH) // timedelta(minutes=1)
+
+
+def unpack_time(value: Union[int, str, None]) -> Optional[str]:
+    """圧縮した日時を文字列に戻す"""
+    if isinstance(value, int):
+        return (_EPOCH + timedelta(minutes=value)).strftime(DATE_FORMAT)
+    return value
+
+
+def packed_to_datetime(value: Union[int, str, None]) -> Optional[datetime]:
+    """圧縮した日時をdatetimeに変換する（不正な形式はNone）"""
+    if isinstance(value, int):
+        return _EPOCH + timedelta(minutes=value)
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, DATE_FORMAT)
+        except ValueError:
+            return None
+    return None
+
+
+def _time_property(name: str) -> property:
+    """圧縮済みの日時スロットを文字列として読み書きするプロパティ"""
+    slot = "_" + name
+
+    def getter(self):
+        return unpack_time(getattr(self, slot))
+
+    def setter(self, value):
+        setattr(self, slot, pack_time(value))
+
+    return property(getter, setter)
+
+
+class Record:
+    """__slots__ を用いたレコードの基底クラス
+
+    サブクラスは FIELDS に (フィールド名, 種別) を定義します
+    値が None のフィールドはYAMLに出力しません
+    """
+
+    __slots__ = ("extra",)
+
+    FIELDS: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def _slot_name(cls, name: str, kind: str) -> str:
+        return "_" + name if kind == TIME else name
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], **context):
+        """YAMLから読み込んだ辞書からレコードを作成"""
+        record = cls.__new__(cls)
+        known = set()
+        for name, kind in cls.FIELDS:
+            known.add(name)
+            record._assign(name, kind, data.get(name))
+        extra = {key: value for key, value in data.items() if key not in known}
+        record.extra = extra or None
+        for key, value in context.items():
+            setattr(record, key, value)
+        return record
+
+    def _assign(self, name: str, kind: str, value: Any):
+        if value is None:
+            converted = None
+        elif kind == INTERN:
+            converted = intern_str(value)
+        elif kind == TIME:
+            converted = pack_time(value)
+        elif kind == TAGS:
+            converted = tuple(intern_str(tag) for tag in value) if value else _EMPTY_TAGS
+        else:
+            converted = value
+        setattr(self, self._slot_name(name, kind), converted)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """YAML保存用の辞書に変換"""
+        data: Dict[str, Any] = {}
+        for name, kind in self.FIELDS:
+            value = getattr(self, self._slot_name(name, kind))
+            if value is None:
+                continue
+            if kind == TIME:
+                value = unpack_time(value)
+            elif kind == TAGS:
+                value = list(value)
+            data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """フィールド名を指定して値を取得（未設定の場合はdefault）"""
+        for name, kind in self.FIELDS:
+            if name == field:
+                value = getattr(self, name)
+                return default if value is None else value
+        if self.extra and field in self.extra:
+            return self.extra[field]
+        return default
+
+    def set_field(self, field: str, value: Any):
+        """フィールド名を指定して値を設定"""
+        for name, kind in self.FIELDS:
+            if name == field:
+                self._assign(name, kind, value)
+                return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[field] = value
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} id={getattr(self, 'id', None)}>"
+
+
+class Resource(Record):
+    """学習リソースのレコード
+
+    カテゴリはYAML上では親キーのため保存しませんが、インデックス用に保持します
+    検索キー（タイトル・説明・タグを正規化したもの）は作成時と該当フィールドの変更時に作り直し、保存はしません
+    """
+
+    __slots__ = (
+        "id", "category", "title", "url", "description", "difficulty", "tags",
+        "added_by", "_added_at", "updated_by", "_updated_at", "search_key",
+    )
+
+    # 検索キーに含めるフィールド
+    SEARCH_FIELDS = ("title", "description", "tags")
+
+    FIELDS = (
+        ("id", RAW),
+        ("title", STR),
+        ("url", STR),
+        ("description", STR),
+        ("difficulty", INTERN),
+        ("tags", TAGS),
+        ("added_by", INTERN),
+        ("added_at", TIME),
+        ("updated_by", INTERN),
+        ("updated_at", TIME),
+    )
+
+    added_at = _time_property("added_at")
+    updated_at = _time_property("updated_at")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], category: str = ""):
+        resource = super().from_dict(data, category=intern_str(category))
+        resource.update_search_key()
+        return resource
+
+    def set_field(self, field: str, value: Any):
+        super().set_field(field, value)
+        if field in self.SEARCH_FIELDS:
+            self.update_search_key()
+
+    def update_search_key(self):
+        """検索キーを作り直す"""
+        self.search_key = search_key((self.title, self.description, *(self.tags or ())))
+
+
+class Event(Record):
+    """イベントのレコード
+
+    開催日時は分単位の整数で保持し、通知や一覧のたびに文字列を解析しないようにします
+    定期開催イベントは1件のレコードに繰り返しルール（rrule）と除外日（exdates）を持ち、
+    各回の日時は occurrences() で必要な期間の分だけ展開します
+    """
+
+    __slots__ = (
+        "id", "name", "_date", "description", "location", "url", "rrule", "exdates",
+        "created_by", "_created_at", "updated_by", "_updated_at", "_rule",
+    )
+
+    FIELDS = (
+        ("id", RAW),
+        ("name", STR),
+        ("date", TIME),
+        ("description", STR),
+        ("location", STR),
+        ("url", STR),
+        ("rrule", STR),
+        ("exdates", TAGS),
+        ("created_by", INTERN),
+        ("created_at", TIME),
+        ("updated_by", INTERN),
+        ("updated_at", TIME),
+    )
+
+    date = _time_property("date")
+    created_at = _time_property("created_at")
+    updated_at = _time_property("updated_at")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        return super().from_dict(data, _rule=None)
+
+    def set_field(self, field: str, value: Any):
+        super().set_field(field, value)
+        if field in ("rrule", "exdates"):
+            self._rule = None
+
+    @property
+    def start(self) -> Optional[datetime]:
+        """開催日時（定期開催の場合は初回、形式が不正な場合はNone）"""
+        return packed_to_datetime(self._date)
+
+    @property
+    def rule(self) -> Optional[RecurrenceRule]:
+        """繰り返しルール（定期開催でない場合はNone）"""
+        if self.rrule and self._rule is None:
+            self._rule = RecurrenceRule.parse(self.rrule, self.exdates or ())
+        return self._rule
+
+    def occurrences(self, window_start: datetime, window_end: Optional[datetime] = None) -> Iterator[datetime]:
+        """[window_start, window_end) に含まれる開催日時を順に返す"""
+        start = self.start
+        if start is None:
+            return
+        rule = self.rule
+        if rule is None:
+            if start >= window_start and (window_end is None or start < window_end):
+                yield start
+            return
+        yield from rule.between(start, window_start, window_end)
+
+    def last_occurrence(self) -> Optional[datetime]:
+        """最後の開催日時（終わりのない定期開催や日時が不正な場合はNone）"""
+        start = self.start
+        if start is None:
+            return None
+        rule = self.rule
+        return start if rule is None else rule.last(start)
+
+
+def resources_from_yaml(data: Optional[Dict[str, List[Dict[str, Any]]]]) -> Dict[str, List[Resource]]:
+    """カテゴリ別のリソース辞書をレコードに変換"""
+    resources: Dict[str, List[Resource]] = {}
+    for category, items in (data or {}).items():
+        category = intern_str(category)
+        resources[category] = [Resource.from_dict(item, category) for item in items or []]
+    return resources
+
+
+def resources_to_yaml(resources: Dict[str, List[Resource]]) -> Dict[str, List[Dict[str, Any]]]:
+    """カテゴリ別のリソースレコードをYAML保存用の辞書に変換"""
+    return {category: [resource.to_dict() for resource in items] for category, items in resources.items()}
+
+
+def events_from_yaml(data: Optional[List[Dict[str, Any]]]) -> List[Event]:
+    """イベント一覧をレコードに変換"""
+    return [Event.from_dict(item) for item in data or []]
+
+
+def events_to_yaml(events: List[Event]) -> List[Dict[str, Any]]:
+    """イベントレコードをYAML保存用のリストに変換"""
+    return [event.to_dict() for event in events]
+
+
+# ---------------------------------------------------------------------------
+# メモリ使用量の計測
+# ---------------------------------------------------------------------------
+
+_SAMPLE_DIFFICULTIES = ["初級", "中級", "上級"]
+_SAMPLE_TAGS = ["AI", "入門", "基礎", "Python", "機械学習", "深層学習", "PyTorch", "NLP"]
+
+
+def _sample_resource(i: int) -> Dict[str, Any]:
+    """YAMLから読み込んだ直後と同等の辞書を作成（文字列は毎回新しいオブジェクト）"""
+    return {
+        "id": i,
+        "title": f"サンプルリソース{i}",
+        "url": f"https://example.com/resources/{i}",
+        "description": f"リソース{i}の説明文です。AIの基本概念を学ぶための教材",
+        "difficulty": "".join(_SAMPLE_DIFFICULTIES[i % 3]),
+        "tags": ["".join(_SAMPLE_TAGS[(i + k) % len(_SAMPLE_TAGS)]) for k in range(3)],
+        "added_by": str(100000000000000000 + i % 50),
+        "added_at": f"2025-03-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}",
+    }
+
+
+def _traced_bytes(build: Callable[[], Any]) -> Tuple[int, Any]:
+    """buildで作成されたオブジェクトが保持しているメモリ量を計測"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        if started:
+            tracemalloc.stop()
+    return after - before, result
+
+
+def measure_bytes_per_record(count: int = 100000) -> Dict[str, float]:
+    """辞書とレコードそれぞれの1件あたりのメモリ使用量（バイト）を計測"""
+    dict_bytes, dicts = _traced_bytes(lambda: [_sample_resource(i) for i in range(count)])
+    del dicts
+    record_bytes, records = _traced_bytes(
+        lambda: [Resource.from_dict(_sample_resource(i), "入門者向け") for i in range(count)]
+    )
+    del records
+    return {
+        "dict": dict_bytes / count,
+        "record": record_bytes / count,
+    }
+
+
+if __name__ == "__main__":
+    result = measure_bytes_per_record()
+    print(f"dict:   {result['dict']:.1f} bytes/record")
+    print(f"record: {result['record']:.1f} bytes/record")
+    print(f"削減率: {1 - result['record'] / result['dict']:.1%}")
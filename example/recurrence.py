@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot 繰り返しルールモジュール
+
+定期開催イベントの繰り返しルール（RRULE形式のサブセット）を扱うモジュール
+開催日は保存せず、一覧や通知で必要な期間の分だけ都度展開します
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from typing import FrozenSet, Iterable, Iterator, Optional
+
+WEEKLY = "WEEKLY"
+MONTHLY = "MONTHLY"
+FREQUENCIES = (WEEKLY, MONTHLY)
+
+# 日本語・小文字での指定
+_FREQ_ALIASES = {
+    "weekly": WEEKLY,
+    "毎週": WEEKLY,
+    "monthly": MONTHLY,
+    "毎月": MONTHLY,
+}
+
+DAY_FORMAT = "%Y-%m-%d"
+
+
+class RecurrenceError(ValueError):
+    """繰り返しルールが不正な場合の例外"""
+
+
+def _parse_day(value: str) -> date:
+    try:
+        return datetime.strptime(value, DAY_FORMAT).date()
+    except ValueError:
+        raise RecurrenceError(f"日付は YYYY-MM-DD 形式で指定してください: {value}")
+
+
+def _add_months(value: datetime, months: int) -> Optional[datetime]:
+    """月を加算する（該当する日が存在しない月はNone）"""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None
+    return value.replace(year=year, month=month)
+
+
+class RecurrenceRule:
+    """繰り返しルール
+
+    FREQ（WEEKLY/MONTHLY）、INTERVAL、UNTIL（日付）、COUNT をサポートします
+    除外日（EXDATE）に該当する回は表示・通知されませんが、COUNT には数えられます
+    """
+
+    __slots__ = ("freq", "interval", "until", "count", "exdates")
+
+    def __init__(self, freq: str, interval: int = 1, until: Optional[date] = None,
+                 count: Optional[int] = None, exdates: Iterable[date] = ()):
+        if freq not in FREQUENCIES:
+            raise RecurrenceError(f"繰り返しの種類は {', '.join(FREQUENCIES)} のいずれかです: {freq}")
+        if interval < 1:
+            raise RecurrenceError("INTERVALは1以上で指定してください")
+        if count is not None and count < 1:
+            raise RecurrenceError("COUNTは1以上で指定してください")
+        self.freq = freq
+        self.interval = interval
+        self.until = until
+        self.count = count
+        self.exdates: FrozenSet[date] = frozenset(exdates)
+
+    @classmethod
+    def parse(cls, text: str, exdates: Iterable[str] = ()) -> "RecurrenceRule":
+        """ルール文字列を解析する
+
+        例: FREQ=WEEKLY;INTERVAL=2;UNTIL=2025-06-30
+        例: weekly count=10 / 毎月 until=2025-12-31
+        """
+        parts = [part for chunk in text.split(";") for part in chunk.split()]
+        options = {}
+        for part in parts:
+            key, sep, value = part.partition("=")
+            if not sep:
+                key, value = "FREQ", key
+            options[key.upper()] = value
+
+        freq = options.pop("FREQ", "")
+        freq = _FREQ_ALIASES.get(freq.lower(), freq.upper())
+        try:
+            interval = int(options.pop("INTERVAL", 1))
+            count = int(options["COUNT"]) if "COUNT" in options else None
+        except ValueError:
+            raise RecurrenceError("INTERVAL・COUNTは整数で指定してください")
+        options.pop("COUNT", None)
+        until = _parse_day(options.pop("UNTIL")) if "UNTIL" in options else None
+        if options:
+            raise RecurrenceError(f"不明な指定があります: {', '.join(options)}")
+        return cls(freq, interval, until, count, (_parse_day(d) for d in exdates))
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.until:
+            parts.append(f"UNTIL={self.until.strftime(DAY_FORMAT)}")
+        if self.count:
+            parts.append(f"COUNT={self.count}")
+        return ";".join(parts)
+
+    def describe(self) -> str:
+        """表示用の説明文"""
+        unit = "週" if self.freq == WEEKLY else "か月"
+        text = f"{self.interval}{unit}ごと" if self.interval != 1 else ("毎週" if self.freq == WEEKLY else "毎月")
+        if self.until:
+            text += f"（{self.until.strftime(DAY_FORMAT)}まで）"
+        if self.count:
+            text += f"（全{self.count}回）"
+        return text
+
+    def _nth(self, start: datetime, n: int) -> Optional[datetime]:
+        """n回目（0始まり）の候補日時（存在しない日はNone）"""
+        if self.freq == WEEKLY:
+            return start + timedelta(weeks=n * self.interval)
+        return _add_months(start, n * self.interval)
+
+    def _first_index(self, start: datetime, window_start: datetime) -> int:
+        """window_start以降の最初の回の番号（下限）を計算する"""
+        if window_start <= start:
+            return 0
+        if self.freq == WEEKLY:
+            step = timedelta(weeks=self.interval)
+            return (window_start - start) // step
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        return max(0, months // self.interval - 1)
+
+    def _candidates(self, start: datetime, window_start: datetime) -> Iterator[datetime]:
+        """開始日時からのすべての回（除外日を含む）を順に返す"""
+        # 存在しない日を飛ばす月次ルールで回数指定がある場合は、回数を正しく数えるため先頭から数える
+        skips_days = self.freq == MONTHLY and start.day > 28
+        n = 0 if (self.count and skips_days) else self._first_index(start, window_start)
+        produced = n
+        while self.count is None or produced < self.count:
+            occurrence = self._nth(start, n)
+            n += 1
+            if occurrence is None:
+                continue
+            if self.until and occurrence.date() > self.until:
+                return
+            produced += 1
+            yield occurrence
+
+    def between(self, start: datetime, window_start: datetime,
+                window_end: Optional[datetime] = None) -> Iterator[datetime]:
+        """[window_start, window_end) に含まれる開催日時を順に返す
+
+        window_end を省略した場合はルールの終わりまで（終わりがなければ無限に）返します
+        """
+        for occurrence in self._candidates(start, window_start):
+            if window_end is not None and occurrence >= window_end:
+                return
+            if occurrence < window_start or occurrence.date() in self.exdates:
+                continue
+            yield occurrence
+
+    def last(self, start: datetime) -> Optional[datetime]:
+        """最後の開催日時（終わりのないルールはNone）"""
+        if self.until is None and self.count is None:
+            return None
+        last = None
+        if self.count is not None:
+            if self.freq == WEEKLY:
+                last = self._nth(start, self.count - 1)
+                if self.until is None or last.date() <= self.until:
+                    return last
+            else:
+                for last in self._candidates(start, start):
+                    pass
+                return last
+        # UNTILまでの回を数えずに最後の回を求める
+        n = self._first_index(start, datetime.combine(self.until, datetime.max.time()))
+        for k in range(n + 1, -1, -1):
+            occurrence = self._nth(start, k)
+            if occurrence is not None and occurrence.date() <= self.until:
+                return occurrence
+        return None
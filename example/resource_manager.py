@@ -8,14 +8,27 @@ AIに関する学習リソースを管理・提供するためのモジュール
 """
 
 import os
-import yaml
+import sys
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 import discord
-from discord.ext import commands
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from records import Resource, resources_from_yaml, resources_to_yaml
+from diagnostics import estimate_sizeof
+from dispatcher import get_dispatcher
+from readiness import get_readiness
+from storage import ChangeLog, FileLock, YamlStore
+from link_checker import LinkChecker, LinkHealth, LinkHealthStore
+from facets import CATEGORY, DIFFICULTY, FACET_LABELS, TAG, FacetIndex, is_facet_query, parse_facet_query
+from autocomplete import TITLE, ResourceCompleter
+from normalize import search_terms
+from pagination import CursorPages, ListPages, send_paginated
+from slash_commands import invoke
 
 # ロギングの設定
 logger = logging.getLogger("sumeragi-resource-manager")
@@ -23,6 +36,21 @@ logger = logging.getLogger("sumeragi-resource-manager")
 # リソースデータを保存するディレクトリ
 DATA_DIR = Path("data")
 RESOURCES_FILE = DATA_DIR / "resources.yaml"
+LINK_HEALTH_FILE = DATA_DIR / "link_health.yaml"
+
+# 複数のプロセスが起動している場合にリンク切れの確認を行うプロセスを1つに決めるためのロック
+LINK_CHECK_LOCK = DATA_DIR / "linkcheck"
+
+# リンク切れ確認の間隔（時間）と同時接続数（全体・ホストごと）
+LINK_CHECK_HOURS = float(os.getenv("LINK_CHECK_HOURS", "24"))
+LINK_CHECK_CONCURRENCY = int(os.getenv("LINK_CHECK_CONCURRENCY", "20"))
+LINK_CHECK_PER_HOST = int(os.getenv("LINK_CHECK_PER_HOST", "2"))
+
+# リンク切れ一覧の最大表示件数
+LINK_REPORT_LIMIT = 20
+
+# 一覧・検索結果の1ページあたりの件数
+PAGE_SIZE = 10
 
 class ResourceManager(commands.Cog):
     """学習リソース管理を行うCog"""
@@ -30,11 +58,40 @@ class ResourceManager(commands.Cog):
     def __init__(self, bot):
         """初期化"""
         self.bot = bot
-        self.resources: Dict[str, List[Dict[str, Any]]] = {}
+        self.outbound = get_dispatcher(bot)
+        self.resources: Dict[str, List[Resource]] = {}
+        self.facets = FacetIndex()
+        self.completer = ResourceCompleter()
+        self.store = YamlStore(RESOURCES_FILE)
+        self.changes = ChangeLog()
+        self.readiness = get_readiness(bot)
+        
+        # リンク切れの確認結果（リソースIDごと）
+        self.link_health: Dict[int, LinkHealth] = {}
+        self.link_store = LinkHealthStore(LINK_HEALTH_FILE)
+        self.link_checker = LinkChecker(concurrency=LINK_CHECK_CONCURRENCY, per_host=LINK_CHECK_PER_HOST)
+        self.link_check_lock = FileLock(LINK_CHECK_LOCK)
+        self.link_check_running = False
+    
+    async def cog_load(self):
+        """Cogの読み込み時に呼ばれる処理
         
+        データの読み込みはGatewayへの接続と並行してバックグラウンドで行い、
+        完了後にリンク切れの定期確認を開始します
+        """
+        self.readiness.start(self.qualified_name, self.load_data, on_ready=self.link_check_loop.start)
+    
+    def cog_unload(self):
+        """Cogのアンロード時に呼ばれる処理"""
+        self.readiness.forget(self.qualified_name)
+        self.link_check_loop.cancel()
+        self.link_check_lock.release()
+    
+    def load_data(self):
+        """データの読み込みとインデックスの構築（スレッドプールで実行される）"""
         # データディレクトリが存在しない場合は作成
         if not DATA_DIR.exists():
-            DATA_DIR.mkdir(parents=True)
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
         
         # リソースデータをロード
         self.load_resources()
@@ -42,6 +99,12 @@ class ResourceManager(commands.Cog):
         # デフォルトリソースがない場合は作成
         if not self.resources:
             self.create_default_resources()
+        
+        # ファセットインデックスと補完インデックスを構築
+        self.rebuild_indexes()
+        
+        # リンク切れの確認結果をロード
+        self.load_link_health()
     
     def load_resources(self):
         """リソースデータをファイルから読み込む"""
@@ -51,19 +114,111 @@ class ResourceManager(commands.Cog):
             return
         
         try:
-            with open(RESOURCES_FILE, "r", encoding="utf-8") as f:
-                self.resources = yaml.safe_load(f) or {}
-                total_resources = sum(len(cat_resources) for cat_resources in self.resources.values())
-                logger.info(f"{len(self.resources)}カテゴリ、合計{total_resources}件のリソースを読み込みました")
+            self.resources = resources_from_yaml(self.store.load())
+            self.changes.clear()
+            total_resources = sum(len(cat_resources) for cat_resources in self.resources.values())
+            logger.info(f"{len(self.resources)}カテゴリ、合計{total_resources}件のリソースを読み込みました")
         except Exception as e:
             logger.error(f"リソースの読み込みに失敗しました: {e}")
             self.resources = {}
     
+    def rebuild_indexes(self):
+        """ファセットインデックスと補完インデックスを作り直す"""
+        self.facets.rebuild(self.resources)
+        self.completer.rebuild(self.resources)
+    
+    def load_link_health(self):
+        """リンク切れの確認結果をファイルから読み込む"""
+        try:
+            self.link_health = self.link_store.load()
+        except Exception as e:
+            logger.error(f"リンク切れの確認結果の読み込みに失敗しました: {e}")
+            self.link_health = {}
+    
+    def link_marker(self, resource: Resource) -> str:
+        """リンク切れが確認されたリソースの表示用の印"""
+        health = self.link_health.get(resource.id)
+        if health is not None and not health.ok and health.url == resource.url:
+            return " ⚠️リンク切れ"
+        return ""
+    
+    def broken_links(self) -> List[Tuple[Resource, LinkHealth]]:
+        """現在のURLでリンク切れが確認されているリソース（連続失敗回数の多い順）"""
+        broken = []
+        for resource_id, health in self.link_health.items():
+            resource = self.facets.get(resource_id)
+            if resource is not None and not health.ok and health.url == resource.url:
+                broken.append((resource, health))
+        broken.sort(key=lambda item: (-(item[1].failures or 0), item[0].id))
+        return broken
+    
+    async def check_links(self) -> Optional[Dict[int, LinkHealth]]:
+        """全リソースのURLを確認して結果を保存（実行中の場合は None）"""
+        if self.link_check_running:
+            return None
+        self.link_check_running = True
+        try:
+            targets = {resource.id: resource.url for items in self.resources.values() for resource in items}
+            self.link_health = await self.link_checker.check_all(targets, self.link_health)
+            self.link_store.save(self.link_health)
+            return self.link_health
+        finally:
+            self.link_check_running = False
+    
+    @tasks.loop(hours=LINK_CHECK_HOURS)
+    async def link_check_loop(self):
+        """リンク切れを定期的に確認するタスク"""
+        # 複数のプロセスが起動している場合はロックを取得したプロセスだけが確認し、
+        # 他のプロセスは保存された結果を読み込む
+        if not self.link_check_lock.try_acquire():
+            if self.link_store.changed():
+                self.load_link_health()
+            return
+        
+        # 再起動の直後などで前回の確認から間隔が空いていなければ確認しない
+        checked = [health.checked for health in self.link_health.values() if health.checked]
+        if checked and datetime.now() - max(checked) < timedelta(hours=LINK_CHECK_HOURS):
+            return
+        
+        try:
+            await self.check_links()
+        except Exception as e:
+            logger.error(f"リンク切れの確認に失敗しました: {e}")
+    
+    def reload_if_changed(self):
+        """他のプロセスがファイルを更新していれば読み込み直す"""
+        if not self.changes and self.store.changed():
+            logger.info("リソースファイルの更新を検出したため読み込み直します")
+            self.load_resources()
+            self.rebuild_indexes()
+    
+    async def cog_check(self, ctx):
+        """データの読み込みが完了するまではコマンドを受け付けない"""
+        return self.readiness.check(self.qualified_name)
+    
+    async def cog_before_invoke(self, ctx):
+        """コマンド実行前に最新のデータを反映"""
+        self.reload_if_changed()
+    
+    def _merge_resources(self, theirs):
+        """他のプロセスが保存した内容にこのプロセスの変更を適用"""
+        if theirs is not None:
+            records = [resource for items in resources_from_yaml(theirs).values() for resource in items]
+            merged: Dict[str, List[Resource]] = {}
+            for resource in self.changes.apply(records):
+                merged.setdefault(resource.category, []).append(resource)
+            self.resources = merged
+            self.rebuild_indexes()
+        return resources_to_yaml(self.resources)
+    
     def save_resources(self):
-        """リソースデータをファイルに保存"""
+        """リソースデータをファイルに保存
+        
+        一時ファイル経由でアトミックに書き込み、他のプロセスによる変更があればマージします
+        """
         try:
-            with open(RESOURCES_FILE, "w", encoding="utf-8") as f:
-                yaml.dump(self.resources, f, allow_unicode=True, default_flow_style=False)
+            self.store.save(self._merge_resources)
+            self.changes.clear()
             
             total_resources = sum(len(cat_resources) for cat_resources in self.resources.values())
             logger.info(f"{len(self.resources)}カテゴリ、合計{total_resources}件のリソースを保存しました")
@@ -74,7 +229,7 @@ class ResourceManager(commands.Cog):
     
     def create_default_resources(self):
         """デフォルトのリソースデータを作成"""
-        self.resources = {
+        self.resources = resources_from_yaml({
             "入門者向け": [
                 {
                     "id": 1,
@@ -165,65 +320,111 @@ class ResourceManager(commands.Cog):
                     "tags": ["NLP", "Transformer", "BERT", "GPT"]
                 }
             ]
-        }
+        })
         
         self.save_resources()
     
+    def memory_stats(self) -> Dict[str, Tuple[int, int]]:
+        """データ構造とインデックスの件数とおおよそのサイズ（!memstats 用）"""
+        records = [resource for items in self.resources.values() for resource in items]
+        return {
+            "resources": (len(records), sys.getsizeof(self.resources) + estimate_sizeof(records)),
+            "facet_index": (len(self.facets), self.facets.memory_usage()),
+            "completion_index": (len(self.completer), self.completer.memory_usage()),
+            "link_health": (len(self.link_health), estimate_sizeof(list(self.link_health.values()))),
+            "pending_changes": (len(self.changes.upserts) + len(self.changes.deleted), 0),
+        }
+    
+    def data_version(self) -> Tuple[Any, ...]:
+        """メモリ上のリソースとリンク切れの確認結果のバージョン
+        
+        ファイルの保存・読み込みか、このプロセスでの変更のたびに変わります（Web APIのETagに使用）
+        """
+        return (self.store.version, self.changes.revision, self.link_store.store.version)
+    
+    def search(self, query: str) -> List[Resource]:
+        """タイトル・説明・タグに検索語をすべて含むリソースを返す
+        
+        全角・半角やカタカナ・ひらがななどの違いは無視します
+        検索語だけを正規化し、読み込み時に作成済みの各リソースの検索キーと比較します
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        return [
+            resource
+            for resources in self.resources.values()
+            for resource in resources
+            if all(term in resource.search_key for term in terms)
+        ]
+    
     def get_next_id(self) -> int:
         """次のリソースIDを取得"""
         max_id = 0
         for category in self.resources.values():
             for resource in category:
-                if resource.get("id", 0) > max_id:
-                    max_id = resource["id"]
+                if (resource.id or 0) > max_id:
+                    max_id = resource.id
         return max_id + 1
     
-    def get_resource_by_id(self, resource_id: int) -> Optional[Dict[str, Any]]:
+    def get_resource_by_id(self, resource_id: int) -> Optional[Tuple[Resource, str]]:
         """指定IDのリソースを取得"""
-        for category, resources in self.resources.items():
-            for resource in resources:
-                if resource.get("id") == resource_id:
-                    return resource, category
-        return None
+        resource = self.facets.get(resource_id)
+        if resource is None:
+            return None
+        return resource, resource.category
     
     @commands.group(name="resource", aliases=["r"], invoke_without_command=True)
     async def resource_group(self, ctx):
         """リソース関連コマンドのベースグループ"""
-        await ctx.send("リソース管理コマンド: `list`, `add`, `search`, `delete`, `update` があります。詳細は `!help resource` で確認できます。")
+        await self.outbound.send(ctx, "リソース管理コマンド: `list`, `add`, `search`, `delete`, `update`, `linkcheck`, `linkreport` があります。詳細は `!help resource` で確認できます。")
     
     @resource_group.command(name="list")
-    async def list_resources(self, ctx, category=None):
+    async def list_resources(self, ctx, *, category=None):
         """リソース一覧を表示するコマンド
         
         カテゴリを指定するとそのカテゴリのリソースを表示します
+        タグ・難易度・カテゴリの条件を組み合わせて絞り込むこともできます
         例: !resource list 機械学習
+        例: !resource list tag:PyTorch difficulty:上級 category:深層学習
         """
         if not self.resources:
-            await ctx.send("登録されているリソースはありません。")
+            await self.outbound.send(ctx, "登録されているリソースはありません。")
             return
         
-        if category and category in self.resources:
-            # 特定カテゴリのリソースを表示
-            embed = discord.Embed(
-                title=f"📚 {category}リソース一覧",
-                description=f"{category}に関する学習リソース（{len(self.resources[category])}件）",
-                color=0x4a6baf
-            )
+        if is_facet_query(category):
+            await self.list_faceted(ctx, category)
             
-            for resource in self.resources[category]:
-                embed.add_field(
-                    name=f"{resource['title']} [{resource.get('difficulty', '不明')}]",
-                    value=f"{resource['description'][:100]}\n[リンク]({resource['url']})",
-                    inline=False
+        elif category and category in self.resources:
+            # 特定カテゴリのリソースをページに分けて表示
+            resources = list(self.resources[category])
+            
+            def render(page, index, source):
+                embed = discord.Embed(
+                    title=f"📚 {category}リソース一覧",
+                    description=f"{category}に関する学習リソース（{len(resources)}件）",
+                    color=0x4a6baf
                 )
+                for resource in page:
+                    embed.add_field(
+                        name=f"{resource.title} [{resource.get('difficulty', '不明')}]{self.link_marker(resource)}",
+                        value=f"{resource.description[:100]}\n[リンク]({resource.url})",
+                        inline=False
+                    )
+                embed.set_footer(text=f"{source.describe(index)} - S.U.M.E.R.A.G.I. リソース - {ctx.author.name}からのリクエスト")
+                return embed
             
-            embed.set_footer(text=f"S.U.M.E.R.A.G.I. リソース - {ctx.author.name}からのリクエスト")
-            await ctx.send(embed=embed)
+            await send_paginated(ctx, ListPages(resources, PAGE_SIZE), render)
             
         elif category:
-            # 指定されたカテゴリが存在しない場合
-            categories = ", ".join(f"`{cat}`" for cat in self.resources.keys())
-            await ctx.send(f"指定されたカテゴリ `{category}` は存在しません。利用可能なカテゴリ: {categories}")
+            # 指定されたカテゴリが存在しない場合は前方一致する候補だけを表示
+            candidates = self.completer.complete(CATEGORY, category, limit=5)
+            if candidates:
+                suggestions = ", ".join(f"`{cat}`" for cat in candidates)
+                await self.outbound.send(ctx, f"指定されたカテゴリ `{category}` は存在しません。もしかして: {suggestions}")
+            else:
+                await self.outbound.send(ctx, f"指定されたカテゴリ `{category}` は存在しません。"
+                                              f"`{ctx.clean_prefix}resource list` でカテゴリ一覧を確認できます。")
             
         else:
             # カテゴリ一覧を表示
@@ -237,12 +438,68 @@ class ResourceManager(commands.Cog):
                 resource_count = len(resources)
                 embed.add_field(
                     name=f"{category} ({resource_count}件)",
-                    value=f"`!resource list {category}` で詳細表示",
+                    value=f"`{ctx.clean_prefix}resource list {category}` で詳細表示",
                     inline=True
                 )
             
             embed.set_footer(text=f"S.U.M.E.R.A.G.I. リソース - {datetime.now().strftime('%Y-%m-%d')}")
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
+    
+    async def list_faceted(self, ctx, query_text):
+        """ファセット条件で絞り込んだリソースと件数を表示"""
+        query, invalid = parse_facet_query(query_text.split())
+        if invalid:
+            await self.outbound.send(ctx, f"解析できない条件があります: {', '.join(f'`{token}`' for token in invalid)}\n"
+                           "使用できる条件: `category:<カテゴリ>`, `difficulty:<難易度>`, `tag:<タグ>`")
+            return
+        
+        await self.send_faceted(ctx, query)
+    
+    async def send_faceted(self, ctx, query: Dict[str, List[str]]):
+        """解析済みのファセット条件で絞り込んだリソースと件数を表示"""
+        bitmap = self.facets.filter(query)
+        total = self.facets.count(bitmap)
+        conditions = " ".join(f"{FACET_LABELS[facet]}:{','.join(values)}" for facet, values in query.items())
+        
+        if not total:
+            await self.outbound.send(ctx, f"条件「{conditions}」に一致するリソースは見つかりませんでした。")
+            return
+        
+        # ファセットごとの件数は最初に一度だけ求め、各ページはビットマップを前のページの最後のIDから走査して取り出す
+        facet_counts = self.facets.facet_counts(bitmap)
+        source = CursorPages(
+            lambda after, limit: self.facets.resources(bitmap, limit=limit, after=after),
+            lambda resource: resource.id,
+            total,
+            PAGE_SIZE
+        )
+        
+        def render(page, index, source):
+            embed = discord.Embed(
+                title="🔎 リソース絞り込み結果",
+                description=f"条件「{conditions}」に一致するリソース（{total}件）",
+                color=0x4a6baf
+            )
+            for resource in page:
+                embed.add_field(
+                    name=f"[{resource.category}] {resource.title} [{resource.get('difficulty', '不明')}]{self.link_marker(resource)}",
+                    value=f"{resource.description[:100]}\n[リンク]({resource.url})",
+                    inline=False
+                )
+            
+            # ファセットごとの件数
+            for facet, values in facet_counts.items():
+                if values:
+                    embed.add_field(
+                        name=f"{FACET_LABELS[facet]}別の件数",
+                        value=" / ".join(f"{value} ({count})" for value, count in values),
+                        inline=False
+                    )
+            
+            embed.set_footer(text=f"{source.describe(index)} - S.U.M.E.R.A.G.I. リソース - {ctx.author.name}からのリクエスト")
+            return embed
+        
+        await send_paginated(ctx, source, render)
     
     @resource_group.command(name="add")
     @commands.has_permissions(administrator=True)
@@ -256,7 +513,7 @@ class ResourceManager(commands.Cog):
             self.resources[category] = []
         
         # 新しいリソースを作成
-        new_resource = {
+        new_resource = Resource.from_dict({
             "id": self.get_next_id(),
             "title": title,
             "url": url,
@@ -265,10 +522,13 @@ class ResourceManager(commands.Cog):
             "tags": [category],
             "added_by": str(ctx.author.id),
             "added_at": datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
+        }, category)
         
         # リソースリストに追加
         self.resources[category].append(new_resource)
+        self.facets.add(new_resource)
+        self.completer.add(new_resource)
+        self.changes.added(new_resource)
         
         # 保存
         if self.save_resources():
@@ -282,9 +542,9 @@ class ResourceManager(commands.Cog):
             embed.add_field(name="URL", value=url, inline=True)
             embed.add_field(name="説明", value=description, inline=False)
             
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
         else:
-            await ctx.send("❌ リソースの追加に失敗しました。")
+            await self.outbound.send(ctx, "❌ リソースの追加に失敗しました。")
     
     @resource_group.command(name="search")
     async def search_resources(self, ctx, *, query):
@@ -293,46 +553,33 @@ class ResourceManager(commands.Cog):
         例: !resource search 機械学習 入門
         """
         if not self.resources:
-            await ctx.send("登録されているリソースはありません。")
+            await self.outbound.send(ctx, "登録されているリソースはありません。")
             return
         
-        query = query.lower()
-        results = []
-        
-        # 全カテゴリから検索
-        for category, resources in self.resources.items():
-            for resource in resources:
-                # タイトル、説明、タグを検索
-                if (query in resource["title"].lower() or 
-                    query in resource["description"].lower() or 
-                    any(query in tag.lower() for tag in resource.get("tags", []))):
-                    results.append((resource, category))
+        # 全カテゴリのタイトル、説明、タグから検索
+        results = [(resource, resource.category) for resource in self.search(query)]
         
         if not results:
-            await ctx.send(f"「{query}」に一致するリソースは見つかりませんでした。")
+            await self.outbound.send(ctx, f"「{query}」に一致するリソースは見つかりませんでした。")
             return
         
-        # 検索結果を表示
-        embed = discord.Embed(
-            title=f"🔍 「{query}」の検索結果",
-            description=f"{len(results)}件のリソースが見つかりました",
-            color=0x4a6baf
-        )
-        
-        # 最大10件表示
-        for resource, category in results[:10]:
-            embed.add_field(
-                name=f"[{category}] {resource['title']}",
-                value=f"{resource['description'][:100]}\n[リンク]({resource['url']})",
-                inline=False
+        # 検索結果をページに分けて表示（ページ送りでは検索し直さない）
+        def render(page, index, source):
+            embed = discord.Embed(
+                title=f"🔍 「{query}」の検索結果",
+                description=f"{len(results)}件のリソースが見つかりました",
+                color=0x4a6baf
             )
+            for resource, category in page:
+                embed.add_field(
+                    name=f"[{category}] {resource.title}{self.link_marker(resource)}",
+                    value=f"{resource.description[:100]}\n[リンク]({resource.url})",
+                    inline=False
+                )
+            embed.set_footer(text=f"{source.describe(index)} - S.U.M.E.R.A.G.I. リソース検索 - {datetime.now().strftime('%Y-%m-%d')}")
+            return embed
         
-        if len(results) > 10:
-            embed.set_footer(text=f"検索結果が多すぎるため、最初の10件のみ表示しています。検索キーワードを絞り込んでください。")
-        else:
-            embed.set_footer(text=f"S.U.M.E.R.A.G.I. リソース検索 - {datetime.now().strftime('%Y-%m-%d')}")
-        
-        await ctx.send(embed=embed)
+        await send_paginated(ctx, ListPages(results, PAGE_SIZE), render)
     
     @resource_group.command(name="delete")
     @commands.has_permissions(administrator=True)
@@ -343,13 +590,16 @@ class ResourceManager(commands.Cog):
         """
         result = self.get_resource_by_id(resource_id)
         if not result:
-            await ctx.send(f"ID: {resource_id} のリソースが見つかりません。")
+            await self.outbound.send(ctx, f"ID: {resource_id} のリソースが見つかりません。")
             return
         
         resource, category = result
         
         # リソースの削除
         self.resources[category].remove(resource)
+        self.facets.remove(resource.id)
+        self.completer.remove(resource.id)
+        self.changes.removed(resource)
         
         # カテゴリが空になった場合は削除
         if not self.resources[category]:
@@ -359,12 +609,12 @@ class ResourceManager(commands.Cog):
         if self.save_resources():
             embed = discord.Embed(
                 title="🗑️ リソース削除完了",
-                description=f"リソース「{resource['title']}」を削除しました",
+                description=f"リソース「{resource.title}」を削除しました",
                 color=0x4a6baf
             )
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
         else:
-            await ctx.send("❌ リソースの削除に失敗しました。")
+            await self.outbound.send(ctx, "❌ リソースの削除に失敗しました。")
     
     @resource_group.command(name="update")
     @commands.has_permissions(administrator=True)
@@ -379,12 +629,12 @@ class ResourceManager(commands.Cog):
         valid_fields = ["title", "url", "description", "difficulty", "category"]
         
         if field not in valid_fields:
-            await ctx.send(f"無効なフィールドです。有効なフィールド: {', '.join(valid_fields)}")
+            await self.outbound.send(ctx, f"無効なフィールドです。有効なフィールド: {', '.join(valid_fields)}")
             return
         
         result = self.get_resource_by_id(resource_id)
         if not result:
-            await ctx.send(f"ID: {resource_id} のリソースが見つかりません。")
+            await self.outbound.send(ctx, f"ID: {resource_id} のリソースが見つかりません。")
             return
         
         resource, category = result
@@ -399,6 +649,7 @@ class ResourceManager(commands.Cog):
                 self.resources[new_value] = []
             
             # 新しいカテゴリに追加
+            resource.category = sys.intern(new_value)
             self.resources[new_value].append(resource)
             
             # カテゴリが空になった場合は削除
@@ -409,26 +660,170 @@ class ResourceManager(commands.Cog):
         else:
             # その他のフィールドの更新
             old_value = resource.get(field, "未設定")
-            resource[field] = new_value
-            resource["updated_by"] = str(ctx.author.id)
-            resource["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+            resource.set_field(field, new_value)
+            resource.set_field("updated_by", str(ctx.author.id))
+            resource.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        
+        self.facets.update(resource)
+        self.completer.update(resource)
+        self.changes.updated(resource)
         
         # 保存
         if self.save_resources():
             embed = discord.Embed(
                 title="📝 リソース更新完了",
-                description=f"リソース「{resource['title']}」の{field}を更新しました",
+                description=f"リソース「{resource.title}」の{field}を更新しました",
                 color=0x4a6baf
             )
             
             embed.add_field(name="変更前", value=old_value, inline=True)
             embed.add_field(name="変更後", value=new_value, inline=True)
             
-            await ctx.send(embed=embed)
+            await self.outbound.send(ctx, embed=embed)
         else:
-            await ctx.send("❌ リソースの更新に失敗しました。")
+            await self.outbound.send(ctx, "❌ リソースの更新に失敗しました。")
+
+    @resource_group.command(name="linkcheck")
+    @commands.has_permissions(administrator=True)
+    async def link_check(self, ctx):
+        """全リソースのリンク切れを今すぐ確認するコマンド"""
+        if self.link_check_running:
+            await self.outbound.send(ctx, "リンク切れの確認を実行中です。完了までお待ちください。")
+            return
+        
+        total = sum(len(items) for items in self.resources.values())
+        await self.outbound.send(ctx, f"🔗 {total}件のリソースのリンクを確認しています...")
+        try:
+            results = await self.check_links()
+        except Exception as e:
+            logger.error(f"リンク切れの確認に失敗しました: {e}")
+            await self.outbound.send(ctx, "❌ リンク切れの確認に失敗しました。")
+            return
+        if results is None:
+            await self.outbound.send(ctx, "リンク切れの確認を実行中です。完了までお待ちください。")
+            return
+        
+        broken = len(self.broken_links())
+        await self.outbound.send(ctx, f"✅ リンクの確認が完了しました（リンク切れ {broken}件）。"
+                                      f"`{ctx.clean_prefix}resource linkreport` で一覧を確認できます。")
+    
+    @resource_group.command(name="linkreport")
+    @commands.has_permissions(administrator=True)
+    async def link_report(self, ctx):
+        """リンク切れのリソース一覧を表示するコマンド"""
+        if not self.link_health:
+            await self.outbound.send(ctx, f"リンクはまだ確認されていません。`{ctx.clean_prefix}resource linkcheck` で確認できます。")
+            return
+        
+        broken = self.broken_links()
+        checked = [health.checked for health in self.link_health.values() if health.checked]
+        last_checked = max(checked).strftime("%Y-%m-%d %H:%M") if checked else "不明"
+        embed = discord.Embed(
+            title="🔗 リンク切れレポート",
+            description=f"確認済み {len(self.link_health)}件中、リンク切れ {len(broken)}件（最終確認: {last_checked}）",
+            color=0x4a6baf
+        )
+        
+        for resource, health in broken[:LINK_REPORT_LIMIT]:
+            reason = f"HTTP {health.status}" if health.status else (health.error or "不明なエラー")
+            embed.add_field(
+                name=f"ID: {resource.id} [{resource.category}] {resource.title}",
+                value=f"{resource.url}\n{reason}（{health.failures or 1}回連続）",
+                inline=False
+            )
+        
+        if len(broken) > LINK_REPORT_LIMIT:
+            embed.set_footer(text=f"最初の{LINK_REPORT_LIMIT}件のみ表示しています。")
+        await self.outbound.send(ctx, embed=embed)
+    
+    # スラッシュコマンド（プレフィックスコマンドと同じ処理を呼び出す）
+    resource_slash = app_commands.Group(name="resource", description="AI学習リソースの一覧・検索")
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """データの読み込みが完了するまではスラッシュコマンドを受け付けず、完了後は最新のデータを反映"""
+        self.readiness.check(self.qualified_name)
+        self.reload_if_changed()
+        return True
+    
+    @resource_slash.command(name="list", description="リソースの一覧を表示します（条件を組み合わせて絞り込めます）")
+    @app_commands.describe(category="カテゴリ", tag="タグ", difficulty="難易度")
+    async def list_slash(self, interaction: discord.Interaction, category: Optional[str] = None,
+                         tag: Optional[str] = None, difficulty: Optional[str] = None):
+        """/resource list"""
+        if tag or difficulty:
+            ctx = await commands.Context.from_interaction(interaction)
+            query = {facet: [value] for facet, value in ((CATEGORY, category), (TAG, tag), (DIFFICULTY, difficulty)) if value}
+            await self.send_faceted(ctx, query)
+        else:
+            await invoke(interaction, self.list_resources, category=category)
+    
+    @resource_slash.command(name="search", description="タイトル・説明・タグからリソースを検索します")
+    @app_commands.describe(query="検索語（タイトルを補完します）")
+    async def search_slash(self, interaction: discord.Interaction, query: str):
+        """/resource search"""
+        await invoke(interaction, self.search_resources, query=query)
+    
+    @resource_slash.command(name="add", description="新しいリソースを追加します（管理者のみ）")
+    @app_commands.describe(category="カテゴリ", title="タイトル", url="URL", description="説明")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def add_slash(self, interaction: discord.Interaction, category: str, title: str, url: str, description: str):
+        """/resource add"""
+        await invoke(interaction, self.add_resource, category, title, url, description=description)
+    
+    @resource_slash.command(name="delete", description="リソースを削除します（管理者のみ）")
+    @app_commands.describe(resource_id="リソースID")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def delete_slash(self, interaction: discord.Interaction, resource_id: int):
+        """/resource delete"""
+        await invoke(interaction, self.delete_resource, resource_id)
+    
+    @resource_slash.command(name="update", description="リソース情報を更新します（管理者のみ）")
+    @app_commands.describe(resource_id="リソースID", field="更新するフィールド", new_value="新しい値")
+    @app_commands.choices(field=[
+        app_commands.Choice(name=name, value=name) for name in ("title", "url", "description", "difficulty", "category")
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def update_slash(self, interaction: discord.Interaction, resource_id: int, field: str, new_value: str):
+        """/resource update"""
+        await invoke(interaction, self.update_resource, resource_id, field, new_value=new_value)
+    
+    @resource_slash.command(name="linkcheck", description="全リソースのリンク切れを今すぐ確認します（管理者のみ）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def link_check_slash(self, interaction: discord.Interaction):
+        """/resource linkcheck"""
+        await invoke(interaction, self.link_check)
+    
+    @resource_slash.command(name="linkreport", description="リンク切れのリソース一覧を表示します（管理者のみ）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def link_report_slash(self, interaction: discord.Interaction):
+        """/resource linkreport"""
+        await invoke(interaction, self.link_report)
+    
+    def _choices(self, field: str, current: str) -> List[app_commands.Choice[str]]:
+        """補完候補（Discordの制限に合わせて100文字まで）"""
+        if not self.readiness.is_ready(self.qualified_name):
+            return []
+        return [app_commands.Choice(name=label[:100], value=label[:100])
+                for label in self.completer.complete(field, current)]
+    
+    @list_slash.autocomplete("category")
+    @add_slash.autocomplete("category")
+    async def category_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._choices(CATEGORY, current)
+    
+    @list_slash.autocomplete("tag")
+    async def tag_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._choices(TAG, current)
+    
+    @list_slash.autocomplete("difficulty")
+    async def difficulty_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._choices(DIFFICULTY, current)
+    
+    @search_slash.autocomplete("query")
+    async def title_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._choices(TITLE, current)
 
 # Cogのセットアップ関数
-def setup(bot):
+async def setup(bot):
     """Cogをbotに追加する関数"""
-    bot.add_cog(ResourceManager(bot))
+    await bot.add_cog(ResourceManager(bot))
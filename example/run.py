@@ -9,6 +9,7 @@ AIコミュニティのためのDiscord Bot
 """
 
 import os
+import time
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -19,7 +20,7 @@ from discord.ext import commands
 # ロギングの設定
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler("bot.log", encoding="utf-8"),
         logging.StreamHandler()
@@ -29,33 +30,52 @@ logger = logging.getLogger("sumeragi-bot")
 
 # 環境変数の読み込み
 load_dotenv()
+
+# 自作モジュールは読み込み時に環境変数を参照するため、環境変数の読み込み後にインポートする
+from dispatcher import Priority, get_dispatcher
+from guild_settings import command_prefix, get_guild_settings, presence_activity
+from readiness import NotReady, get_readiness
+from slash_commands import configure_intents, on_app_command_error, sync_commands
+
 TOKEN = os.getenv('DISCORD_TOKEN')
-PREFIX = os.getenv('COMMAND_PREFIX', '!')
 
 # BOTのインテント設定
-intents = discord.Intents.default()
-intents.message_content = True
+# スラッシュコマンド専用モード（SLASH_ONLY=true）ではメッセージ本文を受け取らない
+intents = configure_intents(discord.Intents.default())
 intents.members = True
 
 # Botのインスタンス生成
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
+# コマンドの接頭辞はサーバーごとの設定から返す（既定値は COMMAND_PREFIX）
+bot = commands.Bot(command_prefix=command_prefix, intents=intents, help_command=None)
+
+# スラッシュコマンドのエラー処理
+bot.tree.error(on_app_command_error)
+
+# 送信ディスパッチャ（各Cogも同じインスタンスを使用する）
+outbound = get_dispatcher(bot)
+
+# Cogの準備状況（データの読み込みは接続と並行して行われる）
+readiness = get_readiness(bot)
+
+# サーバーごとの設定（各Cogも同じインスタンスを使用する）
+settings = get_guild_settings(bot)
 
 # Cogのリスト
 cogs = [
     "event_manager",
-    "resource_manager"
+    "resource_manager",
+    "diagnostics",
+    "guild_settings",
+    "web_api"
 ]
 
 @bot.event
 async def on_ready():
     """Botが起動した際に実行される処理"""
     logger.info(f"{bot.user.name} を起動しました（ID: {bot.user.id}）")
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name="AIの世界 | !help"
-        )
-    )
+    await outbound.call("presence", Priority.PRESENCE, lambda: bot.change_presence(
+        activity=presence_activity(bot)
+    ))
     
     # サーバー情報を表示
     guild_count = len(bot.guilds)
@@ -66,29 +86,46 @@ async def on_ready():
     commands_list = [cmd.name for cmd in bot.commands]
     logger.info(f"登録されているコマンド: {', '.join(commands_list)}")
 
+# コマンドエラー時の処理
+@bot.event
+async def on_command_error(ctx, error):
+    """コマンドエラー時の処理"""
+    if isinstance(error, NotReady):
+        # データの読み込みが終わるまでは準備中であることだけを返す
+        await outbound.send(ctx, f"⏳ {error}")
+        return
+    await commands.Bot.on_command_error(bot, ctx, error)
+
 # Cogを読み込む
-def load_cogs():
-    """Cogを読み込む"""
+async def load_cogs():
+    """Cogを読み込む
+    
+    各Cogのデータ読み込みはバックグラウンドで開始されるため、ここでは待ちません
+    """
     for cog in cogs:
+        started = time.perf_counter()
         try:
-            bot.load_extension(cog)
-            logger.info(f"Cog '{cog}' を読み込みました")
+            await bot.load_extension(cog)
+            logger.info(f"Cog '{cog}' を読み込みました（{time.perf_counter() - started:.2f}秒）")
         except Exception as e:
             logger.error(f"Cog '{cog}' の読み込みに失敗しました: {e}")
 
+@bot.event
+async def setup_hook():
+    """Gatewayへの接続前に呼ばれる処理"""
+    await load_cogs()
+    await sync_commands(bot)
+
 # メイン処理
 def main():
     """メイン処理"""
-    # Cogを読み込む
-    load_cogs()
-    
     # データディレクトリが存在しない場合は作成
     data_dir = Path("data")
     if not data_dir.exists():
         data_dir.mkdir(parents=True)
         logger.info("データディレクトリを作成しました")
     
-    # Botを起動
+    # Botを起動（Cogは setup_hook で読み込む）
     try:
         logger.info("Botを起動しています...")
         bot.run(TOKEN)
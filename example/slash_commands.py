@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot スラッシュコマンド共通モジュール
+
+スラッシュコマンド（アプリケーションコマンド）とスラッシュコマンド専用モードのための共通処理
+スラッシュコマンドは同じ名前のプレフィックスコマンドの処理を呼び出すため、応答の内容は同じです
+"""
+
+import os
+import logging
+
+import discord
+from discord.ext import commands
+
+from readiness import NotReady
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-slash")
+
+# スラッシュコマンド専用モード
+# メッセージ本文の取得（message_content インテント）とサーバーのメッセージイベントの受信を止め、
+# Gatewayの通信量とCPU使用量をチャットの量ではなくコマンドの利用量に比例させます
+SLASH_ONLY = os.getenv('SLASH_ONLY', 'false').lower() in ('1', 'true', 'yes')
+
+# 起動時にスラッシュコマンドをDiscordへ同期するか（同期は頻繁に行うとレート制限を受けます）
+SYNC_COMMANDS = os.getenv('SYNC_COMMANDS', 'true').lower() in ('1', 'true', 'yes')
+
+
+def configure_intents(intents: discord.Intents) -> discord.Intents:
+    """モードに応じてインテントを設定"""
+    if SLASH_ONLY:
+        intents.message_content = False
+        intents.guild_messages = False
+        intents.guild_typing = False
+    else:
+        intents.message_content = True
+    return intents
+
+
+def command_hint(prefix: str) -> str:
+    """案内文に表示するコマンドの接頭辞"""
+    return "/" if SLASH_ONLY else prefix
+
+
+async def invoke(interaction: discord.Interaction, command: commands.Command, *args, **kwargs):
+    """スラッシュコマンドから同じ処理のプレフィックスコマンドを呼び出す
+
+    権限などのチェックはスラッシュコマンド側で行うため、ここでは処理だけを呼び出します
+    """
+    ctx = await commands.Context.from_interaction(interaction)
+    await command(ctx, *args, **kwargs)
+
+
+async def sync_commands(bot: commands.Bot):
+    """スラッシュコマンドをDiscordへ同期"""
+    if not SYNC_COMMANDS:
+        return
+    try:
+        synced = await bot.tree.sync()
+        logger.info(f"{len(synced)}個のスラッシュコマンドを同期しました")
+    except Exception as e:
+        logger.error(f"スラッシュコマンドの同期に失敗しました: {e}")
+
+
+async def on_app_command_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+    """スラッシュコマンドのエラー時の処理（本人にだけ表示）"""
+    if isinstance(error, NotReady):
+        message = f"⏳ {error}"
+    elif isinstance(error, discord.app_commands.MissingPermissions):
+        message = "このコマンドを実行する権限がありません。"
+    elif isinstance(error, discord.app_commands.NoPrivateMessage):
+        message = "このコマンドはサーバー内でのみ実行できます。"
+    else:
+        logger.error(f"スラッシュコマンドの実行中にエラーが発生しました: {error}")
+        message = "コマンド実行中にエラーが発生しました。しばらくしてからもう一度お試しください。"
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
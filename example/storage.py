@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot データ保存モジュール
+
+data/ 以下のYAMLファイルを安全に保存するためのモジュール
+- 一時ファイルへの書き込み・fsync・リネームによるアトミックな保存
+- ロックファイルによる複数プロセス間の排他（アドバイザリロック）
+- ファイルのバージョン確認による同時書き込みの検出とマージ
+"""
+
+import os
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-storage")
+
+# ファイルのバージョン（inode、更新時刻、サイズ）。リネームで保存するため書き込みごとに変わります
+Version = Optional[Tuple[int, int, int]]
+
+
+def _stat_version(st: os.stat_result) -> Version:
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def file_version(path: Path) -> Version:
+    """ファイルの現在のバージョン（存在しない場合はNone）"""
+    try:
+        return _stat_version(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write(path: Path, data: bytes):
+    """一時ファイルに書き込んでからリネームし、途中で停止しても元のファイルを壊さない"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # リネーム自体を永続化するためディレクトリもfsyncする（POSIXのみ）
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class FileLock:
+    """ロックファイルを用いたプロセス間のアドバイザリロック
+
+    `with FileLock(path):` で排他ロックを取得します。
+    try_acquire() はロックを取得できなければ待たずにFalseを返します
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(f"{path}.lock")
+        self._fd: Optional[int] = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+    def _lock(self, fd: int, blocking: bool) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            elif msvcrt is not None:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if blocking:
+                raise
+            return False
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """ロックを取得"""
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            locked = self._lock(fd, blocking)
+        except BaseException:
+            os.close(fd)
+            raise
+        if not locked:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def try_acquire(self) -> bool:
+        """待たずにロックの取得を試みる"""
+        return self.acquire(blocking=False)
+
+    def release(self):
+        """ロックを解放"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class YamlStore:
+    """バージョン確認付きでYAMLファイルを読み書きするストア
+
+    読み込んだ時点のバージョンを保持し、保存時に他のプロセスが書き込んでいた場合は
+    最新の内容を読み込んで build に渡します（楽観的並行制御）
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = FileLock(path)
+        self.version: Version = None
+
+    def _read(self) -> Tuple[Any, Version]:
+        try:
+            with open(self.path, "rb") as f:
+                version = _stat_version(os.fstat(f.fileno()))
+                return yaml.safe_load(f.read().decode("utf-8")), version
+        except FileNotFoundError:
+            return None, None
+
+    def changed(self) -> bool:
+        """読み込み後に他のプロセスがファイルを書き換えたかを判定"""
+        return file_version(self.path) != self.version
+
+    def load(self) -> Any:
+        """ファイルを読み込む（存在しない場合はNone）"""
+        data, self.version = self._read()
+        return data
+
+    def save(self, build: Callable[[Any], Any]) -> Any:
+        """ロックを取得してアトミックに保存
+
+        build は他のプロセスによる変更があった場合はその最新の内容を、
+        なければNoneを受け取り、保存するデータを返します
+        """
+        with self.lock:
+            theirs = None
+            if self.changed():
+                theirs, _ = self._read()
+                logger.warning(f"{self.path} が他のプロセスにより更新されていたため変更をマージします")
+            data = build(theirs)
+            text = yaml.dump(data, allow_unicode=True, default_flow_style=False)
+            atomic_write(self.path, text.encode("utf-8"))
+            self.version = file_version(self.path)
+        return data
+
+
+class ChangeLog:
+    """前回の保存以降にこのプロセスで行ったレコードの変更
+
+    同時書き込みを検出した際、他のプロセスの内容にこの変更だけを適用してマージします
+    revision は変更のたびに増える通し番号で、clear() でも元に戻りません（メモリ上のデータのバージョンに使用）
+    """
+
+    def __init__(self):
+        self.upserts: Dict[Any, Any] = {}
+        self.deleted: Set[Any] = set()
+        self.created: Set[Any] = set()
+        self.revision = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.upserts or self.deleted)
+
+    def added(self, record):
+        self.revision += 1
+        self.created.add(record.id)
+        self.upserts[record.id] = record
+        self.deleted.discard(record.id)
+
+    def updated(self, record):
+        self.revision += 1
+        self.upserts[record.id] = record
+
+    def removed(self, record):
+        self.revision += 1
+        self.upserts.pop(record.id, None)
+        if record.id in self.created:
+            self.created.discard(record.id)
+        else:
+            self.deleted.add(record.id)
+
+    def clear(self):
+        self.upserts.clear()
+        self.deleted.clear()
+        self.created.clear()
+
+    def apply(self, theirs: Iterable[Any]) -> List[Any]:
+        """他のプロセスが保存したレコードにこのプロセスの変更を適用する
+
+        両方で同じIDのレコードが新規作成されていた場合は、こちらのレコードに新しいIDを振ります
+        """
+        records = [record for record in theirs if record.id not in self.deleted]
+        index = {record.id: i for i, record in enumerate(records)}
+        ids = [record.id for record in records] + list(self.upserts)
+        max_id = max((record_id for record_id in ids if isinstance(record_id, int)), default=0)
+        for record_id, record in self.upserts.items():
+            if record_id in index and record_id in self.created:
+                max_id += 1
+                logger.warning(f"ID {record_id} が他のプロセスと重複したため {max_id} に変更します")
+                record.id = max_id
+                records.append(record)
+            elif record_id in index:
+                records[index[record_id]] = record
+            else:
+                records.append(record)
+        return records
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+送信ディスパッチャ（dispatcher.py）のテスト
+
+Discordには接続せず、送信処理をダミーに差し替えて確認します
+"""
+
+import asyncio
+import time
+import unittest
+
+from dispatcher import MAX_RETRIES, OutboundDispatcher, Priority
+
+
+class Channel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+
+class RateLimited(Exception):
+    status = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+
+class DispatcherTest(unittest.IsolatedAsyncioTestCase):
+    def make(self, sender, **kwargs) -> OutboundDispatcher:
+        dispatcher = OutboundDispatcher(sender=sender, **kwargs)
+        self.addAsyncCleanup(dispatcher.close)
+        return dispatcher
+
+    async def test_saturated_channel_does_not_delay_others(self):
+        sent = []
+
+        async def sender(target, content=None, **kwargs):
+            sent.append((target.id, time.monotonic()))
+            return content
+
+        dispatcher = self.make(sender, bucket_capacity=5, bucket_period=0.5)
+        busy, quiet = Channel(1), Channel(2)
+        for i in range(100):
+            await dispatcher.send(busy, f"busy {i}", wait=False)
+        started = time.monotonic()
+        self.assertEqual(await dispatcher.send(quiet, "quiet"), "quiet")
+        elapsed = time.monotonic() - started
+
+        # 溜まったチャンネルのトークンが尽きても、別のチャンネルはすぐに送信される
+        self.assertLess(elapsed, 0.1)
+        self.assertLessEqual(sum(1 for channel_id, _ in sent if channel_id == busy.id), 6)
+
+    async def test_rate_limited_channel_does_not_block_others(self):
+        calls = {"blocked": 0}
+
+        async def sender(target, content=None, **kwargs):
+            if target.id == 1:
+                calls["blocked"] += 1
+                raise RateLimited(10.0)
+            return content
+
+        dispatcher = self.make(sender)
+        blocked = [await dispatcher.send(Channel(1), f"blocked {i}", wait=False) for i in range(80)]
+        self.assertEqual(blocked, [None] * 80)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(dispatcher.send(Channel(2 + i), f"other {i}") for i in range(20))), timeout=1.0
+        )
+        self.assertEqual(results, [f"other {i}" for i in range(20)])
+        # 制限中のチャンネルは再開時刻まで送信しない
+        self.assertEqual(calls["blocked"], 1)
+
+    async def test_priority_order(self):
+        order = []
+
+        async def sender(target, content=None, **kwargs):
+            order.append(content)
+            return content
+
+        dispatcher = self.make(sender, workers=1)
+        channel = Channel(1)
+        # 1件目の送信中に残りを積む
+        first = asyncio.ensure_future(dispatcher.send(channel, "first"))
+        await asyncio.sleep(0)
+        await dispatcher.send(channel, "presence", priority=Priority.PRESENCE, wait=False)
+        await dispatcher.send(channel, "welcome", priority=Priority.WELCOME, wait=False)
+        await dispatcher.send(channel, "reply", wait=False)
+        await first
+        await asyncio.wait_for(self._until(lambda: len(order) == 4), timeout=1.0)
+        self.assertEqual(order, ["first", "reply", "welcome", "presence"])
+
+    async def test_same_channel_keeps_order(self):
+        order = []
+
+        async def sender(target, content=None, **kwargs):
+            await asyncio.sleep(0)
+            order.append(content)
+
+        dispatcher = self.make(sender, bucket_capacity=100)
+        await asyncio.gather(*(dispatcher.send(Channel(1), i) for i in range(20)))
+        self.assertEqual(order, list(range(20)))
+
+    async def test_retries_keep_queue_slot_and_are_capped(self):
+        calls = {"n": 0}
+
+        async def sender(target, content=None, **kwargs):
+            calls["n"] += 1
+            raise RateLimited(0.001)
+
+        dispatcher = self.make(sender, max_queue=2, bucket_period=0.05)
+        with self.assertRaises(RateLimited):
+            await dispatcher.send(Channel(1), "never")
+        self.assertEqual(calls["n"], MAX_RETRIES + 1)
+        self.assertEqual(dispatcher._space[Priority.INTERACTIVE]._value, 2)
+        stats = dispatcher.stats()["interactive"]
+        self.assertEqual((stats["queued"], stats["failed"], stats["rate_limited"]), (0, 1, MAX_RETRIES + 1))
+
+    @staticmethod
+    async def _until(condition):
+        while not condition():
+            await asyncio.sleep(0.001)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ファセット検索（facets.py）のテスト
+"""
+
+import random
+import unittest
+
+from facets import ARRAY_MAX, CATEGORY, CHUNK_SIZE, DIFFICULTY, TAG, Bitmap, FacetIndex
+from records import Resource
+
+
+def resource(resource_id: int, category: str = "ai", difficulty: str = "初級", tags=()) -> Resource:
+    return Resource.from_dict({
+        "id": resource_id,
+        "title": f"resource {resource_id}",
+        "url": f"https://example.com/{resource_id}",
+        "difficulty": difficulty,
+        "tags": list(tags),
+    }, category=category)
+
+
+def containers(bitmap: Bitmap):
+    """チャンクごとのコンテナの種類（"array" / "bitset"）"""
+    return {high: "bitset" if isinstance(container, int) else "array"
+            for high, container in bitmap._chunks.items()}
+
+
+class BitmapTest(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+
+    def sample(self, count: int, chunks: int = 3):
+        return set(self.random.sample(range(chunks * CHUNK_SIZE), count))
+
+    def assertBitmap(self, bitmap: Bitmap, expected):
+        self.assertEqual(list(bitmap), sorted(expected))
+        self.assertEqual(len(bitmap), len(expected))
+        self.assertEqual(bool(bitmap), bool(expected))
+        # 件数に応じたコンテナで保持されている（空のチャンクは残らない）
+        for high, kind in containers(bitmap).items():
+            count = sum(1 for row in expected if row // CHUNK_SIZE == high)
+            self.assertEqual(kind, "array" if count <= ARRAY_MAX else "bitset", (high, count))
+
+    def test_from_sorted_containers(self):
+        rows = list(range(0, 2 * (ARRAY_MAX + 1), 2)) + [CHUNK_SIZE + 5, 3 * CHUNK_SIZE]
+        bitmap = Bitmap.from_sorted(rows)
+        self.assertEqual(containers(bitmap), {0: "bitset", 1: "array", 3: "array"})
+        self.assertBitmap(bitmap, rows)
+        self.assertIn(2, bitmap)
+        self.assertNotIn(3, bitmap)
+        self.assertNotIn(2 * CHUNK_SIZE, bitmap)
+
+    def test_add_and_discard_cross_threshold(self):
+        bitmap = Bitmap()
+        for row in range(ARRAY_MAX):
+            bitmap.add(row * 3)
+        self.assertEqual(containers(bitmap), {0: "array"})
+        bitmap.add(ARRAY_MAX * 3)
+        self.assertEqual(containers(bitmap), {0: "bitset"})
+        # 重複した追加は件数を変えない
+        bitmap.add(0)
+        self.assertEqual(len(bitmap), ARRAY_MAX + 1)
+
+        bitmap.discard(0)
+        self.assertEqual(containers(bitmap), {0: "array"})
+        self.assertBitmap(bitmap, [row * 3 for row in range(1, ARRAY_MAX + 1)])
+        for row in range(1, ARRAY_MAX + 1):
+            bitmap.discard(row * 3)
+        bitmap.discard(1)
+        self.assertBitmap(bitmap, [])
+
+    def test_operators_match_sets(self):
+        sizes = (0, 10, ARRAY_MAX - 1, ARRAY_MAX, ARRAY_MAX + 1, 3 * ARRAY_MAX)
+        for size_a in sizes:
+            for size_b in sizes:
+                a = self.sample(size_a, chunks=1) | self.sample(size_a // 2)
+                b = self.sample(size_b, chunks=1) | self.sample(size_b // 2)
+                bitmap_a, bitmap_b = Bitmap.from_sorted(sorted(a)), Bitmap.from_sorted(sorted(b))
+                with self.subTest(a=size_a, b=size_b):
+                    self.assertBitmap(bitmap_a & bitmap_b, a & b)
+                    self.assertBitmap(bitmap_a | bitmap_b, a | b)
+                    self.assertBitmap(bitmap_a - bitmap_b, a - b)
+                    self.assertBitmap(bitmap_b - bitmap_a, b - a)
+                    self.assertEqual(bitmap_a.and_count(bitmap_b), len(a & b))
+                    # 演算で元のビットマップは変わらない
+                    self.assertBitmap(bitmap_a, a)
+                    self.assertBitmap(bitmap_b, b)
+
+    def test_results_do_not_share_containers(self):
+        a = Bitmap.from_sorted([1, 2, 3])
+        b = Bitmap.from_sorted([CHUNK_SIZE])
+        for result in (a | b, a - b, a.copy()):
+            result.add(4)
+            self.assertNotIn(4, a)
+
+    def test_iter_from(self):
+        rows = sorted(self.sample(ARRAY_MAX * 2, chunks=1) | self.sample(100))
+        bitmap = Bitmap.from_sorted(rows)
+        for start in (0, 1, rows[10], rows[10] + 1, CHUNK_SIZE, 2 * CHUNK_SIZE + 7, 4 * CHUNK_SIZE):
+            self.assertEqual(list(bitmap.iter_from(start)), [row for row in rows if row >= start])
+
+
+class FacetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FacetIndex()
+        self.index.rebuild({
+            "ai": [resource(1, tags=["Python", "pytorch"]), resource(3, difficulty="中級", tags=["python"])],
+            "web": [resource(2, category="web", tags=["JavaScript"])],
+        })
+
+    def ids(self, query):
+        return [item.id for item in self.index.resources(self.index.filter(query))]
+
+    def test_filter(self):
+        self.assertEqual(self.ids({}), [1, 2, 3])
+        self.assertEqual(self.ids({TAG: ["python"]}), [1, 3])
+        self.assertEqual(self.ids({TAG: ["python", "javascript"]}), [1, 2, 3])
+        self.assertEqual(self.ids({TAG: ["python"], DIFFICULTY: ["中級"]}), [3])
+        self.assertEqual(self.ids({TAG: ["rust"]}), [])
+
+    def test_keys_are_normalized_like_search(self):
+        self.index.add(resource(4, tags=["データ分析", "scikit-learn"]))
+        self.assertEqual(self.ids({TAG: ["ＰＹＴＨＯＮ"]}), [1, 3])
+        self.assertEqual(self.ids({TAG: ["ﾃﾞｰﾀｰ分析"]}), [4])
+        self.assertEqual(self.ids({TAG: ["でーた分析"]}), [4])
+        self.assertEqual(self.ids({TAG: ["scikit learn"]}), [4])
+        # 表示名は最初に登録された値
+        self.assertEqual(self.index.facet_counts(self.index.filter({}))[TAG][0], ("Python", 2))
+
+    def test_punctuation_only_values(self):
+        self.index.add(resource(4, tags=["!!", "??"]))
+        self.assertEqual(self.ids({TAG: ["!!"]}), [4])
+        self.assertEqual(self.ids({TAG: ["??"]}), [4])
+
+    def test_add_replaces_existing(self):
+        self.index.add(resource(5, tags=["go"]))
+        self.assertEqual(self.ids({TAG: ["go"]}), [5])
+        self.index.add(resource(5, tags=["rust"]))
+        self.assertEqual(self.ids({TAG: ["go"]}), [])
+        self.assertEqual(self.ids({TAG: ["rust"]}), [5])
+        self.assertEqual(len(self.index), 4)
+
+    def test_update_after_in_place_change(self):
+        item = self.index.get(1)
+        item.set_field("tags", ["rust"])
+        item.set_field("difficulty", "上級")
+        self.index.update(item)
+        self.assertEqual(self.ids({TAG: ["python"]}), [3])
+        self.assertEqual(self.ids({TAG: ["pytorch"]}), [])
+        self.assertEqual(self.ids({TAG: ["rust"]}), [1])
+        self.assertEqual(self.ids({DIFFICULTY: ["初級"]}), [2])
+        self.assertEqual(self.ids({DIFFICULTY: ["上級"]}), [1])
+        counts = self.index.facet_counts(self.index.filter({}))
+        self.assertNotIn("pytorch", [label for label, _ in counts[TAG]])
+
+    def test_remove(self):
+        snapshot = self.index.filter({TAG: ["python"]})
+        self.index.remove(1)
+        self.index.remove(99)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.ids({TAG: ["python"]}), [3])
+        self.assertEqual(self.ids({TAG: ["pytorch"]}), [])
+        # 削除前に作ったビットマップからも削除済みのリソースは取り出されない
+        self.assertEqual([item.id for item in self.index.resources(snapshot)], [3])
+        counts = self.index.facet_counts(self.index.filter({}))
+        self.assertEqual(counts[CATEGORY], [("ai", 1), ("web", 1)])
+        self.assertEqual(counts[TAG], [("JavaScript", 1), ("Python", 1)])
+
+    def test_resources_paging(self):
+        for resource_id in range(10, 30):
+            self.index.add(resource(resource_id, tags=["bulk"]))
+        bitmap = self.index.filter({TAG: ["bulk"]})
+        first = self.index.resources(bitmap, limit=8)
+        second = self.index.resources(bitmap, limit=8, after=first[-1].id)
+        self.assertEqual([item.id for item in first + second], list(range(10, 26)))
+
+    def test_filter_returns_copy(self):
+        everything = self.index.filter({})
+        self.index.add(resource(7))
+        self.assertNotIn(7, everything)
+
+
+if __name__ == "__main__":
+    unittest.main()
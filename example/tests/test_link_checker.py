@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+リンク切れ確認（link_checker.py）のテスト
+
+ローカルに起動したaiohttpのサーバーに対して確認します
+"""
+
+import asyncio
+import unittest
+
+from aiohttp import web
+
+from link_checker import LinkChecker, LinkHealth
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 19 Oct 2026 00:00:00 GMT"
+
+
+class LinkCheckerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.peers = []
+        app = web.Application()
+        app.router.add_route("*", "/ok", self.ok)
+        app.router.add_route("*", "/no-head", self.no_head)
+        app.router.add_route("*", "/missing", self.missing)
+        app.router.add_route("*", "/cached", self.cached)
+        app.router.add_route("*", "/slow", self.slow)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    def record(self, request: web.Request):
+        self.requests.append((request.method, request.path))
+        self.peers.append(request.transport.get_extra_info("peername"))
+
+    async def ok(self, request):
+        self.record(request)
+        return web.Response(text="ok")
+
+    async def no_head(self, request):
+        # HEADに対応していないサーバー
+        self.record(request)
+        if request.method == "HEAD":
+            return web.Response(status=405)
+        # 本文が分割して届く場合も読み捨てて接続を使い回せるか確認する
+        response = web.StreamResponse()
+        response.content_length = 4000
+        await response.prepare(request)
+        for _ in range(4):
+            await response.write(b"x" * 1000)
+            await asyncio.sleep(0.005)
+        await response.write_eof()
+        return response
+
+    async def missing(self, request):
+        self.record(request)
+        return web.Response(status=404, text="not found")
+
+    async def cached(self, request):
+        self.record(request)
+        if request.headers.get("If-None-Match") == ETAG:
+            # 検証子を付けずに304を返すサーバー
+            return web.Response(status=304)
+        return web.Response(text="body", headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+
+    async def slow(self, request):
+        self.record(request)
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    async def test_ok(self):
+        results = await LinkChecker().check_all({1: f"{self.base}/ok"})
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[1].status, 200)
+        self.assertEqual(self.requests, [("HEAD", "/ok")])
+
+    async def test_head_falls_back_to_get(self):
+        results = await LinkChecker().check_all({1: f"{self.base}/no-head"})
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[1].status, 200)
+        self.assertEqual(self.requests, [("HEAD", "/no-head"), ("GET", "/no-head")])
+
+    async def test_get_fallback_reuses_connection(self):
+        # 本文を読み捨てているため、GETの後の同じホストへの確認は同じ接続を使い回す
+        targets = {i: f"{self.base}/no-head?n={i}" for i in range(10)}
+        results = await LinkChecker(concurrency=1, per_host=1).check_all(targets)
+        self.assertTrue(all(health.ok for health in results.values()))
+        self.assertEqual([method for method, _ in self.requests], ["HEAD", "GET"] * 10)
+        # GETの接続が次のURLの確認に使い回されている
+        for index in range(1, 19, 2):
+            self.assertEqual(self.peers[index], self.peers[index + 1])
+
+    async def test_missing(self):
+        results = await LinkChecker().check_all({1: f"{self.base}/missing"})
+        self.assertFalse(results[1].ok)
+        self.assertEqual(results[1].status, 404)
+        self.assertEqual(results[1].failures, 1)
+        self.assertEqual(self.requests, [("HEAD", "/missing"), ("GET", "/missing")])
+
+        results = await LinkChecker().check_all({1: f"{self.base}/missing"}, results)
+        self.assertEqual(results[1].failures, 2)
+
+    async def test_not_modified_keeps_validators(self):
+        checker = LinkChecker()
+        targets = {1: f"{self.base}/cached", 2: f"{self.base}/cached"}
+        first = await checker.check_all(targets)
+        self.assertEqual((first[1].etag, first[1].last_modified), (ETAG, LAST_MODIFIED))
+        # 同じURLは1回だけ確認する
+        self.assertEqual(len(self.requests), 1)
+
+        second = await checker.check_all(targets, first)
+        for health in second.values():
+            self.assertTrue(health.ok)
+            self.assertEqual(health.status, 304)
+            self.assertEqual((health.etag, health.last_modified), (ETAG, LAST_MODIFIED))
+
+    async def test_failed_previous_result_is_not_conditional(self):
+        previous = {1: LinkHealth.from_dict({"id": 1, "url": f"{self.base}/cached", "ok": False, "etag": ETAG})}
+        results = await LinkChecker().check_all({1: f"{self.base}/cached"}, previous)
+        self.assertEqual(results[1].status, 200)
+
+    async def test_timeout(self):
+        results = await LinkChecker(timeout=0.2).check_all({1: f"{self.base}/slow", 2: f"{self.base}/ok"})
+        self.assertFalse(results[1].ok)
+        self.assertIsNone(results[1].status)
+        self.assertEqual(results[1].error, "タイムアウト")
+        self.assertTrue(results[2].ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
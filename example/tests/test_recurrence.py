@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+繰り返しルール（recurrence.py）のテスト
+"""
+
+import unittest
+from datetime import date, datetime
+
+from recurrence import MONTHLY, WEEKLY, RecurrenceError, RecurrenceRule
+
+# 初回の開催日時（水曜日）
+START = datetime(2025, 1, 1, 19, 0)
+
+
+def expand(rule: RecurrenceRule, start: datetime = START, window_start: datetime = START, window_end=None, limit=50):
+    """展開結果をリストにする（終わりのないルールは limit 件まで）"""
+    occurrences = []
+    for occurrence in rule.between(start, window_start, window_end):
+        occurrences.append(occurrence)
+        if len(occurrences) >= limit:
+            break
+    return occurrences
+
+
+class ParseTest(unittest.TestCase):
+    def test_rrule_format(self):
+        rule = RecurrenceRule.parse("FREQ=WEEKLY;INTERVAL=2;UNTIL=2025-06-30")
+        self.assertEqual(rule.freq, WEEKLY)
+        self.assertEqual(rule.interval, 2)
+        self.assertEqual(rule.until, date(2025, 6, 30))
+        self.assertEqual(str(rule), "FREQ=WEEKLY;INTERVAL=2;UNTIL=2025-06-30")
+
+    def test_aliases(self):
+        rule = RecurrenceRule.parse("毎月 count=3")
+        self.assertEqual(rule.freq, MONTHLY)
+        self.assertEqual(rule.count, 3)
+
+    def test_invalid(self):
+        for text in ("FREQ=DAILY", "weekly interval=0", "weekly count=x", "weekly byday=MO", "weekly until=2025/01/01"):
+            with self.subTest(text=text):
+                with self.assertRaises(RecurrenceError):
+                    RecurrenceRule.parse(text)
+
+
+class WeeklyTest(unittest.TestCase):
+    def test_count(self):
+        rule = RecurrenceRule(WEEKLY, count=3)
+        self.assertEqual(expand(rule), [datetime(2025, 1, 1, 19), datetime(2025, 1, 8, 19), datetime(2025, 1, 15, 19)])
+        self.assertEqual(rule.last(START), datetime(2025, 1, 15, 19))
+
+    def test_count_from_later_window(self):
+        # 期間の開始が途中でも COUNT は初回から数える
+        rule = RecurrenceRule(WEEKLY, count=3)
+        self.assertEqual(expand(rule, window_start=datetime(2025, 1, 9)), [datetime(2025, 1, 15, 19)])
+        self.assertEqual(expand(rule, window_start=datetime(2025, 1, 16)), [])
+
+    def test_interval(self):
+        rule = RecurrenceRule(WEEKLY, interval=2)
+        self.assertEqual(
+            expand(rule, window_start=datetime(2025, 1, 20), limit=3),
+            [datetime(2025, 1, 29, 19), datetime(2025, 2, 12, 19), datetime(2025, 2, 26, 19)]
+        )
+
+    def test_until_is_inclusive(self):
+        rule = RecurrenceRule(WEEKLY, until=date(2025, 1, 15))
+        self.assertEqual(expand(rule), [datetime(2025, 1, 1, 19), datetime(2025, 1, 8, 19), datetime(2025, 1, 15, 19)])
+        self.assertEqual(rule.last(START), datetime(2025, 1, 15, 19))
+
+    def test_until_between_occurrences(self):
+        rule = RecurrenceRule(WEEKLY, interval=2, until=date(2025, 2, 20))
+        self.assertEqual(rule.last(START), datetime(2025, 2, 12, 19))
+        self.assertEqual(expand(rule)[-1], rule.last(START))
+
+    def test_count_and_until(self):
+        # 先に来た方で終わる
+        self.assertEqual(RecurrenceRule(WEEKLY, count=10, until=date(2025, 1, 10)).last(START), datetime(2025, 1, 8, 19))
+        self.assertEqual(RecurrenceRule(WEEKLY, count=2, until=date(2025, 12, 31)).last(START), datetime(2025, 1, 8, 19))
+
+    def test_exdates_are_skipped_but_counted(self):
+        rule = RecurrenceRule(WEEKLY, count=3, exdates=[date(2025, 1, 8)])
+        self.assertEqual(expand(rule), [datetime(2025, 1, 1, 19), datetime(2025, 1, 15, 19)])
+        self.assertEqual(rule.last(START), datetime(2025, 1, 15, 19))
+
+    def test_window_end_is_exclusive(self):
+        rule = RecurrenceRule(WEEKLY)
+        self.assertEqual(expand(rule, window_end=datetime(2025, 1, 15, 19)), [datetime(2025, 1, 1, 19), datetime(2025, 1, 8, 19)])
+
+    def test_endless_has_no_last(self):
+        self.assertIsNone(RecurrenceRule(WEEKLY).last(START))
+        self.assertIsNone(RecurrenceRule(MONTHLY, interval=3).last(START))
+
+
+class MonthlyTest(unittest.TestCase):
+    def test_interval(self):
+        rule = RecurrenceRule(MONTHLY, interval=3)
+        self.assertEqual(
+            expand(rule, window_start=datetime(2025, 2, 1), limit=3),
+            [datetime(2025, 4, 1, 19), datetime(2025, 7, 1, 19), datetime(2025, 10, 1, 19)]
+        )
+
+    def test_month_end_skips_short_months(self):
+        start = datetime(2025, 1, 31, 10, 0)
+        rule = RecurrenceRule(MONTHLY)
+        self.assertEqual(
+            expand(rule, start=start, window_start=start, limit=4),
+            [datetime(2025, 1, 31, 10), datetime(2025, 3, 31, 10), datetime(2025, 5, 31, 10), datetime(2025, 7, 31, 10)]
+        )
+        # 途中からの展開でも存在しない日は飛ばす
+        self.assertEqual(expand(rule, start=start, window_start=datetime(2025, 4, 1), limit=2),
+                         [datetime(2025, 5, 31, 10), datetime(2025, 7, 31, 10)])
+
+    def test_month_end_count_counts_only_existing_days(self):
+        start = datetime(2025, 1, 31, 10, 0)
+        rule = RecurrenceRule(MONTHLY, count=3)
+        self.assertEqual(expand(rule, start=start, window_start=start),
+                         [datetime(2025, 1, 31, 10), datetime(2025, 3, 31, 10), datetime(2025, 5, 31, 10)])
+        self.assertEqual(expand(rule, start=start, window_start=datetime(2025, 4, 1)), [datetime(2025, 5, 31, 10)])
+        self.assertEqual(rule.last(start), datetime(2025, 5, 31, 10))
+
+    def test_leap_day(self):
+        start = datetime(2024, 2, 29, 12, 0)
+        rule = RecurrenceRule(MONTHLY, interval=12)
+        self.assertEqual(expand(rule, start=start, window_start=start, limit=2),
+                         [datetime(2024, 2, 29, 12), datetime(2028, 2, 29, 12)])
+
+    def test_month_end_until(self):
+        start = datetime(2025, 1, 31, 10, 0)
+        rule = RecurrenceRule(MONTHLY, until=date(2025, 6, 30))
+        self.assertEqual(rule.last(start), datetime(2025, 5, 31, 10))
+        self.assertEqual(expand(rule, start=start, window_start=start)[-1], rule.last(start))
+
+    def test_exdates(self):
+        rule = RecurrenceRule(MONTHLY, count=4, exdates=[date(2025, 2, 1), date(2025, 3, 1)])
+        self.assertEqual(expand(rule), [datetime(2025, 1, 1, 19), datetime(2025, 4, 1, 19)])
+        self.assertEqual(rule.last(START), datetime(2025, 4, 1, 19))
+
+
+if __name__ == "__main__":
+    unittest.main()
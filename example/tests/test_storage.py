@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+データ保存（storage.py）のテスト
+
+同じファイルを2つの YamlStore で開き、2つのプロセスからの同時書き込みを再現します
+"""
+
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import storage
+from records import Event, events_from_yaml, events_to_yaml
+from storage import ChangeLog, FileLock, YamlStore, atomic_write
+
+
+def event(event_id: int, name: str) -> Event:
+    return Event.from_dict({"id": event_id, "name": name, "date": "2026-10-19 20:00", "description": ""})
+
+
+class Process:
+    """イベント管理と同じ手順で読み書きする1つのプロセス"""
+
+    def __init__(self, path: Path):
+        self.store = YamlStore(path)
+        self.changes = ChangeLog()
+        self.events = []
+
+    def load(self):
+        self.events = events_from_yaml(self.store.load())
+        self.changes.clear()
+
+    def find(self, event_id: int) -> Event:
+        return next(item for item in self.events if item.id == event_id)
+
+    def add(self, item: Event):
+        self.events.append(item)
+        self.changes.added(item)
+
+    def rename(self, event_id: int, name: str):
+        item = self.find(event_id)
+        item.set_field("name", name)
+        self.changes.updated(item)
+
+    def delete(self, event_id: int):
+        item = self.find(event_id)
+        self.events.remove(item)
+        self.changes.removed(item)
+
+    def save(self):
+        def merge(theirs):
+            if theirs is not None:
+                self.events = self.changes.apply(events_from_yaml(theirs))
+            return events_to_yaml(self.events)
+
+        self.store.save(merge)
+        self.changes.clear()
+
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "events.yaml"
+
+    def saved(self):
+        """ファイルに保存されているイベント（ID→名前）"""
+        return {item.id: item.name for item in events_from_yaml(YamlStore(self.path).load())}
+
+
+class ConcurrentWriteTest(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        first = Process(self.path)
+        first.add(event(1, "勉強会"))
+        first.add(event(2, "もくもく会"))
+        first.save()
+        self.a, self.b = Process(self.path), Process(self.path)
+        self.a.load()
+        self.b.load()
+
+    def test_changed_detects_other_writer(self):
+        self.assertFalse(self.a.store.changed())
+        self.b.rename(1, "勉強会（B）")
+        self.b.save()
+        self.assertTrue(self.a.store.changed())
+        self.assertFalse(self.b.store.changed())
+
+    def test_updates_to_different_records_merge(self):
+        self.a.rename(1, "勉強会（A）")
+        self.b.rename(2, "もくもく会（B）")
+        self.a.save()
+        self.b.save()
+        self.assertEqual(self.saved(), {1: "勉強会（A）", 2: "もくもく会（B）"})
+        self.assertEqual({item.id: item.name for item in self.b.events}, self.saved())
+
+    def test_same_new_id_is_reassigned(self):
+        self.a.add(event(3, "A の新規"))
+        self.b.add(event(3, "B の新規"))
+        self.a.save()
+        with self.assertLogs("sumeragi-storage", "WARNING") as logs:
+            self.b.save()
+        self.assertEqual(self.saved(), {1: "勉強会", 2: "もくもく会", 3: "A の新規", 4: "B の新規"})
+        self.assertTrue(any("3 が他のプロセスと重複したため 4 に変更します" in line for line in logs.output))
+        # 保存したプロセスのメモリ上のレコードにも新しいIDが反映される
+        self.assertEqual(self.b.find(4).name, "B の新規")
+
+    def test_new_ids_after_both_sides(self):
+        # 相手が大きいIDを追加していても、重複したIDはどちらのIDとも重ならない番号になる
+        self.a.add(event(3, "A の新規"))
+        self.a.add(event(10, "A の新規2"))
+        self.b.add(event(3, "B の新規"))
+        self.a.save()
+        self.b.save()
+        self.assertEqual(sorted(self.saved()), [1, 2, 3, 10, 11])
+
+    def test_delete_then_concurrent_update(self):
+        # 削除が先に保存され、後から保存した更新はレコードを書き戻す（後に保存した変更が優先）
+        self.a.delete(1)
+        self.b.rename(1, "勉強会（B）")
+        self.a.save()
+        self.b.save()
+        self.assertEqual(self.saved(), {1: "勉強会（B）", 2: "もくもく会"})
+
+    def test_update_then_concurrent_delete(self):
+        self.a.rename(1, "勉強会（A）")
+        self.b.delete(1)
+        self.a.save()
+        self.b.save()
+        self.assertEqual(self.saved(), {2: "もくもく会"})
+
+    def test_both_delete_same_record(self):
+        self.a.delete(2)
+        self.b.delete(2)
+        self.a.save()
+        self.b.save()
+        self.assertEqual(self.saved(), {1: "勉強会"})
+
+    def test_added_then_removed_is_not_a_delete(self):
+        # 保存前に追加して削除したレコードは、相手が同じIDで追加したレコードを消さない
+        self.a.add(event(3, "A の新規"))
+        self.b.add(event(3, "B の新規"))
+        self.b.delete(3)
+        self.a.save()
+        self.b.save()
+        self.assertEqual(self.saved(), {1: "勉強会", 2: "もくもく会", 3: "A の新規"})
+
+    def test_revision_survives_clear(self):
+        revision = self.a.changes.revision
+        self.a.rename(1, "勉強会（A）")
+        self.a.save()
+        self.assertFalse(self.a.changes)
+        self.assertEqual(self.a.changes.revision, revision + 1)
+
+
+class AtomicWriteTest(StorageTestCase):
+    def test_replaces_file_and_fsyncs_directory(self):
+        self.path.write_bytes(b"old")
+        synced = []
+        real_fsync = os.fsync
+
+        def fsync(fd):
+            synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+            real_fsync(fd)
+
+        with mock.patch.object(storage.os, "fsync", fsync):
+            atomic_write(self.path, b"new")
+        self.assertEqual(self.path.read_bytes(), b"new")
+        if hasattr(os, "O_DIRECTORY"):
+            # 一時ファイル、リネーム後のディレクトリの順にfsyncする
+            self.assertEqual(synced, [False, True])
+        self.assertEqual(os.listdir(self.path.parent), [self.path.name])
+
+    def test_failed_write_keeps_original(self):
+        self.path.write_bytes(b"old")
+        with mock.patch.object(storage.os, "replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                atomic_write(self.path, b"new")
+        self.assertEqual(self.path.read_bytes(), b"old")
+        # 一時ファイルは残らない
+        self.assertEqual(os.listdir(self.path.parent), [self.path.name])
+
+
+class FileLockTest(StorageTestCase):
+    def test_exclusive_between_instances(self):
+        first, second = FileLock(self.path), FileLock(self.path)
+        self.addCleanup(first.release)
+        self.addCleanup(second.release)
+        if storage.fcntl is None and storage.msvcrt is None:
+            self.skipTest("ロックに対応していないプラットフォーム")
+        self.assertTrue(first.try_acquire())
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+        self.assertFalse(second.locked)
+        first.release()
+        self.assertTrue(second.try_acquire())
+
+    def test_msvcrt_fallback(self):
+        # fcntl がない環境（Windows）では msvcrt.locking で先頭1バイトをロックする
+        msvcrt = mock.Mock(LK_LOCK=1, LK_NBLCK=2, LK_UNLCK=0)
+        with mock.patch.object(storage, "fcntl", None), mock.patch.object(storage, "msvcrt", msvcrt):
+            with FileLock(self.path) as lock:
+                self.assertTrue(lock.locked)
+                fd = lock._fd
+            self.assertFalse(lock.locked)
+            self.assertEqual(msvcrt.locking.call_args_list, [mock.call(fd, 1, 1), mock.call(fd, 0, 1)])
+
+            msvcrt.locking.reset_mock()
+            msvcrt.locking.side_effect = OSError("locked")
+            other = FileLock(self.path)
+            self.assertFalse(other.try_acquire())
+            self.assertFalse(other.locked)
+            msvcrt.locking.assert_called_once_with(mock.ANY, 2, 1)
+            with mock.patch.object(storage.os, "close", wraps=os.close) as close:
+                with self.assertRaises(OSError):
+                    other.acquire()
+            # 取得に失敗したロックファイルは閉じる
+            close.assert_called_once()
+            self.assertFalse(other.locked)
+
+    def test_no_locking_available(self):
+        # どちらも使えない環境ではロックせずに続行する
+        with mock.patch.object(storage, "fcntl", None), mock.patch.object(storage, "msvcrt", None):
+            first, second = FileLock(self.path), FileLock(self.path)
+            self.assertTrue(first.try_acquire())
+            self.assertTrue(second.try_acquire())
+            first.release()
+            second.release()
+            process = Process(self.path)
+            process.add(event(1, "勉強会"))
+            process.save()
+        self.assertEqual(self.saved(), {1: "勉強会"})
+
+
+if __name__ == "__main__":
+    unittest.main()
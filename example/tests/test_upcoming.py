@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+EventManager.upcoming()（複数イベントの開催日時のマージ）のテスト
+"""
+
+import itertools
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from event_manager import EventManager
+from records import Event
+
+
+def make_event(event_id: int, date: str, rrule: str = None, exdates=None) -> Event:
+    data = {"id": event_id, "name": f"イベント{event_id}", "date": date, "description": ""}
+    if rrule:
+        data["rrule"] = rrule
+    if exdates:
+        data["exdates"] = exdates
+    return Event.from_dict(data)
+
+
+class UpcomingTest(unittest.TestCase):
+    def setUp(self):
+        self.manager = EventManager(SimpleNamespace())
+        self.manager.events = [
+            make_event(1, "2025-01-01 19:00", "FREQ=WEEKLY"),
+            make_event(2, "2025-01-05 10:00", "FREQ=MONTHLY;COUNT=2"),
+            make_event(3, "2025-01-10 12:00"),
+            make_event(4, "2025-01-02 19:00", "FREQ=WEEKLY;INTERVAL=2", exdates=["2025-01-16"]),
+            make_event(5, "2025-01-31 09:00", "FREQ=MONTHLY;UNTIL=2025-05-31"),
+            make_event(6, "2024-12-01 09:00"),
+        ]
+
+    def test_merged_in_date_order_with_own_event(self):
+        window_start, window_end = datetime(2025, 1, 1), datetime(2025, 4, 1)
+        merged = list(self.manager.upcoming(window_start, window_end))
+
+        # 各イベントを個別に展開した結果と同じ組み合わせ・同じ順序になる
+        expected = sorted(
+            ((occurrence, event) for event in self.manager.events
+             for occurrence in event.occurrences(window_start, window_end)),
+            key=lambda item: item[0]
+        )
+        self.assertEqual([(when, event.id) for when, event in merged],
+                         [(when, event.id) for when, event in expected])
+        self.assertEqual([when for when, _ in merged], sorted(when for when, _ in merged))
+
+        by_event = {}
+        for when, event in merged:
+            by_event.setdefault(event.id, []).append(when)
+        self.assertEqual(by_event[2], [datetime(2025, 1, 5, 10), datetime(2025, 2, 5, 10)])
+        self.assertEqual(by_event[3], [datetime(2025, 1, 10, 12)])
+        self.assertEqual(by_event[4], [datetime(2025, 1, 2, 19), datetime(2025, 1, 30, 19),
+                                       datetime(2025, 2, 13, 19), datetime(2025, 2, 27, 19),
+                                       datetime(2025, 3, 13, 19), datetime(2025, 3, 27, 19)])
+        self.assertEqual(by_event[5], [datetime(2025, 1, 31, 9), datetime(2025, 3, 31, 9)])
+        self.assertEqual(len(by_event[1]), 13)
+        self.assertNotIn(6, by_event)
+
+    def test_endless_rules_are_expanded_lazily(self):
+        first = list(itertools.islice(self.manager.upcoming(datetime(2025, 3, 1)), 5))
+        self.assertEqual([(when, event.id) for when, event in first], [
+            (datetime(2025, 3, 5, 19), 1),
+            (datetime(2025, 3, 12, 19), 1),
+            (datetime(2025, 3, 13, 19), 4),
+            (datetime(2025, 3, 19, 19), 1),
+            (datetime(2025, 3, 26, 19), 1),
+        ])
+
+    def test_empty(self):
+        self.manager.events = []
+        self.assertEqual(list(self.manager.upcoming(datetime(2025, 1, 1))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
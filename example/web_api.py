@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+S.U.M.E.R.A.G.I. Discord Bot Web API モジュール
+
+リソースと今後のイベントをJSONで返す読み取り専用のHTTP APIをBotのプロセス内で提供するためのCog
+- データはYAMLファイルを読み直さず、各Cogのメモリ上のデータとインデックスから返します
+- ETag はデータのバージョンとリクエストの条件から決まる強いETagで、If-None-Match が一致すれば304を返します
+- 生成したレスポンス（gzip圧縮したものを含む）はETagごとに一定件数までキャッシュします
+- 一覧はカーソルでページ分割します
+
+WEB_API_PORT を設定した場合だけ起動します
+例: curl -i --compressed "http://127.0.0.1:8080/api/resources?tag=PyTorch&limit=20"
+"""
+
+import os
+import gzip
+import json
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from discord.ext import commands
+
+from facets import FACETS
+from readiness import get_readiness
+from records import DATE_FORMAT, Event, Resource, pack_time, unpack_time
+
+# ロギングの設定
+logger = logging.getLogger("sumeragi-web-api")
+
+# 待ち受けるアドレスとポート（ポートが未設定の場合は起動しない）
+WEB_API_HOST = os.getenv("WEB_API_HOST", "127.0.0.1")
+WEB_API_PORT = os.getenv("WEB_API_PORT", "")
+
+# 1ページの件数（既定値と上限）
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# イベント一覧の期間（日数、既定値と上限）
+DEFAULT_EVENT_DAYS = 30
+MAX_EVENT_DAYS = 365
+
+# この大きさ以上のレスポンスだけをgzip圧縮する（バイト）
+GZIP_MIN_SIZE = 1024
+
+# キャッシュするレスポンスの最大件数
+RESPONSE_CACHE_SIZE = 256
+
+# ページ間で使い回す絞り込み結果（ビットマップとファセットごとの件数）の最大件数
+FILTER_CACHE_SIZE = 32
+
+# データの読み込み中に返す Retry-After（秒）
+RETRY_AFTER = 5
+
+
+class ApiError(Exception):
+    """エラーの応答を返すための例外（ミドルウェアがJSONのエラー応答に変換する）"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers
+
+
+class BadRequest(ApiError):
+    """リクエストの条件が不正な場合の例外（400を返す）"""
+
+    def __init__(self, message: str):
+        super().__init__(400, message)
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    """ApiError をJSONのエラー応答に変換"""
+    try:
+        return await handler(request)
+    except ApiError as e:
+        return web.json_response({"error": str(e)}, status=e.status, headers=e.headers,
+                                 dumps=lambda data: json.dumps(data, ensure_ascii=False))
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """ページの続きを表すカーソルを作成"""
+    text = json.dumps(values, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    """カーソルを解析（不正な場合は BadRequest）"""
+    if not cursor:
+        return {}
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        values = json.loads(text)
+    except (ValueError, UnicodeDecodeError):
+        raise BadRequest("cursor が不正です")
+    if not isinstance(values, dict):
+        raise BadRequest("cursor が不正です")
+    return values
+
+
+def parse_int(request: web.Request, name: str, default: int, minimum: int, maximum: int) -> int:
+    """整数のクエリパラメータを取得（範囲外は BadRequest）"""
+    value = request.query.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} は整数で指定してください")
+    if not minimum <= number <= maximum:
+        raise BadRequest(f"{name} は{minimum}〜{maximum}の範囲で指定してください")
+    return number
+
+
+def facet_query(request: web.Request) -> Dict[str, List[str]]:
+    """category / difficulty / tag のクエリパラメータをファセット条件に変換
+
+    同じパラメータの繰り返しとカンマ区切りの値はORとして扱います（!resource list と同じ）
+    """
+    query: Dict[str, List[str]] = {}
+    for facet in FACETS:
+        values = [value for param in request.query.getall(facet, []) for value in param.split(",") if value]
+        if values:
+            query[facet] = values
+    return query
+
+
+def accepts_gzip(request: web.Request) -> bool:
+    """Accept-Encoding で gzip が受け入れられているか"""
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().replace(" ", "")
+            return quality not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def matching_etag(request: web.Request, etags: Tuple[str, ...]) -> Optional[str]:
+    """If-None-Match に含まれるETagのうち一致したもの（弱い比較、一致しなければNone）"""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etags[0]
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return tag
+    return None
+
+
+def resource_to_json(resource: Resource, health=None) -> Dict[str, Any]:
+    """リソースをAPIの形式に変換"""
+    data = resource.to_dict()
+    data["category"] = resource.category
+    data["tags"] = list(resource.tags or ())
+    data["link"] = None if health is None or health.url != resource.url else {
+        "ok": health.ok,
+        "status": health.status,
+        "checked_at": health.checked_at,
+    }
+    return data
+
+
+def occurrence_to_json(occurrence: datetime, event: Event) -> Dict[str, Any]:
+    """イベントの開催回をAPIの形式に変換"""
+    return {
+        "id": event.id,
+        "name": event.name,
+        "date": occurrence.strftime(DATE_FORMAT),
+        "description": event.description,
+        "location": event.location,
+        "url": event.url,
+        "recurring": bool(event.rrule),
+    }
+
+
+class ResponseCache:
+    """ETagごとの生成済みレスポンスのキャッシュ（古いものから破棄）"""
+
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: str, body: bytes):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def memory_usage(self) -> int:
+        """キャッシュしている本文の合計サイズ（バイト）"""
+        return sum(len(body) for body in self._entries.values())
+
+
+class WebApi(commands.Cog):
+    """読み取り専用のWeb APIを提供するCog"""
+
+    def __init__(self, bot, host: str = WEB_API_HOST, port: int = 0):
+        """初期化"""
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.readiness = get_readiness(bot)
+        self.cache = ResponseCache()
+        self.filters: "OrderedDict[Any, Tuple[Any, Dict[str, List[Tuple[str, int]]]]]" = OrderedDict()
+        self.runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application(middlewares=[error_middleware])
+        self.app.router.add_get("/api/resources", self.get_resources)
+        self.app.router.add_get("/api/resources/{resource_id}", self.get_resource)
+        self.app.router.add_get("/api/events", self.get_events)
+
+    async def cog_load(self):
+        """Cogの読み込み時にHTTPサーバーを起動"""
+        # アクセスログはBotのログに混ぜない
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        try:
+            await web.TCPSite(self.runner, self.host, self.port).start()
+        except OSError as e:
+            # 複数のプロセスを起動している場合など、ポートを使えないときはAPIなしで動作を続ける
+            logger.error(f"Web APIを起動できませんでした（{self.host}:{self.port}）: {e}")
+            await self.runner.cleanup()
+            self.runner = None
+            return
+        logger.info(f"Web APIを起動しました: http://{self.host}:{self.port}/api/")
+
+    async def cog_unload(self):
+        """Cogのアンロード時にHTTPサーバーを停止"""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def memory_stats(self) -> Dict[str, Tuple[int, int]]:
+        """レスポンスキャッシュの件数とサイズ（!memstats 用）"""
+        return {
+            "response_cache": (len(self.cache), self.cache.memory_usage()),
+            "filter_cache": (len(self.filters), sum(bitmap.memory_usage() for bitmap, _ in self.filters.values())),
+        }
+
+    def _data_cog(self, name: str):
+        """データを持つCogを取得（読み込み中の場合は503を返す）"""
+        cog = self.bot.get_cog(name)
+        if cog is None:
+            raise ApiError(404, f"{name} が読み込まれていません")
+        if not self.readiness.is_ready(name):
+            raise ApiError(503, "データを読み込んでいます", headers={"Retry-After": str(RETRY_AFTER)})
+        # コマンドと同じく、他のプロセスによる更新を反映してから返す
+        cog.reload_if_changed()
+        return cog
+
+    def respond(self, request: web.Request, version: Tuple[Any, ...],
+                build: Callable[[], Dict[str, Any]]) -> web.Response:
+        """バージョンとリクエストの条件からETagを決め、304・キャッシュ・生成のいずれかで応答する
+
+        同じバージョン・同じ条件であれば本文は同じになるため、ETagは本文を生成する前に決まります
+        gzip圧縮した本文は別の表現として、末尾に -gzip を付けたETagを使います
+        """
+        key = repr((request.path, sorted(request.query.items()), version))
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:32]
+        etag = f'"{digest}"'
+        gzip_etag = f'"{digest}-gzip"'
+        headers = {
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        matched = matching_etag(request, (etag, gzip_etag))
+        if matched is not None:
+            headers["ETag"] = matched
+            return web.Response(status=304, headers=headers)
+
+        body = self.cache.get(etag)
+        if body is None:
+            body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.cache.put(etag, body)
+
+        if len(body) >= GZIP_MIN_SIZE and accepts_gzip(request):
+            compressed = self.cache.get(gzip_etag)
+            if compressed is None:
+                compressed = gzip.compress(body, compresslevel=6)
+                self.cache.put(gzip_etag, compressed)
+            headers["ETag"] = gzip_etag
+            headers["Content-Encoding"] = "gzip"
+            body = compressed
+        else:
+            headers["ETag"] = etag
+
+        return web.Response(body=body, headers=headers, content_type="application/json", charset="utf-8")
+
+    async def get_resources(self, request: web.Request) -> web.Response:
+        """リソース一覧
+
+        パラメータ: q（タイトル・説明・タグの部分一致）, category, difficulty, tag, limit, cursor
+        結果はID順で、ファセットごとの件数（facets）を含みます
+        """
+        manager = self._data_cog("ResourceManager")
+        query = facet_query(request)
+        text = request.query.get("q", "").strip()
+        limit = parse_int(request, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        after = decode_cursor(request.query.get("cursor")).get("after", 0)
+        if not isinstance(after, int):
+            raise BadRequest("cursor が不正です")
+
+        def build() -> Dict[str, Any]:
+            bitmap, facet_counts = self._filter(manager, query, text)
+            # ビットマップはID順のため、カーソルのIDの次から limit+1 件だけを走査する
+            page = manager.facets.resources(bitmap, limit=limit + 1, after=after)
+            has_more = len(page) > limit
+            page = page[:limit]
+            return {
+                "total": manager.facets.count(bitmap),
+                "items": [resource_to_json(resource, manager.link_health.get(resource.id)) for resource in page],
+                "facets": {
+                    facet: [{"value": value, "count": count} for value, count in values]
+                    for facet, values in facet_counts.items()
+                },
+                "next_cursor": encode_cursor({"after": page[-1].id}) if has_more else None,
+            }
+
+        return self.respond(request, manager.data_version(), build)
+
+    def _filter(self, manager, query: Dict[str, List[str]], text: str):
+        """絞り込み結果のビットマップとファセットごとの件数（同じデータ・同じ条件ならページ間で使い回す）"""
+        key = (manager.data_version(), tuple(sorted((facet, tuple(values)) for facet, values in query.items())), text)
+        cached = self.filters.get(key)
+        if cached is not None:
+            self.filters.move_to_end(key)
+            return cached
+        facets = manager.facets
+        bitmap = facets.filter(query)
+        if text:
+            bitmap &= facets.bitmap(resource.id for resource in manager.search(text))
+        cached = self.filters[key] = (bitmap, facets.facet_counts(bitmap))
+        while len(self.filters) > FILTER_CACHE_SIZE:
+            self.filters.popitem(last=False)
+        return cached
+
+    async def get_resource(self, request: web.Request) -> web.Response:
+        """IDを指定したリソース1件"""
+        manager = self._data_cog("ResourceManager")
+        try:
+            resource_id = int(request.match_info["resource_id"])
+        except ValueError:
+            raise BadRequest("リソースIDは整数で指定してください")
+        resource = manager.facets.get(resource_id)
+        if resource is None:
+            raise ApiError(404, f"ID {resource_id} のリソースは見つかりません")
+
+        return self.respond(request, manager.data_version(),
+                            lambda: resource_to_json(resource, manager.link_health.get(resource.id)))
+
+    async def get_events(self, request: web.Request) -> web.Response:
+        """今後のイベント（定期開催は開催回ごと）
+
+        パラメータ: days（現在から何日先まで）, limit, cursor
+        カーソルは最後に返した開催日時と、その日時の開催回をいくつ返したかを持ちます
+        """
+        manager = self._data_cog("EventManager")
+        days = parse_int(request, "days", DEFAULT_EVENT_DAYS, 1, MAX_EVENT_DAYS)
+        limit = parse_int(request, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        cursor = decode_cursor(request.query.get("cursor"))
+        start_value, skip = cursor.get("at"), cursor.get("skip", 0)
+        if (start_value is not None and not isinstance(start_value, int)) or not isinstance(skip, int):
+            raise BadRequest("cursor が不正です")
+
+        # 開催日時は分単位のため、一覧の内容は分が変わるまで同じ
+        now = datetime.now().replace(second=0, microsecond=0)
+        window_end = now + timedelta(days=days)
+        window_start = now if start_value is None else datetime.strptime(unpack_time(start_value), DATE_FORMAT)
+
+        def build() -> Dict[str, Any]:
+            items: List[Dict[str, Any]] = []
+            last: Optional[datetime] = None
+            same_time = 0
+            has_more = False
+            remaining = skip
+            for occurrence, event in manager.upcoming(window_start, window_end):
+                if remaining and occurrence == window_start:
+                    remaining -= 1
+                    continue
+                if len(items) >= limit:
+                    has_more = True
+                    break
+                items.append(occurrence_to_json(occurrence, event))
+                same_time = same_time + 1 if occurrence == last else 1
+                last = occurrence
+            if has_more and last == window_start:
+                same_time += skip
+            return {
+                "from": now.strftime(DATE_FORMAT),
+                "to": window_end.strftime(DATE_FORMAT),
+                "items": items,
+                "next_cursor": encode_cursor({"at": pack_time(last.strftime(DATE_FORMAT)), "skip": same_time})
+                if has_more else None,
+            }
+
+        return self.respond(request, manager.data_version() + (now,), build)
+
+
+async def setup(bot):
+    """Cogをボットに追加（WEB_API_PORT が未設定の場合は何もしない）"""
+    if not WEB_API_PORT:
+        logger.info("WEB_API_PORT が設定されていないため、Web APIは起動しません")
+        return
+    await bot.add_cog(WebApi(bot, WEB_API_HOST, int(WEB_API_PORT)))